@@ -0,0 +1,58 @@
+"""notify changed line areas for tile caches
+
+Revision ID: line_area_notify_001
+Revises: line_path_details_001
+Create Date: 2026-10-15
+
+A row trigger on lines sends pg_notify('line_areas', 'xmin,ymin,xmax,ymax')
+with the bounding box of the old and new path whenever a line's path, name
+or status changes, so workers can drop only the vector tiles it overlaps.
+Being a trigger, it also covers the path computation job.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "line_area_notify_001"
+down_revision: Union[str, None] = "line_path_details_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE FUNCTION notify_line_area() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            area box2d;
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND NEW.path IS NOT DISTINCT FROM OLD.path
+               AND NEW.name = OLD.name
+               AND NEW.status = OLD.status THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                area := Box2D(OLD.path);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                area := ST_CombineBBox(area, NEW.path);
+            END IF;
+            IF area IS NOT NULL THEN
+                PERFORM pg_notify(
+                    'line_areas',
+                    concat_ws(',', ST_XMin(area), ST_YMin(area), ST_XMax(area), ST_YMax(area))
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute(
+        "CREATE TRIGGER lines_notify_area AFTER INSERT OR UPDATE OR DELETE ON lines "
+        "FOR EACH ROW EXECUTE FUNCTION notify_line_area()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER lines_notify_area ON lines")
+    op.execute("DROP FUNCTION notify_line_area()")
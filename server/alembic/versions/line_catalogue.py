@@ -0,0 +1,31 @@
+"""add line catalogue version
+
+Revision ID: line_catalogue_001
+Revises: partition_time_series_001
+Create Date: 2026-10-15
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "line_catalogue_001"
+down_revision: Union[str, None] = "partition_time_series_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "line_catalogue",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("INSERT INTO line_catalogue (id, version, updated_at) VALUES (1, 0, timezone('utc', now()))")
+
+
+def downgrade() -> None:
+    op.drop_table("line_catalogue")
@@ -0,0 +1,47 @@
+"""add line change log
+
+Revision ID: line_changes_001
+Revises: line_catalogue_001
+Create Date: 2026-10-15
+
+Existing lines are logged as created under one new catalogue version so
+that a sync from version 0 returns the whole catalogue.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "line_changes_001"
+down_revision: Union[str, None] = "line_catalogue_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+line_change_kind = sa.Enum("CREATED", "UPDATED", "APPROVED", "MERGED", "DELETED", name="linechangekind")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "line_changes",
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("line_id", sa.Integer(), nullable=False),
+        sa.Column("change", line_change_kind, nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("version", "line_id"),
+    )
+    op.execute("""
+        WITH bumped AS (
+            UPDATE line_catalogue
+            SET version = version + 1, updated_at = timezone('utc', now())
+            WHERE id = 1
+            RETURNING version
+        )
+        INSERT INTO line_changes (version, line_id, change, changed_at)
+        SELECT bumped.version, lines.id, 'CREATED', timezone('utc', now())
+        FROM lines, bumped
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("line_changes")
+    line_change_kind.drop(op.get_bind(), checkfirst=True)
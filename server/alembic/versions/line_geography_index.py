@@ -0,0 +1,32 @@
+"""add geography index on line paths
+
+Revision ID: line_geography_index_001
+Revises: remove_users_001
+Create Date: 2026-10-15
+
+The geometry GiST index on lines.path cannot serve distance queries in
+meters. This functional index on geography(path) can, as long as queries
+use the same expression (see services.spatial).
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "line_geography_index_001"
+down_revision: Union[str, None] = "remove_users_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_lines_path_geography",
+        "lines",
+        [sa.text("geography(path)")],
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_lines_path_geography", table_name="lines")
@@ -0,0 +1,41 @@
+"""add simplified line paths
+
+Revision ID: line_path_details_001
+Revises: line_changes_001
+Create Date: 2026-10-15
+
+Douglas-Peucker simplifications of lines.path at three tolerances, as
+stored generated columns so PostgreSQL recomputes them whenever the path
+is written (by the API or by the path computation job). Adding them
+rewrites the lines table once.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from geoalchemy2 import Geometry
+
+revision: str = "line_path_details_001"
+down_revision: Union[str, None] = "line_changes_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same values as models.line.PATH_TOLERANCES, in degrees
+TOLERANCES = {"high": 0.00001, "medium": 0.0001, "low": 0.0005}
+
+
+def upgrade() -> None:
+    for detail, tolerance in TOLERANCES.items():
+        op.add_column(
+            "lines",
+            sa.Column(
+                f"path_{detail}",
+                Geometry(geometry_type="LINESTRING", srid=4326, spatial_index=False),
+                sa.Computed(f"ST_Simplify(path, {tolerance}, true)", persisted=True),
+            ),
+        )
+
+
+def downgrade() -> None:
+    for detail in TOLERANCES:
+        op.drop_column("lines", f"path_{detail}")
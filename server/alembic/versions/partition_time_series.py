@@ -0,0 +1,143 @@
+"""partition location_points and sensor_readings by month
+
+Revision ID: partition_time_series_001
+Revises: session_timestamp_indexes_001
+Create Date: 2026-10-15
+
+Both tables are rebuilt as RANGE (timestamp) partitioned tables with one
+partition per month and a default partition. Partitions are created for
+every month that has data plus the next three; after that,
+`python -m commands.partitions` keeps them ahead (see services.partitions).
+The primary key becomes (id, timestamp) because a partitioned table's
+unique constraints must include the partition key; ids keep coming from
+the existing sequences.
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from geoalchemy2 import Geometry
+
+revision: str = "partition_time_series_001"
+down_revision: Union[str, None] = "session_timestamp_indexes_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _columns(table: str) -> list[sa.Column]:
+    if table == "location_points":
+        data = [
+            sa.Column("latitude", sa.Float(), nullable=False),
+            sa.Column("longitude", sa.Float(), nullable=False),
+            sa.Column("altitude", sa.Float(), nullable=True),
+            sa.Column("speed", sa.Float(), nullable=True),
+            sa.Column("bearing", sa.Float(), nullable=True),
+            sa.Column("horizontal_accuracy", sa.Float(), nullable=True),
+            sa.Column("vertical_accuracy", sa.Float(), nullable=True),
+        ]
+    else:
+        data = [
+            sa.Column(name, sa.Float(), nullable=True)
+            for name in ("accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z", "pressure", "magnetic_heading")
+        ]
+    columns = [
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        *data,
+        sa.Column("id", sa.Integer(), nullable=False, server_default=sa.text(f"nextval('{table}_id_seq')")),
+        sa.Column("session_id", sa.Integer(), nullable=False),
+    ]
+    if table == "location_points":
+        columns.append(sa.Column(
+            "point",
+            Geometry(geometry_type="POINT", srid=4326, dimension=2, spatial_index=False,
+                     from_text="ST_GeomFromEWKT", name="geometry"),
+            nullable=True,
+        ))
+    return columns
+
+
+def _create_indexes(table: str) -> None:
+    op.create_index(f"ix_{table}_session_id_timestamp", table, ["session_id", "timestamp", "id"])
+    if table == "location_points":
+        op.create_geospatial_index(
+            "idx_location_points_point", "location_points", ["point"],
+            unique=False, postgresql_using="gist", postgresql_ops={},
+        )
+
+
+def _drop_indexes(table: str) -> None:
+    op.drop_index(f"ix_{table}_session_id_timestamp", table_name=table)
+    if table == "location_points":
+        op.drop_geospatial_index(
+            "idx_location_points_point", table_name="location_points",
+            postgresql_using="gist", column_name="point",
+        )
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _move_aside(table: str) -> str:
+    """Rename a table out of the way, keeping its id sequence alive."""
+    old = f"{table}_old"
+    _drop_indexes(table)
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    return old
+
+
+def _copy_and_drop(old: str, table: str) -> None:
+    names = ", ".join(f'"{c.name}"' for c in _columns(table))
+    op.execute(f"INSERT INTO {table} ({names}) SELECT {names} FROM {old}")
+    op.execute(f"DROP TABLE {old}")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def upgrade() -> None:
+    this_month = date.today().replace(day=1)
+    for table in ("location_points", "sensor_readings"):
+        old = _move_aside(table)
+
+        op.create_table(
+            table,
+            *_columns(table),
+            sa.ForeignKeyConstraint(["session_id"], ["recording_sessions.id"]),
+            sa.PrimaryKeyConstraint("id", "timestamp", name=f"{table}_pkey"),
+            postgresql_partition_by="RANGE (timestamp)",
+        )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        oldest: datetime | None = op.get_bind().execute(sa.text(f"SELECT min(timestamp) FROM {old}")).scalar()
+        month = min(oldest.date().replace(day=1), this_month) if oldest else this_month
+        while month <= _add_months(this_month, MONTHS_AHEAD):
+            upper = _add_months(month, 1)
+            op.execute(
+                f"CREATE TABLE {table}_y{month.year:04d}m{month.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            month = upper
+
+        _copy_and_drop(old, table)
+        _create_indexes(table)
+
+
+def downgrade() -> None:
+    for table in ("sensor_readings", "location_points"):
+        old = _move_aside(table)
+
+        op.create_table(
+            table,
+            *_columns(table),
+            sa.ForeignKeyConstraint(["session_id"], ["recording_sessions.id"]),
+            sa.PrimaryKeyConstraint("id", name=f"{table}_pkey"),
+        )
+
+        # Dropping the partitioned table drops its partitions
+        _copy_and_drop(old, table)
+        _create_indexes(table)
@@ -0,0 +1,42 @@
+"""composite (session_id, timestamp) indexes on location points and sensor readings
+
+Revision ID: session_timestamp_indexes_001
+Revises: line_geography_index_001
+Create Date: 2026-10-15
+
+Per-session reads are ordered by (timestamp, id); with only session_id
+indexed every page re-sorted the whole session. The composite indexes
+also cover lookups by session_id alone, so the single-column ones go.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "session_timestamp_indexes_001"
+down_revision: Union[str, None] = "line_geography_index_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_location_points_session_id_timestamp",
+        "location_points",
+        ["session_id", "timestamp", "id"],
+    )
+    op.drop_index("ix_location_points_session_id", table_name="location_points")
+
+    op.create_index(
+        "ix_sensor_readings_session_id_timestamp",
+        "sensor_readings",
+        ["session_id", "timestamp", "id"],
+    )
+    op.drop_index("ix_sensor_readings_session_id", table_name="sensor_readings")
+
+
+def downgrade() -> None:
+    op.create_index("ix_sensor_readings_session_id", "sensor_readings", ["session_id"])
+    op.drop_index("ix_sensor_readings_session_id_timestamp", table_name="sensor_readings")
+
+    op.create_index("ix_location_points_session_id", "location_points", ["session_id"])
+    op.drop_index("ix_location_points_session_id_timestamp", table_name="location_points")
@@ -0,0 +1,80 @@
+"""idempotent batch uploads
+
+Revision ID: upload_idempotency_001
+Revises: line_area_notify_001
+Create Date: 2026-10-15
+
+Retried uploads used to store every point again. A unique index on
+(session_id, timestamp) is added to location_points; bulk inserts skip
+conflicting points from now on. The index includes the partition key, so
+it can live on the partitioned table. Timestamps being unique within a
+session, it also serves (timestamp, id) ordered reads, so the
+(session_id, timestamp, id) index of location_points is dropped rather
+than kept as a near-duplicate on every insert.
+
+sensor_readings keeps its non-unique index: accelerometer and gyroscope
+samples are sent separately and may share a timestamp to the millisecond.
+
+No rows are deleted. If a session already holds two points at the same
+timestamp, the upgrade stops before changing anything and lists how many
+there are, so they can be reviewed by hand.
+
+upload_batches remembers the outcome of each batch sent with an
+Idempotency-Key header.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "upload_idempotency_001"
+down_revision: Union[str, None] = "line_area_notify_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+upload_stream = sa.Enum("LOCATIONS", "SENSORS", name="uploadstream")
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT count(*) FROM ("
+        "SELECT 1 FROM location_points GROUP BY session_id, timestamp HAVING count(*) > 1"
+        ") AS duplicated"
+    )).scalar_one()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (session_id, timestamp) pairs of location_points hold more than one "
+            "point; resolve them before adding uq_location_points_session_id_timestamp"
+        )
+    op.create_index(
+        "uq_location_points_session_id_timestamp",
+        "location_points",
+        ["session_id", "timestamp"],
+        unique=True,
+    )
+    op.drop_index("ix_location_points_session_id_timestamp", table_name="location_points")
+
+    op.create_table(
+        "upload_batches",
+        sa.Column("session_id", sa.Integer(), nullable=False),
+        sa.Column("stream", upload_stream, nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("added", sa.Integer(), nullable=False),
+        sa.Column("duplicates", sa.Integer(), nullable=False),
+        sa.Column("first_timestamp", sa.DateTime(), nullable=False),
+        sa.Column("last_timestamp", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["session_id"], ["recording_sessions.id"]),
+        sa.PrimaryKeyConstraint("session_id", "stream", "key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("upload_batches")
+    upload_stream.drop(op.get_bind(), checkfirst=True)
+    op.create_index(
+        "ix_location_points_session_id_timestamp",
+        "location_points",
+        ["session_id", "timestamp", "id"],
+    )
+    op.drop_index("uq_location_points_session_id_timestamp", table_name="location_points")
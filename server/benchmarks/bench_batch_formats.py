@@ -0,0 +1,65 @@
+"""
+Benchmark batch body decoding: JSON + Pydantic validation vs. the packed columnar format.
+
+Measures only parsing, validation and transposition into insert-ready
+column lists (what the batch endpoints do before touching the database),
+so it needs no database:
+
+    uv run python -m benchmarks.bench_batch_formats --rows 6000 --repeat 5
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from models.recording import SensorReadingBatch
+from services.columnar import decode_sensor_batch, encode_sensor_batch
+from services.ingest import SENSOR_COLUMNS, sensor_columns
+
+
+def make_columns(rows: int) -> dict[str, list]:
+    start = datetime(2026, 3, 1, 7, 30)
+    columns: dict[str, list] = {"timestamp": [start + timedelta(milliseconds=10 * i) for i in range(rows)]}
+    for n, name in enumerate(SENSOR_COLUMNS[1:]):
+        columns[name] = [((i * 7 + n * 13) % 3600) / 10.0 for i in range(rows)]
+    return columns
+
+
+def make_json(columns: dict[str, list]) -> bytes:
+    names = list(columns)
+    readings = [
+        {name: (value.isoformat() if name == "timestamp" else value) for name, value in zip(names, row)}
+        for row in zip(*columns.values())
+    ]
+    return json.dumps({"readings": readings}).encode()
+
+
+def decode_json(body: bytes) -> dict[str, list]:
+    return sensor_columns(SensorReadingBatch.model_validate_json(body).readings)
+
+
+def run(name: str, decode, body: bytes, rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decode(body)
+        best = min(best, time.perf_counter() - started)
+    rate = rows / best
+    print(f"{name:>9}: {len(body) / 1024:9.1f} KiB  {best * 1000:8.2f} ms  {rate:12,.0f} rows/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=6000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    columns = make_columns(args.rows)
+    json_rate = run("json", decode_json, make_json(columns), args.rows, args.repeat)
+    columnar_rate = run("columnar", decode_sensor_batch, encode_sensor_batch(columns), args.rows, args.repeat)
+    print(f"speedup: {columnar_rate / json_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
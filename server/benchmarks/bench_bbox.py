@@ -0,0 +1,81 @@
+"""
+Benchmark viewport reads: the full line list vs. GET /lines/bbox.
+
+Map clients used to download every line and filter on the device. Generates
+--lines random lines around Cochabamba inside a transaction that is rolled
+back, then times both reads, including JSON serialization, for random
+viewports of --span degrees:
+
+    uv run python -m benchmarks.bench_bbox --lines 10000 --queries 100
+
+Reports time and payload size per viewport.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy import text
+
+from benchmarks.bench_nearby import _INSERT_LINES
+from database import AsyncSessionLocal
+from models.line import LineDetail, LineRead
+from services.spatial import lines_in_bbox_query, lines_with_path, viewport_detail
+
+_line_list = TypeAdapter(list[LineRead])
+
+VIEWPORT_PIXELS = 1024
+
+
+def serialize(rows) -> bytes:
+    return _line_list.dump_json([LineRead.from_line(ln, path) for ln, path in rows])
+
+
+async def run(name: str, db, read: Callable[[float, float], Awaitable[bytes]], corners) -> float:
+    size = 0
+    started = time.perf_counter()
+    for min_lon, min_lat in corners:
+        size += len(await read(min_lon, min_lat))
+        db.expunge_all()
+    per_query = (time.perf_counter() - started) / len(corners) * 1000
+    print(f"{name:>9}: {per_query:8.2f} ms/viewport  {size / len(corners):12,.0f} bytes/viewport")
+    return per_query
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--span", type=float, default=0.02, help="Viewport width and height in degrees")
+    parser.add_argument("--limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    random.seed(42)
+    corners = [
+        (-66.25 + (0.2 - args.span) * random.random(), -17.48 + (0.2 - args.span) * random.random())
+        for _ in range(args.queries)
+    ]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(_INSERT_LINES, {"count": args.lines})
+        await db.execute(text("ANALYZE lines"))
+
+        async def full_list(min_lon: float, min_lat: float) -> bytes:
+            return serialize((await db.execute(lines_with_path(LineDetail.FULL))).all())
+
+        async def bbox(min_lon: float, min_lat: float) -> bytes:
+            max_lon, max_lat = min_lon + args.span, min_lat + args.span
+            detail = viewport_detail(min_lon, max_lon, VIEWPORT_PIXELS)
+            query = lines_in_bbox_query(min_lon, min_lat, max_lon, max_lat, detail).limit(args.limit)
+            return serialize((await db.execute(query)).all())
+
+        everything = await run("full list", db, full_list, corners)
+        viewport = await run("bbox", db, bbox, corners)
+        await db.rollback()
+    print(f"speedup: {everything / viewport:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
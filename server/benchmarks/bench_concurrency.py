@@ -0,0 +1,77 @@
+"""
+Benchmark concurrent request throughput: sync routes on the threadpool vs. async routes on asyncpg.
+
+Mounts the same read-only query twice, once as a sync handler using get_db
+and once as an async handler using get_async_db, and drives each with the
+same number of concurrent in-process requests. --latency adds a server-side
+pg_sleep to every query to model a slower database round trip:
+
+    uv run python -m benchmarks.bench_concurrency --requests 2000 --concurrency 100 --latency 0.01
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import async_engine, engine, get_async_db, get_db
+from models.line import Line
+
+
+def make_app(latency: float) -> FastAPI:
+    query = select(Line.id, Line.name, func.pg_sleep(latency)).limit(20)
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_lines(db: Session = Depends(get_db)) -> list[int]:
+        return [row.id for row in db.execute(query)]
+
+    @app.get("/async")
+    async def async_lines(db: AsyncSession = Depends(get_async_db)) -> list[int]:
+        return [row.id for row in await db.execute(query)]
+
+    return app
+
+
+async def run(name: str, client: httpx.AsyncClient, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            response = await client.get(f"/{name}")
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    rate = requests / elapsed
+    print(f"{name:>5}: {elapsed * 1000:9.1f} ms  {rate:10,.0f} req/s")
+    return rate
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds of pg_sleep per query")
+    args = parser.parse_args()
+
+    engine.echo = async_engine.echo = False
+    transport = httpx.ASGITransport(app=make_app(args.latency))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up both connection pools before timing
+        await run("sync", client, args.concurrency, args.concurrency)
+        await run("async", client, args.concurrency, args.concurrency)
+        print("---")
+        sync_rate = await run("sync", client, args.requests, args.concurrency)
+        async_rate = await run("async", client, args.requests, args.concurrency)
+    print(f"speedup: {async_rate / sync_rate:.1f}x")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
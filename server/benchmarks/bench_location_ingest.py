@@ -0,0 +1,83 @@
+"""
+Benchmark location batch ingest: per-row ORM inserts vs. the bulk unnest INSERT.
+
+Runs against DATABASE_URL inside a transaction that is rolled back, so it is
+safe to point at a development database:
+
+    uv run python -m benchmarks.bench_location_ingest --points 5000 --repeat 3
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from database import AsyncSessionLocal
+from models.recording import LocationPoint, LocationPointCreate, RecordingSession
+from services.ingest import insert_location_points
+
+
+def make_points(count: int) -> list[LocationPointCreate]:
+    start = datetime.utcnow()
+    return [
+        LocationPointCreate(
+            timestamp=start + timedelta(seconds=i),
+            latitude=-17.39 + i * 1e-5,
+            longitude=-66.15 + i * 1e-5,
+            altitude=2558.0,
+            speed=8.3,
+            bearing=90.0,
+            horizontal_accuracy=5.0,
+        )
+        for i in range(count)
+    ]
+
+
+async def orm_insert(db, session_id: int, points: list[LocationPointCreate]) -> None:
+    """The previous implementation: one ORM object with a SQL geometry expression per point."""
+    db.add_all([
+        LocationPoint(
+            session_id=session_id,
+            **p.model_dump(),
+            point=func.ST_GeomFromEWKT(f"SRID=4326;POINT({p.longitude} {p.latitude})"),
+        )
+        for p in points
+    ])
+    await db.flush()
+
+
+async def bulk_insert(db, session_id: int, points: list[LocationPointCreate]) -> None:
+    await insert_location_points(db, session_id, points)
+
+
+async def run(name: str, insert, points: list[LocationPointCreate], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            session = RecordingSession()
+            db.add(session)
+            await db.flush()
+            started = time.perf_counter()
+            await insert(db, session.id, points)
+            best = min(best, time.perf_counter() - started)
+            await db.rollback()
+    rate = len(points) / best
+    print(f"{name:>6}: {best * 1000:9.1f} ms  {rate:12,.0f} rows/s")
+    return rate
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    points = make_points(args.points)
+    orm_rate = await run("orm", orm_insert, points, args.repeat)
+    bulk_rate = await run("bulk", bulk_insert, points, args.repeat)
+    print(f"speedup: {bulk_rate / orm_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
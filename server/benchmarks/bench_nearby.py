@@ -0,0 +1,80 @@
+"""
+Benchmark the nearby-lines query: ST_Transform to 3857 vs. the geography GiST index.
+
+Generates --lines random lines around Cochabamba inside a transaction that is
+rolled back, so it is safe to point at a development database:
+
+    uv run python -m benchmarks.bench_nearby --lines 10000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import func, select, text
+
+from database import AsyncSessionLocal
+from models.line import Line
+from services.spatial import lines_nearby_query
+
+# 20-vertex paths spreading up to ~2 km from random starts over a ~20 x 20 km area
+_INSERT_LINES = text("""
+    INSERT INTO lines (name, status, created_at, updated_at, path)
+    SELECT 'Bench ' || n, 'APPROVED', now(), now(),
+           ST_SetSRID(ST_MakeLine(ARRAY(
+               SELECT ST_MakePoint(-66.25 + x0 + 0.001 * step * random(), -17.48 + y0 + 0.001 * step * random())
+               FROM generate_series(1, 20) AS step
+           )), 4326)
+    FROM (
+        SELECT n, 0.2 * random() AS x0, 0.2 * random() AS y0
+        FROM generate_series(1, CAST(:count AS integer)) AS n
+    ) AS seeds
+""")
+
+
+def transformed_query(longitude: float, latitude: float, radius_meters: float):
+    """The previous implementation, which cannot use an index on lines.path."""
+    point = f"SRID=4326;POINT({longitude} {latitude})"
+    return select(Line).where(
+        Line.path.isnot(None),
+        func.ST_DWithin(
+            func.ST_Transform(Line.path, 3857),
+            func.ST_Transform(func.ST_GeomFromEWKT(point), 3857),
+            radius_meters,
+        ),
+    )
+
+
+async def run(name: str, db, make_query, centers: list[tuple[float, float]], radius: float) -> float:
+    found = 0
+    started = time.perf_counter()
+    for longitude, latitude in centers:
+        found += len((await db.execute(make_query(longitude, latitude, radius))).scalars().all())
+        db.expunge_all()
+    elapsed = time.perf_counter() - started
+    per_query = elapsed / len(centers) * 1000
+    print(f"{name:>9}: {per_query:8.2f} ms/query  {found / len(centers):8.1f} lines/query")
+    return per_query
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius", type=float, default=300.0)
+    args = parser.parse_args()
+
+    random.seed(42)
+    centers = [(-66.25 + 0.2 * random.random(), -17.48 + 0.2 * random.random()) for _ in range(args.queries)]
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(_INSERT_LINES, {"count": args.lines})
+        await db.execute(text("ANALYZE lines"))
+        transformed = await run("transform", db, transformed_query, centers, args.radius)
+        indexed = await run("geography", db, lines_nearby_query, centers, args.radius)
+        await db.rollback()
+    print(f"speedup: {transformed / indexed:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
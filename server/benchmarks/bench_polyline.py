@@ -0,0 +1,81 @@
+"""
+Benchmark path serialization: JSON coordinate arrays vs. encoded polylines.
+
+Reads every line path and recording computed_path in the database (nothing
+is written) and serializes them both ways, starting from the same WKB the
+API receives:
+
+    uv run python -m benchmarks.bench_polyline --repeat 20
+
+Reports payload size (raw and gzipped) and serialization time per path.
+"""
+import argparse
+import asyncio
+import gzip
+import time
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+from shapely import wkb
+from sqlalchemy import select
+
+from database import AsyncSessionLocal
+from models.line import Line
+from models.recording import RecordingSession
+from services.polyline import POLYLINE_PRECISION, path_polyline
+
+_coordinates = TypeAdapter(list[list[list[float]]])
+_polylines = TypeAdapter(list[str])
+
+
+def as_coordinates(paths: list[Any]) -> bytes:
+    """format=coordinates: WKB -> shapely -> validated float lists -> JSON, as LineRead does."""
+    coordinates = [list(wkb.loads(bytes(path.data)).coords) for path in paths]
+    return _coordinates.dump_json(_coordinates.validate_python(coordinates))
+
+
+def as_polylines(paths: list[Any], precision: int) -> bytes:
+    """format=polyline: WKB -> encoded string in one pass -> JSON."""
+    return _polylines.dump_json([path_polyline(path, precision) for path in paths])
+
+
+def measure(name: str, serialize: Callable[[], bytes], repeat: int, count: int) -> tuple[int, float]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = serialize()
+    per_path = (time.perf_counter() - started) / repeat / count * 1e6
+    print(
+        f"{name:>11}: {len(body):12,d} bytes  {len(gzip.compress(body)):12,d} gzipped  "
+        f"{per_path:8.1f} us/path"
+    )
+    return len(body), per_path
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--precision", type=int, default=POLYLINE_PRECISION)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        line_paths = (await db.execute(select(Line.path).where(Line.path.isnot(None)))).scalars().all()
+        recording_paths = (await db.execute(
+            select(RecordingSession.computed_path).where(RecordingSession.computed_path.isnot(None))
+        )).scalars().all()
+
+    paths = [*line_paths, *recording_paths]
+    if not paths:
+        print("No line or recording paths in the database")
+        return
+    vertices = sum(len(wkb.loads(bytes(path.data)).coords) for path in paths)
+    print(f"{len(line_paths)} line paths, {len(recording_paths)} recording paths, {vertices:,d} vertices")
+
+    size, seconds = measure("coordinates", lambda: as_coordinates(paths), args.repeat, len(paths))
+    polyline_size, polyline_seconds = measure(
+        "polyline", lambda: as_polylines(paths, args.precision), args.repeat, len(paths)
+    )
+    print(f"payload: {size / polyline_size:.1f}x smaller  time: {seconds / polyline_seconds:.1f}x faster")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
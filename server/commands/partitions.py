@@ -0,0 +1,47 @@
+"""
+Maintain monthly partitions of location_points and sensor_readings.
+
+Pre-creates partitions for the current month and --months-ahead future
+months, and with --retention-months detaches and drops partitions whose
+data is entirely older than that many months. Safe to run repeatedly,
+e.g. daily from cron:
+
+    uv run python -m commands.partitions --months-ahead 3 --retention-months 12
+"""
+import argparse
+from datetime import datetime
+
+from database import engine
+from services.partitions import (
+    PARTITIONED_TABLES,
+    add_months,
+    drop_partitions_before,
+    ensure_partitions,
+    month_start,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument("--retention-months", type=int, default=None, help="keep this many past months (default: keep all)")
+    parser.add_argument("--dry-run", action="store_true", help="roll back instead of committing")
+    args = parser.parse_args()
+
+    this_month = month_start(datetime.utcnow().date())
+    with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            for name in ensure_partitions(conn, table, this_month, add_months(this_month, args.months_ahead)):
+                print(f"created {name}")
+            if args.retention_months is not None:
+                cutoff = add_months(this_month, -args.retention_months)
+                for name in drop_partitions_before(conn, table, cutoff):
+                    print(f"dropped {name}")
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
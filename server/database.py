@@ -1,17 +1,100 @@
-import os
+from typing import Any
+from uuid import uuid4
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlmodel import SQLModel
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "postgresql://sofi@localhost:5432/cbba_mobility"
-)
+from settings import DatabaseSettings, database_settings
+
+DATABASE_URL = database_settings.url
+
+# Same database through asyncpg, used by the API routes
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+# Plain libpq DSN for the LISTEN connection. LISTEN needs a session of its
+# own, which PgBouncer in transaction mode cannot provide
+LISTEN_DSN = make_url(database_settings.listen_url or DATABASE_URL).set(
+    drivername="postgresql"
+).render_as_string(hide_password=False)
+
+
+def _pool_options(settings: DatabaseSettings) -> dict[str, Any]:
+    return {
+        "echo": settings.echo,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_pre_ping": settings.pool_pre_ping,
+        "pool_recycle": settings.pool_recycle,
+    }
+
+
+def _sync_connect_args(settings: DatabaseSettings) -> dict[str, Any]:
+    if settings.statement_timeout_ms and not settings.pgbouncer:
+        return {"options": f"-c statement_timeout={settings.statement_timeout_ms}"}
+    return {}
+
+
+def _async_connect_args(settings: DatabaseSettings) -> dict[str, Any]:
+    connect_args: dict[str, Any] = {}
+    if settings.pgbouncer:
+        # PgBouncer in transaction mode hands each transaction to any server
+        # connection, so named prepared statements must not outlive a statement
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    elif settings.statement_timeout_ms:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.statement_timeout_ms)}
+    return connect_args
+
+
+def _set_local_statement_timeout(engine: Engine, timeout_ms: int) -> None:
+    """PgBouncer drops startup parameters, so set the timeout at the start of every transaction."""
 
-engine = create_engine(DATABASE_URL, echo=True)
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+engine = create_engine(
+    DATABASE_URL,
+    connect_args=_sync_connect_args(database_settings),
+    **_pool_options(database_settings),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=_async_connect_args(database_settings),
+    **_pool_options(database_settings),
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+if database_settings.pgbouncer and database_settings.statement_timeout_ms:
+    _set_local_statement_timeout(engine, database_settings.statement_timeout_ms)
+    _set_local_statement_timeout(async_engine.sync_engine, database_settings.statement_timeout_ms)
+
+
+def pool_status(engine: Engine | AsyncEngine) -> dict[str, Any]:
+    """Live connection counts for an engine's pool."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"class": type(pool).__name__}
+    return {
+        "class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
 
 def get_db():
     """Dependency for FastAPI routes to get a database session."""
@@ -22,6 +105,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for async FastAPI routes to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Initialize database tables (for development only, use migrations in production)."""
     SQLModel.metadata.create_all(engine)
@@ -4,18 +4,33 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
-from database import engine
+from database import LISTEN_DSN, AsyncSessionLocal, async_engine, pool_status
+from middleware import RequestDecompressionMiddleware, ResponseCompressionMiddleware
 from routes import lines_router, recordings_router
+from services.cache import line_cache
+from services.ingest_buffer import ingest_buffer
+from services.notifications import LineChangeListener
+from services.pagination import NEXT_CURSOR_HEADER
+from services.tiles import tile_cache
+from settings import compression_settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup: verify database connection
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    # Drop cached lines when any worker changes them
+    listener = LineChangeListener(LISTEN_DSN, line_cache.invalidate, tile_cache.invalidate)
+    await listener.start()
+    # Coalesce single-row location/sensor uploads into bulk inserts
+    await ingest_buffer.start(AsyncSessionLocal)
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: write out queued rows, stop listening, close pooled connections
+    await ingest_buffer.stop()
+    await listener.stop()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -33,6 +48,21 @@ app.add_middleware(
     allow_credentials=False,  # must be False when allow_origins is ["*"]
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", NEXT_CURSOR_HEADER],
+)
+
+# Compress large responses (line lists, sensor readings) with zstd or gzip,
+# and accept gzip/zstd upload bodies
+app.add_middleware(
+    ResponseCompressionMiddleware,
+    minimum_size=compression_settings.response_min_bytes,
+    gzip_level=compression_settings.response_gzip_level,
+    zstd_level=compression_settings.response_zstd_level,
+)
+app.add_middleware(
+    RequestDecompressionMiddleware,
+    path_prefix="/recordings",
+    max_size=compression_settings.max_decompressed_body_bytes,
 )
 
 # Include routers
@@ -41,15 +71,26 @@ app.include_router(recordings_router)
 
 
 @app.get("/")
-def root():
+async def root():
     """Health check endpoint."""
     return {"status": "healthy", "service": "open-transit"}
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Detailed health check."""
     return {
         "status": "healthy",
-        "database": "connected"
+        "database": "connected",
+        "pool": pool_status(async_engine),
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """In-process cache and ingest buffer counters for this worker."""
+    return {
+        "line_cache": line_cache.stats(),
+        "tile_cache": tile_cache.stats(),
+        "ingest_buffer": ingest_buffer.stats(),
     }
@@ -0,0 +1,115 @@
+"""
+ASGI middleware for compressed request and response bodies.
+
+RequestDecompressionMiddleware decodes gzip and zstd request bodies as the
+route reads them, so every upload endpoint (declared bodies, raw
+request.body() and streamed NDJSON alike) sees plain bytes.
+ResponseCompressionMiddleware extends Starlette's GZipMiddleware with zstd.
+"""
+from typing import Optional
+
+import zstandard
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.compression import (
+    BodyDecoder,
+    BodyTooLarge,
+    InvalidCompressedBody,
+    UnsupportedContentEncoding,
+    content_encoding,
+    response_encoding,
+)
+
+# Headers that describe the compressed body rather than the decoded one
+_BODY_HEADERS = (b"content-encoding", b"content-length")
+
+
+class RequestDecompressionMiddleware:
+    """
+    Decompress gzip and zstd request bodies under path_prefix.
+
+    The body is decoded chunk by chunk as it is received. Other encodings
+    get 415, corrupt or truncated bodies 400, and bodies that pass max_size
+    (default services.compression.MAX_DECOMPRESSED_SIZE) once decompressed
+    413.
+    """
+
+    def __init__(self, app: ASGIApp, path_prefix: str = "/", max_size: Optional[int] = None):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            encoding = content_encoding(Headers(scope=scope).get("content-encoding"))
+        except UnsupportedContentEncoding as e:
+            await JSONResponse({"detail": str(e)}, status_code=415)(scope, receive, send)
+            return
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        decoder = BodyDecoder(encoding, self.max_size)
+
+        async def receive_decoded() -> Message:
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            # Raised inside the route, so FastAPI turns these into responses
+            try:
+                body = decoder.decode(message.get("body", b""))
+                if not message.get("more_body", False):
+                    decoder.finish()
+            except InvalidCompressedBody as e:
+                raise HTTPException(status_code=400, detail=str(e)) from e
+            except BodyTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e)) from e
+            return {**message, "body": body}
+
+        headers = [(name, value) for name, value in scope["headers"] if name not in _BODY_HEADERS]
+        await self.app({**scope, "headers": headers}, receive_decoded, send)
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, level: int = 3) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        body = self.compressor.compress(body)
+        if not more_body:
+            body += self.compressor.flush()
+        return body
+
+
+class ResponseCompressionMiddleware(GZipMiddleware):
+    """Compress responses of at least minimum_size bytes with zstd or gzip, preferring zstd."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=gzip_level)
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = response_encoding(Headers(scope=scope).get("accept-encoding"))
+        responder: ASGIApp
+        if encoding == "zstd":
+            responder = ZstdResponder(self.app, self.minimum_size, level=self.zstd_level)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -1,23 +1,47 @@
-from .line import Line, LineCreate, LineRead, LineUpdate
+from .line import (
+    Line,
+    LineCatalogue,
+    LineChange,
+    LineChangeKind,
+    LineChanges,
+    LineCreate,
+    LineDetail,
+    LineNearestRead,
+    LinePolylineRead,
+    LineRead,
+    LineUpdate,
+)
 from .recording import (
     LocationPoint,
     LocationPointBatch,
     LocationPointCreate,
     LocationPointRead,
+    LocationStreamRecord,
+    RecordingImport,
     RecordingSession,
     RecordingSessionCreate,
+    RecordingSessionPolylineRead,
     RecordingSessionRead,
     RecordingStatus,
     SensorReading,
     SensorReadingBatch,
     SensorReadingCreate,
     SensorReadingRead,
+    SensorStreamRecord,
+    StreamRecord,
+    UploadBatch,
+    UploadState,
+    UploadStream,
 )
 __all__ = [
     # Line
-    "Line", "LineCreate", "LineRead", "LineUpdate",
+    "Line", "LineCreate", "LineDetail", "LineRead", "LineNearestRead", "LinePolylineRead", "LineUpdate",
+    "LineCatalogue", "LineChange", "LineChangeKind", "LineChanges",
     # Recording
-    "RecordingSession", "RecordingSessionCreate", "RecordingSessionRead", "RecordingStatus",
+    "RecordingSession", "RecordingSessionCreate", "RecordingSessionRead", "RecordingSessionPolylineRead",
+    "RecordingImport", "RecordingStatus",
     "LocationPoint", "LocationPointCreate", "LocationPointRead", "LocationPointBatch",
     "SensorReading", "SensorReadingCreate", "SensorReadingRead", "SensorReadingBatch",
+    "LocationStreamRecord", "SensorStreamRecord", "StreamRecord",
+    "UploadBatch", "UploadState", "UploadStream",
 ]
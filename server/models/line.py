@@ -6,7 +6,7 @@ from geoalchemy2 import Geometry, WKBElement
 from pydantic import field_validator, model_validator
 from shapely import wkb
 from shapely.geometry import LineString
-from sqlalchemy import Column
+from sqlalchemy import DDL, Column, Computed, Index, event, text
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -20,6 +20,32 @@ class LineStatus(str, Enum):
     MERGED = "merged"
 
 
+class LineDetail(str, Enum):
+    """Level of detail of a line path."""
+    FULL = "full"
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+
+
+# Douglas-Peucker tolerance of each simplified path, in degrees of SRID 4326.
+# A degree of latitude is about 111 km, so 0.00001 is roughly 1 m.
+PATH_TOLERANCES: dict[LineDetail, float] = {
+    LineDetail.HIGH: 0.00001,
+    LineDetail.MEDIUM: 0.0001,
+    LineDetail.LOW: 0.0005,
+}
+
+
+def _simplified_path(detail: LineDetail) -> Column:
+    """Generated column, so PostgreSQL refreshes it whenever path changes."""
+    return Column(
+        f"path_{detail.value}",
+        Geometry(geometry_type="LINESTRING", srid=4326, spatial_index=False),
+        Computed(f"ST_Simplify(path, {PATH_TOLERANCES[detail]}, true)", persisted=True),
+    )
+
+
 class LineBase(SQLModel):
     """Base model for Line with common fields."""
     name: str = Field(max_length=255, index=True)
@@ -31,8 +57,17 @@ class Line(LineBase, table=True):
     A transit line (e.g., "Line 42", "Red Line").
 
     The path is stored as a PostGIS LINESTRING geometry in WGS84 (SRID 4326).
+    Simplified copies (path_high, path_medium, path_low) live in generated
+    columns that are not mapped, so loading a Line never fetches them; see
+    services.spatial.path_column.
     """
     __tablename__ = "lines"
+    __table_args__ = (
+        # Distance queries in meters compare geography(path); see services.spatial
+        Index("idx_lines_path_geography", text("geography(path)"), postgresql_using="gist"),
+        *(_simplified_path(detail) for detail in PATH_TOLERANCES),
+    )
+    __mapper_args__ = {"exclude_properties": [f"path_{detail.value}" for detail in PATH_TOLERANCES]}
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -54,6 +89,86 @@ class Line(LineBase, table=True):
     recordings: list["RecordingSession"] = Relationship(back_populates="line")
 
 
+# NOTIFY the bounding box (old and new position) of every change that shows on
+# a map, so each worker can drop the cached tiles it overlaps (see services.tiles)
+event.listen(
+    Line.__table__,
+    "after_create",
+    DDL("""
+        CREATE FUNCTION notify_line_area() RETURNS trigger LANGUAGE plpgsql AS $$
+        DECLARE
+            area box2d;
+        BEGIN
+            IF TG_OP = 'UPDATE'
+               AND NEW.path IS NOT DISTINCT FROM OLD.path
+               AND NEW.name = OLD.name
+               AND NEW.status = OLD.status THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                area := Box2D(OLD.path);
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                area := ST_CombineBBox(area, NEW.path);
+            END IF;
+            IF area IS NOT NULL THEN
+                PERFORM pg_notify(
+                    'line_areas',
+                    concat_ws(',', ST_XMin(area), ST_YMin(area), ST_XMax(area), ST_YMax(area))
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """),
+)
+event.listen(
+    Line.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER lines_notify_area AFTER INSERT OR UPDATE OR DELETE ON lines "
+        "FOR EACH ROW EXECUTE FUNCTION notify_line_area()"
+    ),
+)
+
+
+class LineCatalogue(SQLModel, table=True):
+    """
+    Single-row version counter for the line catalogue.
+
+    Bumped in the same transaction as every change to lines, so clients can
+    revalidate cached line lists without the lines table being read.
+    """
+    __tablename__ = "line_catalogue"
+
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LineChangeKind(str, Enum):
+    """What happened to a line in a catalogue version."""
+    CREATED = "created"
+    UPDATED = "updated"
+    APPROVED = "approved"
+    MERGED = "merged"
+    DELETED = "deleted"
+
+
+class LineChange(SQLModel, table=True):
+    """
+    Change log entry for the line catalogue, one per line per version.
+
+    line_id has no foreign key so entries for deleted lines (tombstones) survive.
+    """
+    __tablename__ = "line_changes"
+
+    version: int = Field(primary_key=True)
+    line_id: int = Field(primary_key=True)
+    change: LineChangeKind
+    changed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 def _validate_path(v: Optional[list[list[float]]]) -> Optional[list[list[float]]]:
     """Validate path as list of [lon, lat] with at least 2 points."""
     if v is None:
@@ -103,25 +218,47 @@ class LineRead(LineBase):
     def convert_geometry(cls, data: Any) -> Any:
         """Convert PostGIS geometry to coordinate list."""
         if isinstance(data, Line):
-            result = {
-                "id": data.id,
-                "name": data.name,
-                "description": data.description,
-                "status": data.status,
-                "merged_into_id": data.merged_into_id,
-                "created_at": data.created_at,
-                "updated_at": data.updated_at,
-                "path": None
-            }
-            if data.path is not None:
-                if isinstance(data.path, WKBElement):
-                    shape = wkb.loads(bytes(data.path.data))
-                    result["path"] = list(shape.coords)
-                elif isinstance(data.path, LineString):
-                    result["path"] = list(data.path.coords)
-            return result
+            return _line_fields(data, data.path)
         return data
 
+    @classmethod
+    def from_line(cls, line: Line, path: Any) -> "LineRead":
+        """Read a line with `path` (e.g. a simplified variant) in place of line.path."""
+        return cls.model_validate(_line_fields(line, path))
+
+
+def _line_fields(line: Line, path: Any) -> dict[str, Any]:
+    result = {
+        "id": line.id,
+        "name": line.name,
+        "description": line.description,
+        "status": line.status,
+        "merged_into_id": line.merged_into_id,
+        "created_at": line.created_at,
+        "updated_at": line.updated_at,
+        "path": None
+    }
+    if path is not None:
+        if isinstance(path, WKBElement):
+            shape = wkb.loads(bytes(path.data))
+            result["path"] = list(shape.coords)
+        elif isinstance(path, LineString):
+            result["path"] = list(path.coords)
+    return result
+
+
+class LinePolylineRead(LineRead):
+    """A line with its path as a Google encoded polyline (format=polyline)."""
+    path: Optional[str] = None
+
+
+class LineNearestRead(LineRead):
+    """A line near a point, with how far away its path passes."""
+    distance_meters: float
+    # [longitude, latitude] of the point on the path nearest to the query point,
+    # measured on the spheroid like distance_meters
+    closest_point: list[float]
+
 
 class LineUpdate(SQLModel):
     """Schema for updating a line (all fields optional)."""
@@ -134,3 +271,10 @@ class LineUpdate(SQLModel):
     @classmethod
     def validate_path(cls, v: Optional[list[list[float]]]) -> Optional[list[list[float]]]:
         return _validate_path(v)
+
+
+class LineChanges(SQLModel):
+    """Delta of the line catalogue since a client's version (API response)."""
+    version: int
+    lines: list[LineRead]
+    deleted: list[int]
@@ -1,12 +1,13 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Annotated, Any, Literal, Optional, Union
 
 from geoalchemy2 import Geometry, WKBElement
-from pydantic import model_validator
+from pydantic import Field as PydanticField
+from pydantic import field_validator, model_validator
 from shapely import wkb
 from shapely.geometry import LineString
-from sqlalchemy import Column, Text
+from sqlalchemy import DDL, Column, Index, Text, event
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -110,10 +111,22 @@ class RecordingSessionRead(RecordingSessionBase):
         return data
 
 
+class RecordingSessionPolylineRead(RecordingSessionRead):
+    """A recording session with computed_path as a Google encoded polyline (format=polyline)."""
+    computed_path: Optional[str] = None
+
+
 # ============================================================
 # Location Points - GPS data
 # ============================================================
 
+def _to_naive_utc(value: datetime) -> datetime:
+    """Normalize to naive UTC, matching the `timestamp without time zone` columns."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class LocationPointBase(SQLModel):
     """Base model for a GPS location point."""
     timestamp: datetime  # When this reading was taken
@@ -125,13 +138,27 @@ class LocationPointBase(SQLModel):
     horizontal_accuracy: Optional[float] = None  # Meters
     vertical_accuracy: Optional[float] = None  # Meters
 
+    @field_validator("timestamp")
+    @classmethod
+    def normalize_timestamp(cls, v: datetime) -> datetime:
+        return _to_naive_utc(v)
+
 
 class LocationPoint(LocationPointBase, table=True):
     """A single GPS location point in a recording session."""
     __tablename__ = "location_points"
+    __table_args__ = (
+        # One point per instant, so re-sent batches are skipped (see services.ingest).
+        # Also serves per-session reads in (timestamp, id) order and keyset
+        # pagination: timestamps are unique within a session
+        Index("uq_location_points_session_id_timestamp", "session_id", "timestamp", unique=True),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
     
-    id: Optional[int] = Field(default=None, primary_key=True)
-    session_id: int = Field(foreign_key="recording_sessions.id", index=True)
+    # Partitioned by month on timestamp, which must therefore be part of the key
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    timestamp: datetime = Field(primary_key=True)
+    session_id: int = Field(foreign_key="recording_sessions.id")
     
     # PostGIS point for spatial queries
     point: Any = Field(
@@ -144,6 +171,14 @@ class LocationPoint(LocationPointBase, table=True):
     session: Optional["RecordingSession"] = Relationship(back_populates="location_points")
 
 
+# Catches rows outside the monthly partitions (see services.partitions)
+event.listen(
+    LocationPoint.__table__,
+    "after_create",
+    DDL("CREATE TABLE location_points_default PARTITION OF location_points DEFAULT"),
+)
+
+
 class LocationPointCreate(LocationPointBase):
     """Schema for creating a location point."""
     pass
@@ -179,17 +214,38 @@ class SensorReadingBase(SQLModel):
     # Magnetometer / Compass
     magnetic_heading: Optional[float] = Field(default=None, ge=0, lt=360)  # Degrees
 
+    @field_validator("timestamp")
+    @classmethod
+    def normalize_timestamp(cls, v: datetime) -> datetime:
+        return _to_naive_utc(v)
+
 
 class SensorReading(SensorReadingBase, table=True):
     """Sensor readings (accelerometer, gyroscope, etc.) from a recording session."""
     __tablename__ = "sensor_readings"
+    __table_args__ = (
+        # Not unique: accelerometer and gyroscope samples may share a timestamp
+        # to the millisecond. Serves per-session reads in (timestamp, id) order
+        # and keyset pagination
+        Index("ix_sensor_readings_session_id_timestamp", "session_id", "timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
     
-    id: Optional[int] = Field(default=None, primary_key=True)
-    session_id: int = Field(foreign_key="recording_sessions.id", index=True)
+    # Partitioned by month on timestamp, which must therefore be part of the key
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
+    timestamp: datetime = Field(primary_key=True)
+    session_id: int = Field(foreign_key="recording_sessions.id")
     
     session: Optional["RecordingSession"] = Relationship(back_populates="sensor_readings")
 
 
+event.listen(
+    SensorReading.__table__,
+    "after_create",
+    DDL("CREATE TABLE sensor_readings_default PARTITION OF sensor_readings DEFAULT"),
+)
+
+
 class SensorReadingCreate(SensorReadingBase):
     """Schema for creating a sensor reading."""
     pass
@@ -213,3 +269,74 @@ class LocationPointBatch(SQLModel):
 class SensorReadingBatch(SQLModel):
     """Schema for uploading multiple sensor readings at once."""
     readings: list[SensorReadingCreate]
+
+
+class RecordingImport(RecordingSessionCreate, EndRecordingRequest):
+    """
+    Schema for uploading a whole recording made offline in one request.
+
+    started_at and ended_at default to the first and last data timestamps.
+    The line is assigned as in EndRecordingRequest.
+    """
+    started_at: Optional[datetime] = None
+    ended_at: Optional[datetime] = None
+    points: list[LocationPointCreate] = []
+    readings: list[SensorReadingCreate] = []
+
+    @field_validator("started_at", "ended_at")
+    @classmethod
+    def normalize_timestamp(cls, v: Optional[datetime]) -> Optional[datetime]:
+        return None if v is None else _to_naive_utc(v)
+
+
+class UploadStream(str, Enum):
+    """Kind of rows a batch upload carries."""
+    LOCATIONS = "locations"
+    SENSORS = "sensors"
+
+
+class UploadBatch(SQLModel, table=True):
+    """
+    A batch upload accepted under a client-supplied Idempotency-Key.
+
+    Keeps the outcome of the first attempt, which is replayed to retries
+    of the same batch without its rows being inserted again.
+    """
+    __tablename__ = "upload_batches"
+
+    session_id: int = Field(foreign_key="recording_sessions.id", primary_key=True)
+    stream: UploadStream = Field(primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    added: int
+    duplicates: int  # Location points skipped because the session already had their timestamp
+    first_timestamp: datetime
+    last_timestamp: datetime
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class UploadState(SQLModel):
+    """Last timestamp stored per stream, where an interrupted upload can resume."""
+    session_id: int
+    status: RecordingStatus
+    last_location_timestamp: Optional[datetime] = None
+    last_sensor_timestamp: Optional[datetime] = None
+
+
+# ============================================================
+# Streaming upload records (NDJSON, one record per line)
+# ============================================================
+
+class LocationStreamRecord(LocationPointCreate):
+    """A location point line in an NDJSON recording stream."""
+    type: Literal["location"]
+
+
+class SensorStreamRecord(SensorReadingCreate):
+    """A sensor reading line in an NDJSON recording stream."""
+    type: Literal["sensor"]
+
+
+StreamRecord = Annotated[
+    Union[LocationStreamRecord, SensorStreamRecord],
+    PydanticField(discriminator="type"),
+]
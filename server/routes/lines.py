@@ -1,17 +1,57 @@
 import json
-from typing import Optional, Sequence
+from dataclasses import dataclass
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
 from geoalchemy2.functions import ST_AsGeoJSON
-from sqlalchemy import func, select, update
-from sqlalchemy.orm import Session
-
-from database import get_db
-from models.line import Line, LineCreate, LineRead, LineStatus, LineUpdate
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models.line import (
+    Line,
+    LineChangeKind,
+    LineChanges,
+    LineCreate,
+    LineDetail,
+    LineNearestRead,
+    LinePolylineRead,
+    LineRead,
+    LineStatus,
+    LineUpdate,
+)
 from models.recording import RecordingSession
+from services.cache import line_cache
+from services.catalogue import (
+    CatalogueVersion,
+    changed_line_ids,
+    get_catalogue_version,
+    record_line_change,
+)
+from services.geojson import DEFAULT_PRECISION, GEOJSON_CONTENT_TYPE, line_feature_collection
+from services.polyline import POLYLINE_PRECISION, PathFormat, path_polyline
+from services.spatial import (
+    detail_for_tolerance,
+    lines_in_bbox_query,
+    lines_nearby_query,
+    lines_with_path,
+    nearest_lines_query,
+    path_column,
+    viewport_detail,
+)
+from services.tiles import MAX_ZOOM, MVT_CONTENT_TYPE, line_tile, tile_cache
 
 router = APIRouter(prefix="/lines", tags=["lines"])
 
+# Upper bound on GET /lines/nearest's max_radius_meters
+MAX_NEAREST_RADIUS_METERS = 50_000
+
+_line_list = TypeAdapter(list[LineRead])
+_polyline_list = TypeAdapter(list[LinePolylineRead])
+
 
 def _path_to_linestring(path: Optional[list[list[float]]]) -> Optional[str]:
     if path is None or len(path) < 2:
@@ -20,8 +60,105 @@ def _path_to_linestring(path: Optional[list[list[float]]]) -> Optional[str]:
     return f"SRID=4326;LINESTRING({coords})"
 
 
+def _catalogue_headers(catalogue: CatalogueVersion) -> dict[str, str]:
+    """Validators for responses derived from the line catalogue."""
+    headers = {"ETag": catalogue.etag, "Cache-Control": "no-cache"}
+    if catalogue.updated_at is not None:
+        headers["Last-Modified"] = format_datetime(catalogue.updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+    return headers
+
+
+def _not_modified(request: Request, catalogue: CatalogueVersion) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or catalogue.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or catalogue.updated_at is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second resolution
+    return catalogue.updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def _requested_detail(
+    detail: Optional[LineDetail] = Query(
+        default=None,
+        description="Level of detail of line paths; defaults to full."
+    ),
+    tolerance: Optional[float] = Query(
+        default=None, gt=0,
+        description="Largest simplification error accepted, in meters; picks the coarsest precomputed path."
+    ),
+) -> Optional[LineDetail]:
+    """Resolve `detail` or `tolerance` to one of the precomputed paths, if either was given."""
+    if detail is not None and tolerance is not None:
+        raise HTTPException(status_code=400, detail="Use either detail or tolerance, not both")
+    if tolerance is not None:
+        return detail_for_tolerance(tolerance)
+    return detail
+
+
+def _path_detail(detail: Optional[LineDetail] = Depends(_requested_detail)) -> LineDetail:
+    return detail or LineDetail.FULL
+
+
+def _line_reads(rows: Sequence[Any], path_format: PathFormat, precision: int) -> list[LineRead]:
+    """(Line, path) rows as response models with paths in the requested format."""
+    if path_format is PathFormat.POLYLINE:
+        return [
+            LinePolylineRead.model_validate(
+                {**LineRead.from_line(ln, None).model_dump(), "path": path_polyline(path, precision)}
+            )
+            for ln, path in rows
+        ]
+    return [LineRead.from_line(ln, path) for ln, path in rows]
+
+
+@dataclass(frozen=True)
+class _CachedBody:
+    body: bytes
+    media_type: str
+    catalogue: CatalogueVersion
+
+
+async def _cached_response(
+    request: Request,
+    db: AsyncSession,
+    key: tuple,
+    build: Callable[[], Awaitable[bytes]],
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Serve a catalogue-derived body from the line cache, building it on a miss.
+
+    A hit answers without touching the database. `key` starts with the line
+    id the body depends on, or None for bodies built from many lines.
+    """
+    entry = line_cache.get(key)
+    if entry is None:
+        generation = line_cache.generation
+        catalogue = await get_catalogue_version(db)
+        if _not_modified(request, catalogue):
+            return Response(status_code=304, headers=_catalogue_headers(catalogue))
+        entry = _CachedBody(await build(), media_type, catalogue)
+        line_cache.put(key, entry, generation)
+
+    headers = _catalogue_headers(entry.catalogue)
+    if _not_modified(request, entry.catalogue):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+
 @router.post("/", response_model=LineRead, status_code=201)
-def create_line(line_data: LineCreate, db: Session = Depends(get_db)) -> LineRead:
+async def create_line(line_data: LineCreate, db: AsyncSession = Depends(get_async_db)) -> LineRead:
     """
     Create a new transit line.
 
@@ -36,13 +173,17 @@ def create_line(line_data: LineCreate, db: Session = Depends(get_db)) -> LineRea
         path=path_wkt,
     )
     db.add(line)
-    db.commit()
-    db.refresh(line)
+    await db.flush()
+    await record_line_change(db, line.id, LineChangeKind.CREATED)
+    await db.commit()
+    line_cache.invalidate(line.id)
+    await db.refresh(line)
     return LineRead.model_validate(line)
 
 
-@router.get("/", response_model=list[LineRead])
-def list_lines(
+@router.get("/", response_model=list[LineRead] | list[LinePolylineRead])
+async def list_lines(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     status: Optional[LineStatus] = Query(
@@ -53,35 +194,266 @@ def list_lines(
         default=False,
         description="If true, return all lines regardless of status (admin use)."
     ),
-    db: Session = Depends(get_db)
+    detail: LineDetail = Depends(_path_detail),
+    path_format: PathFormat = Query(
+        default=PathFormat.COORDINATES, alias="format",
+        description="'polyline' returns each path as a Google encoded polyline string."
+    ),
+    precision: int = Query(
+        default=POLYLINE_PRECISION, ge=0, le=10,
+        description="Decimal places of polyline coordinates; 5 is ~1 m."
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Sequence[LineRead]:
-    """List transit lines. By default, only returns approved lines."""
-    query = select(Line)
+    """
+    List transit lines. By default, only returns approved lines.
 
-    if not include_all:
-        query = query.where(Line.status == status)
+    Supports conditional requests: a matching If-None-Match or
+    If-Modified-Since gets 304 without the lines being read.
+    """
+    status = None if include_all else status
+
+    async def build() -> bytes:
+        query = lines_with_path(detail)
+        if status is not None:
+            query = query.where(Line.status == status)
+        rows = (await db.execute(query.offset(skip).limit(limit))).all()
+        adapter = _polyline_list if path_format is PathFormat.POLYLINE else _line_list
+        return adapter.dump_json(_line_reads(rows, path_format, precision))
+
+    key = (None, "list", status, skip, limit, detail, path_format, precision)
+    return await _cached_response(request, db, key, build)
+
+
+@router.get(
+    "/geojson",
+    response_class=Response,
+    responses={200: {"content": {GEOJSON_CONTENT_TYPE: {}}, "description": "GeoJSON FeatureCollection"}},
+)
+async def list_lines_geojson(
+    request: Request,
+    status: Optional[LineStatus] = Query(
+        default=LineStatus.APPROVED,
+        description="Filter by status. Use 'pending' to see lines awaiting approval."
+    ),
+    include_all: bool = Query(
+        default=False,
+        description="If true, return all lines regardless of status (admin use)."
+    ),
+    precision: int = Query(
+        default=DEFAULT_PRECISION, ge=0, le=15,
+        description="Decimal places per coordinate; 6 is ~0.1 m."
+    ),
+    detail: LineDetail = Depends(_path_detail),
+    db: AsyncSession = Depends(get_async_db)
+) -> Response:
+    """
+    All lines as one GeoJSON FeatureCollection.
 
-    lines = db.execute(query.offset(skip).limit(limit)).scalars().all()
-    return [LineRead.model_validate(ln) for ln in lines]
+    The document is built by PostGIS and passed through as bytes.
+    """
+    status = None if include_all else status
+
+    async def build() -> bytes:
+        return await line_feature_collection(db, status, precision, detail)
+
+    return await _cached_response(
+        request, db, (None, "geojson", status, precision, detail), build, GEOJSON_CONTENT_TYPE
+    )
+
+
+@router.get("/changes", response_model=LineChanges)
+async def list_line_changes(
+    since: int = Query(ge=0, description="Catalogue version the client already has; 0 for everything."),
+    db: AsyncSession = Depends(get_async_db)
+) -> LineChanges:
+    """
+    Lines created, updated, approved or merged since a catalogue version, and
+    ids of lines deleted since then.
+
+    Each line appears once, in its current state. Pass the returned version
+    as `since` on the next sync.
+    """
+    catalogue = await get_catalogue_version(db)
+    if since > catalogue.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Version {since} is ahead of the catalogue (version {catalogue.version}); resync with since=0"
+        )
+
+    line_ids = await changed_line_ids(db, since, catalogue.version)
+    if not line_ids:
+        return LineChanges(version=catalogue.version, lines=[], deleted=[])
+
+    lines = (await db.execute(
+        select(Line).where(Line.id.in_(line_ids)).order_by(Line.id)
+    )).scalars().all()
+    present = {ln.id for ln in lines}
+    return LineChanges(
+        version=catalogue.version,
+        lines=[LineRead.model_validate(ln) for ln in lines],
+        deleted=[line_id for line_id in line_ids if line_id not in present],
+    )
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_CONTENT_TYPE: {}}, "description": "Mapbox vector tile with a 'lines' layer"}},
+)
+async def get_line_tile(
+    x: int,
+    y: int,
+    z: int = Path(ge=0, le=MAX_ZOOM),
+    status: Optional[LineStatus] = Query(
+        default=LineStatus.APPROVED,
+        description="Filter by status. Use 'pending' to see lines awaiting approval."
+    ),
+    include_all: bool = Query(
+        default=False,
+        description="If true, return all lines regardless of status (admin use)."
+    ),
+    db: AsyncSession = Depends(get_async_db)
+) -> Response:
+    """
+    Lines in one XYZ (Web Mercator) map tile as a Mapbox vector tile.
+
+    The 'lines' layer has id, name and status properties. Tiles are cached
+    per worker until a line overlapping them changes.
+    """
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"Tile x and y must be between 0 and {2 ** z - 1} at zoom {z}")
+
+    status = None if include_all else status
+    key = (z, x, y, status)
+    body = tile_cache.get(key)
+    if body is None:
+        generation = tile_cache.generation
+        body = await line_tile(db, z, x, y, status)
+        tile_cache.put(key, body, generation)
+    return Response(content=body, media_type=MVT_CONTENT_TYPE)
+
+
+@router.get("/bbox", response_model=list[LineRead] | list[LinePolylineRead])
+async def list_lines_in_bbox(
+    min_lon: float = Query(ge=-180, le=180),
+    min_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    limit: int = Query(default=100, ge=1, le=1000),
+    width: int = Query(
+        default=1024, ge=1, le=8192,
+        description="Viewport width in pixels; sets the level of detail unless detail or tolerance is given."
+    ),
+    status: Optional[LineStatus] = Query(
+        default=LineStatus.APPROVED,
+        description="Filter by status. Use 'pending' to see lines awaiting approval."
+    ),
+    include_all: bool = Query(
+        default=False,
+        description="If true, return all lines regardless of status (admin use)."
+    ),
+    detail: Optional[LineDetail] = Depends(_requested_detail),
+    path_format: PathFormat = Query(
+        default=PathFormat.COORDINATES, alias="format",
+        description="'polyline' returns each path as a Google encoded polyline string."
+    ),
+    precision: int = Query(
+        default=POLYLINE_PRECISION, ge=0, le=10,
+        description="Decimal places of polyline coordinates; 5 is ~1 m."
+    ),
+    db: AsyncSession = Depends(get_async_db)
+) -> Sequence[LineRead]:
+    """
+    Lines whose path crosses a map viewport, ordered by id.
 
+    Paths are simplified to about one pixel of the viewport, so a city-wide
+    view does not download every GPS vertex.
+    """
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise HTTPException(status_code=400, detail="min_lon and min_lat must be less than max_lon and max_lat")
+
+    status = None if include_all else status
+    if detail is None:
+        detail = viewport_detail(min_lon, max_lon, width)
+    query = lines_in_bbox_query(min_lon, min_lat, max_lon, max_lat, detail)
+    if status is not None:
+        query = query.where(Line.status == status)
+    rows = (await db.execute(query.limit(limit))).all()
+    return _line_reads(rows, path_format, precision)
+
+
+@router.get("/nearest", response_model=list[LineNearestRead])
+async def find_nearest_lines(
+    longitude: float = Query(ge=-180, le=180),
+    latitude: float = Query(ge=-90, le=90),
+    limit: int = Query(default=5, ge=1, le=50),
+    max_radius_meters: float = Query(
+        default=1000, gt=0, le=MAX_NEAREST_RADIUS_METERS,
+        description="Lines farther than this are never returned."
+    ),
+    status: Optional[LineStatus] = Query(
+        default=LineStatus.APPROVED,
+        description="Filter by status. Use 'pending' to see lines awaiting approval."
+    ),
+    include_all: bool = Query(
+        default=False,
+        description="If true, return all lines regardless of status (admin use)."
+    ),
+    db: AsyncSession = Depends(get_async_db)
+) -> Sequence[LineNearestRead]:
+    """
+    The lines closest to a point, nearest first.
 
-@router.get("/{line_id}", response_model=LineRead)
-def get_line(line_id: int, db: Session = Depends(get_db)) -> LineRead:
+    Each line comes with its distance in meters and the point on its path
+    nearest to the given one, e.g. where to walk to catch it.
+    """
+    status = None if include_all else status
+    query = nearest_lines_query(longitude, latitude, max_radius_meters, limit, status)
+    rows = (await db.execute(query)).all()
+    return [
+        LineNearestRead.model_validate({
+            **LineRead.model_validate(ln).model_dump(),
+            "distance_meters": distance,
+            "closest_point": [closest_lon, closest_lat],
+        })
+        for ln, distance, closest_lon, closest_lat in rows
+    ]
+
+
+@router.get("/{line_id}", response_model=LineRead | LinePolylineRead)
+async def get_line(
+    line_id: int,
+    request: Request,
+    detail: LineDetail = Depends(_path_detail),
+    path_format: PathFormat = Query(
+        default=PathFormat.COORDINATES, alias="format",
+        description="'polyline' returns the path as a Google encoded polyline string."
+    ),
+    precision: int = Query(
+        default=POLYLINE_PRECISION, ge=0, le=10,
+        description="Decimal places of polyline coordinates; 5 is ~1 m."
+    ),
+    db: AsyncSession = Depends(get_async_db)
+) -> LineRead:
     """Get a specific line by ID."""
-    line = db.get(Line, line_id)
-    if not line:
-        raise HTTPException(status_code=404, detail="Line not found")
-    return LineRead.model_validate(line)
+    async def build() -> bytes:
+        row = (await db.execute(lines_with_path(detail).where(Line.id == line_id))).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Line not found")
+        return _line_reads([row], path_format, precision)[0].model_dump_json().encode()
+
+    return await _cached_response(request, db, (line_id, "line", detail, path_format, precision), build)
 
 
 @router.patch("/{line_id}", response_model=LineRead)
-def update_line(
+async def update_line(
     line_id: int,
     line_data: LineUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> LineRead:
     """Update an existing line."""
-    line = db.get(Line, line_id)
+    line = await db.get(Line, line_id)
     if not line:
         raise HTTPException(status_code=404, detail="Line not found")
 
@@ -95,73 +467,74 @@ def update_line(
         setattr(line, key, value)
 
     db.add(line)
-    db.commit()
-    db.refresh(line)
+    await record_line_change(db, line.id, LineChangeKind.UPDATED)
+    await db.commit()
+    line_cache.invalidate(line_id)
+    await db.refresh(line)
     return LineRead.model_validate(line)
 
 
 @router.delete("/{line_id}", status_code=204)
-def delete_line(line_id: int, db: Session = Depends(get_db)) -> None:
+async def delete_line(line_id: int, db: AsyncSession = Depends(get_async_db)) -> None:
     """Delete a line."""
-    line = db.get(Line, line_id)
+    line = await db.get(Line, line_id)
     if not line:
         raise HTTPException(status_code=404, detail="Line not found")
-    db.delete(line)
-    db.commit()
+    await db.delete(line)
+    await record_line_change(db, line_id, LineChangeKind.DELETED)
+    await db.commit()
+    line_cache.invalidate(line_id)
 
 
 @router.get("/{line_id}/geojson")
-def get_line_geojson(line_id: int, db: Session = Depends(get_db)) -> dict:
-    """Get line path as GeoJSON Feature."""
-    line = db.get(Line, line_id)
-    if not line:
-        raise HTTPException(status_code=404, detail="Line not found")
-
-    if line.path is None:
-        raise HTTPException(status_code=404, detail="Line has no path defined")
-
-    result = db.execute(
-        select(ST_AsGeoJSON(Line.path)).where(Line.id == line_id)
-    ).scalar_one()
-
-    return {
-        "type": "Feature",
-        "properties": {
-            "id": line.id,
-            "name": line.name,
-        },
-        "geometry": json.loads(result)
-    }
+async def get_line_geojson(
+    line_id: int,
+    request: Request,
+    detail: LineDetail = Depends(_path_detail),
+    db: AsyncSession = Depends(get_async_db)
+) -> dict:
+    """Get line path as GeoJSON Feature. Supports conditional requests like GET /lines/."""
+    async def build() -> bytes:
+        row = (await db.execute(
+            select(Line.name, ST_AsGeoJSON(path_column(detail))).where(Line.id == line_id)
+        )).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Line not found")
+
+        name, geometry = row
+        if geometry is None:
+            raise HTTPException(status_code=404, detail="Line has no path defined")
+
+        return json.dumps({
+            "type": "Feature",
+            "properties": {
+                "id": line_id,
+                "name": name,
+            },
+            "geometry": json.loads(geometry)
+        }).encode()
+
+    return await _cached_response(request, db, (line_id, "geojson", detail), build)
 
 
 @router.get("/nearby/", response_model=list[LineRead])
-def find_lines_nearby(
+async def find_lines_nearby(
     longitude: float,
     latitude: float,
     radius_meters: float = 1000,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Sequence[LineRead]:
     """Find lines with paths within a given radius of a point."""
-    point = f"SRID=4326;POINT({longitude} {latitude})"
-
-    query = select(Line).where(
-        Line.path.isnot(None),
-        func.ST_DWithin(
-            func.ST_Transform(Line.path, 3857),
-            func.ST_Transform(func.ST_GeomFromEWKT(point), 3857),
-            radius_meters
-        )
-    )
-
-    lines = db.execute(query).scalars().all()
+    query = lines_nearby_query(longitude, latitude, radius_meters)
+    lines = (await db.execute(query)).scalars().all()
     return [LineRead.model_validate(ln) for ln in lines]
 
 
 @router.post("/{line_id}/merge/{target_line_id}", response_model=LineRead)
-def merge_line(
+async def merge_line(
     line_id: int,
     target_line_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> LineRead:
     """
     Merge a line into another line (admin operation).
@@ -172,11 +545,11 @@ def merge_line(
     if line_id == target_line_id:
         raise HTTPException(status_code=400, detail="Cannot merge a line into itself")
 
-    source = db.get(Line, line_id)
+    source = await db.get(Line, line_id)
     if not source:
         raise HTTPException(status_code=404, detail=f"Source line {line_id} not found")
 
-    target = db.get(Line, target_line_id)
+    target = await db.get(Line, target_line_id)
     if not target:
         raise HTTPException(status_code=404, detail=f"Target line {target_line_id} not found")
 
@@ -192,7 +565,7 @@ def merge_line(
             detail=f"Cannot merge into line {target_line_id} as it is already merged into another line"
         )
 
-    db.execute(
+    await db.execute(
         update(RecordingSession)
         .where(RecordingSession.line_id == line_id)
         .values(line_id=target_line_id)
@@ -201,16 +574,18 @@ def merge_line(
     source.status = LineStatus.MERGED
     source.merged_into_id = target_line_id
 
-    db.commit()
-    db.refresh(target)
+    await record_line_change(db, line_id, LineChangeKind.MERGED)
+    await db.commit()
+    line_cache.invalidate(line_id)
+    await db.refresh(target)
 
     return LineRead.model_validate(target)
 
 
 @router.post("/{line_id}/approve", response_model=LineRead)
-def approve_line(line_id: int, db: Session = Depends(get_db)) -> LineRead:
+async def approve_line(line_id: int, db: AsyncSession = Depends(get_async_db)) -> LineRead:
     """Approve a pending line (admin operation)."""
-    line = db.get(Line, line_id)
+    line = await db.get(Line, line_id)
     if not line:
         raise HTTPException(status_code=404, detail="Line not found")
 
@@ -221,7 +596,9 @@ def approve_line(line_id: int, db: Session = Depends(get_db)) -> LineRead:
         )
 
     line.status = LineStatus.APPROVED
-    db.commit()
-    db.refresh(line)
+    await record_line_change(db, line.id, LineChangeKind.APPROVED)
+    await db.commit()
+    line_cache.invalidate(line_id)
+    await db.refresh(line)
 
     return LineRead.model_validate(line)
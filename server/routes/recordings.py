@@ -1,39 +1,292 @@
 from datetime import datetime, timedelta
-from typing import Sequence
+from typing import Any, Awaitable, Callable, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from models.line import Line, LineStatus
+from database import get_async_db
+from models.line import Line, LineChangeKind, LineStatus
 from models.recording import (
     EndRecordingRequest,
     LocationPoint,
     LocationPointBatch,
     LocationPointCreate,
     LocationPointRead,
+    LocationStreamRecord,
+    RecordingImport,
     RecordingSession,
     RecordingSessionCreate,
+    RecordingSessionPolylineRead,
     RecordingSessionRead,
     RecordingStatus,
     SensorReading,
     SensorReadingBatch,
     SensorReadingCreate,
     SensorReadingRead,
+    StreamRecord,
+    UploadBatch,
+    UploadState,
+    UploadStream,
+)
+from services.cache import active_sessions, line_cache
+from services.catalogue import record_line_change
+from services.columnar import (
+    COLUMNAR_CONTENT_TYPE,
+    ColumnarFormatError,
+    decode_location_batch,
+    decode_sensor_batch,
+)
+from services.ingest import (
+    insert_location_columns_if_active,
+    insert_location_points,
+    insert_sensor_columns_if_active,
+    insert_sensor_readings,
+    location_columns,
+    sensor_columns,
+)
+from services.ingest_buffer import (
+    IngestBufferUnavailable,
+    RowRead,
+    SessionNotFound,
+    SessionNotInProgress,
+    ingest_buffer,
+)
+from services.ndjson import NDJSON_CONTENT_TYPE, NDJSONLineTooLong, iter_ndjson_lines
+from services.pagination import (
+    NEXT_CURSOR_HEADER,
+    InvalidCursor,
+    after_keyset,
+    decode_cursor,
+    encode_cursor,
+)
+from services.paths import abandon_stale_sessions, update_computed_path
+from services.polyline import POLYLINE_PRECISION, PathFormat, path_polyline
+from services.uploads import (
+    IDEMPOTENCY_KEY_HEADER,
+    REPLAYED_HEADER,
+    batch_summary,
+    find_upload_batch,
+    record_upload_batch,
+    upload_state,
 )
 
 router = APIRouter(prefix="/recordings", tags=["recordings"])
 
 
+# ============================================================
+# Batch Body Parsing (JSON or packed columnar)
+# ============================================================
+
+def _batch_openapi(model: type[BaseModel]) -> dict:
+    """OpenAPI request body for batch endpoints, which parse the body themselves."""
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schema.pop("$defs", None)
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                COLUMNAR_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    }
+
+
+def _is_columnar(request: Request) -> bool:
+    content_type = request.headers.get("content-type", "")
+    return content_type.split(";")[0].strip().lower() == COLUMNAR_CONTENT_TYPE
+
+
+def _validate_json_body(model: type[BaseModel], body: bytes) -> BaseModel:
+    """Validate a JSON body, reporting errors the same way FastAPI does for declared bodies."""
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)],
+            body=body,
+        )
+
+
+async def location_batch_columns(request: Request) -> dict[str, list]:
+    """Parse a location batch body into per-column lists."""
+    body = await request.body()
+    if _is_columnar(request):
+        try:
+            return decode_location_batch(body)
+        except ColumnarFormatError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    batch = _validate_json_body(LocationPointBatch, body)
+    return location_columns(batch.points)
+
+
+async def sensor_batch_columns(request: Request) -> dict[str, list]:
+    """Parse a sensor batch body into per-column lists."""
+    body = await request.body()
+    if _is_columnar(request):
+        try:
+            return decode_sensor_batch(body)
+        except ColumnarFormatError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    batch = _validate_json_body(SensorReadingBatch, body)
+    return sensor_columns(batch.readings)
+
+
+def _idempotency_key(
+    key: Optional[str] = Header(
+        default=None, alias=IDEMPOTENCY_KEY_HEADER, max_length=255,
+        description="Client-chosen id of this batch; retries with the same key are not stored again."
+    ),
+) -> Optional[str]:
+    return key
+
+
+async def _add_batch(
+    db: AsyncSession,
+    response: Response,
+    session_id: int,
+    stream: UploadStream,
+    columns: dict[str, list],
+    idempotency_key: Optional[str],
+    insert_columns: Callable[[AsyncSession, int, dict[str, list]], Awaitable[Optional[int]]],
+) -> dict:
+    """
+    Store a batch once. A retry with the same Idempotency-Key gets the first
+    attempt's result back, even after the session has ended.
+
+    The status check, the last_activity_at bump and the insert are a single
+    statement (see services.ingest); the session is only loaded to explain
+    a rejected batch.
+    """
+    if idempotency_key is not None:
+        accepted = await find_upload_batch(db, session_id, stream, idempotency_key)
+        if accepted is not None:
+            response.headers[REPLAYED_HEADER] = "true"
+            return batch_summary(accepted)
+
+    timestamps = columns["timestamp"]
+    added = await insert_columns(db, session_id, columns) if timestamps else None
+    if added is None:
+        session = await db.get(RecordingSession, session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Recording session not found")
+        if session.status != RecordingStatus.IN_PROGRESS or timestamps:
+            raise HTTPException(status_code=400, detail="Session is not in progress")
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+
+    # Only stored when the client sent a key
+    batch = UploadBatch(
+        session_id=session_id,
+        stream=stream,
+        key=idempotency_key or "",
+        added=added,
+        duplicates=len(timestamps) - added,
+        first_timestamp=timestamps[0],
+        last_timestamp=timestamps[-1],
+    )
+    if idempotency_key is not None and not await record_upload_batch(db, batch):
+        # A concurrent attempt with the same key committed first
+        await db.rollback()
+        response.headers[REPLAYED_HEADER] = "true"
+        return batch_summary(await find_upload_batch(db, session_id, stream, idempotency_key))
+
+    await db.commit()
+    return batch_summary(batch)
+
+
+# ============================================================
+# Keyset Pagination
+# ============================================================
+
+def _keyset_position(
+    cursor: Optional[str],
+    after_timestamp: Optional[datetime],
+    after_id: Optional[int],
+) -> Optional[tuple[datetime, Optional[int]]]:
+    """Resolve the cursor / after_* query parameters to a (timestamp, id) position."""
+    if cursor is not None:
+        if after_timestamp is not None or after_id is not None:
+            raise HTTPException(status_code=400, detail="Use either cursor or after_timestamp/after_id, not both")
+        try:
+            return decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    if after_id is not None and after_timestamp is None:
+        raise HTTPException(status_code=400, detail="after_id requires after_timestamp")
+    if after_timestamp is None:
+        return None
+    return after_timestamp, after_id
+
+
+def _set_next_cursor(response: Response, rows: Sequence[Any], limit: int) -> None:
+    """A full page may have more rows after it; point the client at them."""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.timestamp, last.id)
+
+
+# ============================================================
+# Path Formats
+# ============================================================
+
+def _session_read(session: RecordingSession, path_format: PathFormat, precision: int) -> RecordingSessionRead:
+    """A session as a response model with computed_path in the requested format."""
+    if path_format is PathFormat.POLYLINE:
+        return RecordingSessionPolylineRead.model_validate({
+            **session.model_dump(exclude={"computed_path"}),
+            "computed_path": path_polyline(session.computed_path, precision),
+        })
+    return RecordingSessionRead.model_validate(session)
+
+
 # ============================================================
 # Recording Sessions
 # ============================================================
 
+async def _assign_line(db: AsyncSession, session: RecordingSession, body: EndRecordingRequest) -> Optional[Line]:
+    """
+    Set the session's line and final status from an EndRecordingRequest.
+
+    Returns the line created for `line_name`, if any. Does not commit.
+    """
+    line_name_trimmed = (body.line_name or "").strip()
+
+    if body.line_id is not None:
+        line = await db.get(Line, body.line_id)
+        if not line:
+            raise HTTPException(status_code=404, detail="Line not found")
+        if line.status == LineStatus.MERGED:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot assign merged line. Use line {line.merged_into_id} instead.",
+            )
+        session.line_id = body.line_id
+        session.status = RecordingStatus.COMPLETED
+        return None
+
+    if line_name_trimmed:
+        new_line = Line(
+            name=line_name_trimmed,
+            status=LineStatus.PENDING,
+        )
+        db.add(new_line)
+        await db.flush()
+        await record_line_change(db, new_line.id, LineChangeKind.CREATED)
+        session.line_id = new_line.id
+        session.status = RecordingStatus.COMPLETED
+        return new_line
+
+    session.status = RecordingStatus.DISCARDED
+    return None
+
+
 @router.post("/", response_model=RecordingSessionRead, status_code=201)
-def start_recording(
+async def start_recording(
     session_data: RecordingSessionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> RecordingSessionRead:
     """
     Start a new recording session.
@@ -48,18 +301,80 @@ def start_recording(
         notes=session_data.notes,
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
+    return RecordingSessionRead.model_validate(session)
+
+
+@router.post(
+    "/import",
+    response_model=RecordingSessionRead,
+    status_code=201,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": RecordingImport.model_json_schema(ref_template="#/components/schemas/{model}")
+                },
+            },
+        }
+    },
+)
+async def import_recording(request: Request, db: AsyncSession = Depends(get_async_db)) -> RecordingSessionRead:
+    """
+    Upload a whole recording made offline in one request.
+
+    Replaces start + location/sensor batches + end for a finished trip. The
+    body may be sent with `Content-Encoding: gzip` or `zstd`. The session,
+    its points and readings (one bulk INSERT each), the line assignment and
+    the computed path are written in a single transaction, so a failed
+    import leaves nothing behind and can simply be retried.
+    """
+    recording = _validate_json_body(RecordingImport, await request.body())
+
+    timestamps = [p.timestamp for p in recording.points] + [r.timestamp for r in recording.readings]
+    now = datetime.utcnow()
+    ended_at = recording.ended_at or max(timestamps, default=now)
+    session = RecordingSession(
+        direction=recording.direction,
+        device_model=recording.device_model,
+        os_version=recording.os_version,
+        notes=recording.notes,
+        started_at=recording.started_at or min(timestamps, default=now),
+        ended_at=ended_at,
+        last_activity_at=ended_at,
+    )
+    new_line = await _assign_line(db, session, recording)
+    db.add(session)
+    await db.flush()
+
+    await insert_location_points(db, session.id, recording.points)
+    await insert_sensor_readings(db, session.id, recording.readings)
+    await update_computed_path(db, session.id)
+
+    await db.commit()
+    if new_line is not None:
+        line_cache.invalidate(new_line.id)
+    await db.refresh(session)
     return RecordingSessionRead.model_validate(session)
 
 
-@router.get("/", response_model=list[RecordingSessionRead])
-def list_recordings(
+@router.get("/", response_model=list[RecordingSessionRead] | list[RecordingSessionPolylineRead])
+async def list_recordings(
     line_id: int | None = None,
     status: RecordingStatus | None = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    path_format: PathFormat = Query(
+        default=PathFormat.COORDINATES, alias="format",
+        description="'polyline' returns each computed_path as a Google encoded polyline string."
+    ),
+    precision: int = Query(
+        default=POLYLINE_PRECISION, ge=0, le=10,
+        description="Decimal places of polyline coordinates; 5 is ~1 m."
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Sequence[RecordingSessionRead]:
     """List recording sessions with optional filters."""
     query = select(RecordingSession)
@@ -69,28 +384,39 @@ def list_recordings(
     if status is not None:
         query = query.where(RecordingSession.status == status)
     
-    sessions = db.execute(
+    sessions = (await db.execute(
         query.order_by(RecordingSession.started_at.desc())
         .offset(skip).limit(limit)
-    ).scalars().all()
+    )).scalars().all()
     
-    return [RecordingSessionRead.model_validate(s) for s in sessions]
+    return [_session_read(s, path_format, precision) for s in sessions]
 
 
-@router.get("/{session_id}", response_model=RecordingSessionRead)
-def get_recording(session_id: int, db: Session = Depends(get_db)) -> RecordingSessionRead:
+@router.get("/{session_id}", response_model=RecordingSessionRead | RecordingSessionPolylineRead)
+async def get_recording(
+    session_id: int,
+    path_format: PathFormat = Query(
+        default=PathFormat.COORDINATES, alias="format",
+        description="'polyline' returns computed_path as a Google encoded polyline string."
+    ),
+    precision: int = Query(
+        default=POLYLINE_PRECISION, ge=0, le=10,
+        description="Decimal places of polyline coordinates; 5 is ~1 m."
+    ),
+    db: AsyncSession = Depends(get_async_db)
+) -> RecordingSessionRead:
     """Get a specific recording session."""
-    session = db.get(RecordingSession, session_id)
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
-    return RecordingSessionRead.model_validate(session)
+    return _session_read(session, path_format, precision)
 
 
 @router.post("/{session_id}/end", response_model=RecordingSessionRead)
-def end_recording(
+async def end_recording(
     session_id: int,
     body: EndRecordingRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> RecordingSessionRead:
     """
     End a recording session.
@@ -100,7 +426,7 @@ def end_recording(
     - If both are null: status DISCARDED.
     The computed path is always generated from the collected location points.
     """
-    session = db.get(RecordingSession, session_id)
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
 
@@ -110,54 +436,24 @@ def end_recording(
             detail=f"Session is not in progress (current status: {session.status})"
         )
 
-    # Compute path from location points
-    points = db.execute(
-        select(LocationPoint)
-        .where(LocationPoint.session_id == session_id)
-        .order_by(LocationPoint.timestamp)
-    ).scalars().all()
-
-    if len(points) >= 2:
-        coords = [(p.longitude, p.latitude) for p in points]
-        linestring = f"SRID=4326;LINESTRING({', '.join(f'{lon} {lat}' for lon, lat in coords)})"
-        session.computed_path = func.ST_GeomFromEWKT(linestring)
-
-    line_name_trimmed = (body.line_name or "").strip()
-
-    if body.line_id is not None:
-        line = db.get(Line, body.line_id)
-        if not line:
-            raise HTTPException(status_code=404, detail="Line not found")
-        if line.status == LineStatus.MERGED:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Cannot assign merged line. Use line {line.merged_into_id} instead.",
-            )
-        session.line_id = body.line_id
-        session.status = RecordingStatus.COMPLETED
-    elif line_name_trimmed:
-        new_line = Line(
-            name=line_name_trimmed,
-            status=LineStatus.PENDING,
-        )
-        db.add(new_line)
-        db.flush()
-        session.line_id = new_line.id
-        session.status = RecordingStatus.COMPLETED
-    else:
-        session.status = RecordingStatus.DISCARDED
-
+    new_line = await _assign_line(db, session, body)
     session.ended_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(session)
+    # Compute path from location points (server-side, in the same transaction)
+    await update_computed_path(db, session_id)
+
+    await db.commit()
+    active_sessions.discard(session_id)
+    if new_line is not None:
+        line_cache.invalidate(new_line.id)
+    await db.refresh(session)
     return RecordingSessionRead.model_validate(session)
 
 
 @router.post("/{session_id}/cancel", response_model=RecordingSessionRead)
-def cancel_recording(session_id: int, db: Session = Depends(get_db)) -> RecordingSessionRead:
+async def cancel_recording(session_id: int, db: AsyncSession = Depends(get_async_db)) -> RecordingSessionRead:
     """Cancel an in-progress recording session."""
-    session = db.get(RecordingSession, session_id)
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
     
@@ -170,8 +466,9 @@ def cancel_recording(session_id: int, db: Session = Depends(get_db)) -> Recordin
     session.status = RecordingStatus.CANCELLED
     session.ended_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    active_sessions.discard(session_id)
+    await db.refresh(session)
     return RecordingSessionRead.model_validate(session)
 
 
@@ -179,98 +476,130 @@ def cancel_recording(session_id: int, db: Session = Depends(get_db)) -> Recordin
 # Location Points - Batch Upload
 # ============================================================
 
-@router.post("/{session_id}/locations", response_model=LocationPointRead, status_code=201)
-def add_location_point(
-    session_id: int,
-    point_data: LocationPointCreate,
-    db: Session = Depends(get_db)
-) -> LocationPointRead:
-    """Add a single location point to a recording session."""
-    session = db.get(RecordingSession, session_id)
+async def _check_in_progress(db: AsyncSession, session_id: int) -> None:
+    """
+    404/400 unless the session exists and is in progress.
+
+    Sessions seen in progress recently are trusted without a lookup; the
+    ingest buffer re-checks the status when it writes the row.
+    """
+    if session_id in active_sessions:
+        return
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
     
     if session.status != RecordingStatus.IN_PROGRESS:
         raise HTTPException(status_code=400, detail="Session is not in progress")
     
-    # Create PostGIS point
-    point_wkt = f"SRID=4326;POINT({point_data.longitude} {point_data.latitude})"
-    
-    point = LocationPoint(
-        session_id=session_id,
-        **point_data.model_dump(),
-        point=func.ST_GeomFromEWKT(point_wkt)
-    )
-    db.add(point)
-    db.commit()
-    db.refresh(point)
-    return LocationPointRead.model_validate(point)
+    active_sessions.add(session_id)
+    # Don't hold a pooled connection while the row waits for its flush
+    await db.close()
+
+
+async def _buffered(session_id: int, stored: Awaitable[RowRead]) -> RowRead:
+    """Wait for a row queued in the ingest buffer, answering 503 while it is full."""
+    try:
+        return await stored
+    except IngestBufferUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"}) from e
+    except SessionNotFound as e:
+        active_sessions.discard(session_id)
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except SessionNotInProgress as e:
+        active_sessions.discard(session_id)
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+
+@router.post("/{session_id}/locations", response_model=LocationPointRead, status_code=201)
+async def add_location_point(
+    session_id: int,
+    point_data: LocationPointCreate,
+    db: AsyncSession = Depends(get_async_db)
+) -> LocationPointRead:
+    """
+    Add a single location point to a recording session.
+
+    The point is written together with other uploads in the next bulk
+    insert (see services.ingest_buffer) and returned once committed. A
+    point whose timestamp the session already has is returned as stored.
+    The session's status is re-checked when the point is written, so a
+    session ended or deleted through another worker still gets 400 or 404.
+    """
+    await _check_in_progress(db, session_id)
+    return await _buffered(session_id, ingest_buffer.add_location_point(session_id, point_data))
 
 
-@router.post("/{session_id}/locations/batch", status_code=201)
-def add_location_batch(
+@router.post(
+    "/{session_id}/locations/batch",
+    status_code=201,
+    openapi_extra=_batch_openapi(LocationPointBatch),
+)
+async def add_location_batch(
     session_id: int,
-    batch: LocationPointBatch,
-    db: Session = Depends(get_db)
+    response: Response,
+    columns: dict[str, list] = Depends(location_batch_columns),
+    idempotency_key: Optional[str] = Depends(_idempotency_key),
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """
     Upload a batch of GPS location points.
     
     This is the recommended way to upload location data - collect points
     locally on the device and upload in batches every 30-60 seconds.
+    The whole batch is written with a single bulk INSERT and the PostGIS
+    point is computed server-side.
+
+    Accepts a JSON `LocationPointBatch` or, for large batches, the packed
+    columnar format (`Content-Type: application/vnd.cbba.columnar`).
+
+    Points at a timestamp the session already has are skipped and counted
+    as `duplicates`, so a batch can safely be sent again. With an
+    `Idempotency-Key` header a retry is answered from the first attempt.
     """
-    session = db.get(RecordingSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Recording session not found")
-    
-    if session.status != RecordingStatus.IN_PROGRESS:
-        raise HTTPException(status_code=400, detail="Session is not in progress")
-    
-    if not batch.points:
-        raise HTTPException(status_code=400, detail="Batch cannot be empty")
-    
-    points = []
-    for p in batch.points:
-        point_wkt = f"SRID=4326;POINT({p.longitude} {p.latitude})"
-        points.append(LocationPoint(
-            session_id=session_id,
-            **p.model_dump(),
-            point=func.ST_GeomFromEWKT(point_wkt)
-        ))
-    
-    db.add_all(points)
-    
-    # Update last activity timestamp
-    session.last_activity_at = datetime.utcnow()
-    
-    db.commit()
-    
-    return {
-        "added": len(points),
-        "session_id": session_id,
-        "first_timestamp": batch.points[0].timestamp.isoformat(),
-        "last_timestamp": batch.points[-1].timestamp.isoformat(),
-    }
+    return await _add_batch(
+        db, response, session_id, UploadStream.LOCATIONS, columns, idempotency_key, insert_location_columns_if_active
+    )
 
 
 @router.get("/{session_id}/locations", response_model=list[LocationPointRead])
-def get_location_points(
+async def get_location_points(
     session_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 1000,
-    db: Session = Depends(get_db)
+    after_timestamp: Optional[datetime] = Query(
+        default=None, description="Keyset pagination: return points after this timestamp."
+    ),
+    after_id: Optional[int] = Query(
+        default=None, description="Keyset pagination: tie-breaker for points sharing after_timestamp."
+    ),
+    cursor: Optional[str] = Query(
+        default=None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page."
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Sequence[LocationPointRead]:
-    """Get all location points for a recording session."""
-    session = db.get(RecordingSession, session_id)
+    """
+    Get all location points for a recording session.
+
+    Full pages carry an X-Next-Cursor header; pass it back as `cursor` to
+    continue without the cost of a growing `skip`.
+    """
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
     
-    points = db.execute(
+    query = (
         select(LocationPoint)
         .where(LocationPoint.session_id == session_id)
-        .order_by(LocationPoint.timestamp)
-        .offset(skip).limit(limit)
-    ).scalars().all()
+        .order_by(LocationPoint.timestamp, LocationPoint.id)
+    )
+    position = _keyset_position(cursor, after_timestamp, after_id)
+    if position:
+        query = query.where(after_keyset(LocationPoint.timestamp, LocationPoint.id, *position))
+    
+    points = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    _set_next_cursor(response, points, limit)
     
     return [LocationPointRead.model_validate(p) for p in points]
 
@@ -280,102 +609,215 @@ def get_location_points(
 # ============================================================
 
 @router.post("/{session_id}/sensors", response_model=SensorReadingRead, status_code=201)
-def add_sensor_reading(
+async def add_sensor_reading(
     session_id: int,
     reading_data: SensorReadingCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> SensorReadingRead:
-    """Add a single sensor reading to a recording session."""
-    session = db.get(RecordingSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Recording session not found")
-    
-    if session.status != RecordingStatus.IN_PROGRESS:
-        raise HTTPException(status_code=400, detail="Session is not in progress")
-    
-    reading = SensorReading(session_id=session_id, **reading_data.model_dump())
-    db.add(reading)
-    db.commit()
-    db.refresh(reading)
-    return SensorReadingRead.model_validate(reading)
+    """Add a single sensor reading to a recording session (buffered like add_location_point)."""
+    await _check_in_progress(db, session_id)
+    return await _buffered(session_id, ingest_buffer.add_sensor_reading(session_id, reading_data))
 
 
-@router.post("/{session_id}/sensors/batch", status_code=201)
-def add_sensor_batch(
+@router.post(
+    "/{session_id}/sensors/batch",
+    status_code=201,
+    openapi_extra=_batch_openapi(SensorReadingBatch),
+)
+async def add_sensor_batch(
     session_id: int,
-    batch: SensorReadingBatch,
-    db: Session = Depends(get_db)
+    response: Response,
+    columns: dict[str, list] = Depends(sensor_batch_columns),
+    idempotency_key: Optional[str] = Depends(_idempotency_key),
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """
     Upload a batch of sensor readings (accelerometer, gyroscope, etc.).
     
     Sensor data is typically collected at higher frequencies than GPS,
-    so batching is especially important here.
+    so batching is especially important here. Readings are written as
+    column arrays in a single INSERT, without building ORM objects.
+
+    Accepts a JSON `SensorReadingBatch` or the packed columnar format
+    (`Content-Type: application/vnd.cbba.columnar`). Every reading is
+    stored, even at a timestamp the session already has (accelerometer and
+    gyroscope samples may share one), so send an `Idempotency-Key` header
+    to make retries safe.
     """
-    session = db.get(RecordingSession, session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Recording session not found")
-    
-    if session.status != RecordingStatus.IN_PROGRESS:
-        raise HTTPException(status_code=400, detail="Session is not in progress")
-    
-    if not batch.readings:
-        raise HTTPException(status_code=400, detail="Batch cannot be empty")
-    
-    readings = [
-        SensorReading(session_id=session_id, **r.model_dump())
-        for r in batch.readings
-    ]
-    
-    db.add_all(readings)
-    
-    # Update last activity timestamp
-    session.last_activity_at = datetime.utcnow()
-    
-    db.commit()
-    
-    return {
-        "added": len(readings),
-        "session_id": session_id,
-        "first_timestamp": batch.readings[0].timestamp.isoformat(),
-        "last_timestamp": batch.readings[-1].timestamp.isoformat(),
-    }
+    return await _add_batch(
+        db, response, session_id, UploadStream.SENSORS, columns, idempotency_key, insert_sensor_columns_if_active
+    )
 
 
 @router.get("/{session_id}/sensors", response_model=list[SensorReadingRead])
-def get_sensor_readings(
+async def get_sensor_readings(
     session_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 1000,
-    db: Session = Depends(get_db)
+    after_timestamp: Optional[datetime] = Query(
+        default=None, description="Keyset pagination: return readings after this timestamp."
+    ),
+    after_id: Optional[int] = Query(
+        default=None, description="Keyset pagination: tie-breaker for readings sharing after_timestamp."
+    ),
+    cursor: Optional[str] = Query(
+        default=None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page."
+    ),
+    db: AsyncSession = Depends(get_async_db)
 ) -> Sequence[SensorReadingRead]:
-    """Get all sensor readings for a recording session."""
-    session = db.get(RecordingSession, session_id)
+    """
+    Get all sensor readings for a recording session.
+
+    Paginates like GET /{session_id}/locations.
+    """
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
     
-    readings = db.execute(
+    query = (
         select(SensorReading)
         .where(SensorReading.session_id == session_id)
-        .order_by(SensorReading.timestamp)
-        .offset(skip).limit(limit)
-    ).scalars().all()
+        .order_by(SensorReading.timestamp, SensorReading.id)
+    )
+    position = _keyset_position(cursor, after_timestamp, after_id)
+    if position:
+        query = query.where(after_keyset(SensorReading.timestamp, SensorReading.id, *position))
+    
+    readings = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    _set_next_cursor(response, readings, limit)
     
     return [SensorReadingRead.model_validate(r) for r in readings]
 
 
+# ============================================================
+# Upload State
+# ============================================================
+
+@router.get("/{session_id}/upload-state", response_model=UploadState)
+async def get_upload_state(session_id: int, db: AsyncSession = Depends(get_async_db)) -> UploadState:
+    """
+    Last stored location and sensor timestamps of a session.
+
+    A client whose sync was interrupted sends only the rows after these
+    instead of the whole recording again.
+    """
+    session = await db.get(RecordingSession, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Recording session not found")
+    return await upload_state(db, session)
+
+
+# ============================================================
+# Streaming Upload (NDJSON)
+# ============================================================
+
+_STREAM_RECORD = TypeAdapter(StreamRecord)
+
+# Records buffered between bulk inserts; bounds memory for arbitrarily long streams
+STREAM_CHUNK_SIZE = 5000
+
+
+@router.post(
+    "/{session_id}/stream",
+    status_code=201,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_CONTENT_TYPE: {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def stream_recording_data(
+    session_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+) -> dict:
+    """
+    Upload a whole recording as a single chunked NDJSON body.
+
+    Each line is one location point or sensor reading, tagged with
+    `"type": "location"` or `"type": "sensor"` and otherwise shaped like the
+    single-item upload bodies. Lines are parsed as they arrive and written
+    in bulk every STREAM_CHUNK_SIZE records, so memory stays constant
+    regardless of recording length.
+
+    The upload is a single transaction: an invalid line rejects the whole
+    stream, so a failed sync can simply be retried.
+
+    Progress is only reported at the end: once the whole body has been read
+    and committed, the response lists each chunk written (`chunks`) and the
+    final counts. Nothing is reported while the upload runs, and a stream
+    cut off midway stores nothing, so the client resends it whole.
+    """
+    session = await db.get(RecordingSession, session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Recording session not found")
+    
+    if session.status != RecordingStatus.IN_PROGRESS:
+        raise HTTPException(status_code=400, detail="Session is not in progress")
+    
+    locations: list[LocationPointCreate] = []
+    sensors: list[SensorReadingCreate] = []
+    chunks: list[dict] = []
+    line_number = 0
+
+    async def flush() -> None:
+        chunks.append({
+            "chunk": len(chunks) + 1,
+            "through_line": line_number,
+            "locations": await insert_location_points(db, session_id, locations),
+            "sensors": await insert_sensor_readings(db, session_id, sensors),
+        })
+        locations.clear()
+        sensors.clear()
+
+    try:
+        async for line_number, line in iter_ndjson_lines(request.stream()):
+            try:
+                record = _STREAM_RECORD.validate_json(line)
+            except ValidationError as e:
+                error = e.errors(include_url=False)[0]
+                field = ".".join(str(part) for part in error["loc"])
+                message = f"{field}: {error['msg']}" if field else error["msg"]
+                raise HTTPException(status_code=422, detail=f"Line {line_number}: {message}")
+            if isinstance(record, LocationStreamRecord):
+                locations.append(record)
+            else:
+                sensors.append(record)
+            if len(locations) + len(sensors) >= STREAM_CHUNK_SIZE:
+                await flush()
+    except NDJSONLineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    if locations or sensors:
+        await flush()
+    if not chunks:
+        raise HTTPException(status_code=400, detail="Stream cannot be empty")
+
+    session.last_activity_at = datetime.utcnow()
+    await db.commit()
+
+    return {
+        "session_id": session_id,
+        "locations_added": sum(c["locations"] for c in chunks),
+        "sensors_added": sum(c["sensors"] for c in chunks),
+        "chunks": chunks,
+    }
+
+
 # ============================================================
 # Stale Session Cleanup
 # ============================================================
 
 @router.post("/cleanup/stale", tags=["admin"])
-def cleanup_stale_sessions(
+async def cleanup_stale_sessions(
     inactive_minutes: int = Query(
         default=30,
         ge=5,
         description="Mark sessions as abandoned if no activity for this many minutes"
     ),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict:
     """
     Mark stale recording sessions as abandoned (admin/cron operation).
@@ -389,49 +831,29 @@ def cleanup_stale_sessions(
     """
     cutoff = datetime.utcnow() - timedelta(minutes=inactive_minutes)
     
-    # Find stale sessions
-    stale_sessions = db.execute(
-        select(RecordingSession)
-        .where(RecordingSession.status == RecordingStatus.IN_PROGRESS)
-        .where(RecordingSession.last_activity_at < cutoff)
-    ).scalars().all()
-    
-    abandoned_count = 0
-    for session in stale_sessions:
-        # Compute path from whatever points we have
-        points = db.execute(
-            select(LocationPoint)
-            .where(LocationPoint.session_id == session.id)
-            .order_by(LocationPoint.timestamp)
-        ).scalars().all()
-        
-        if len(points) >= 2:
-            coords = [(p.longitude, p.latitude) for p in points]
-            linestring = f"SRID=4326;LINESTRING({', '.join(f'{lon} {lat}' for lon, lat in coords)})"
-            session.computed_path = func.ST_GeomFromEWKT(linestring)
-        
-        session.status = RecordingStatus.ABANDONED
-        session.ended_at = session.last_activity_at
-        abandoned_count += 1
+    # Abandon all stale sessions and compute their paths in one statement
+    session_ids = await abandon_stale_sessions(db, cutoff)
     
-    db.commit()
+    await db.commit()
+    for session_id in session_ids:
+        active_sessions.discard(session_id)
     
     return {
         "checked_before": cutoff.isoformat(),
-        "abandoned_count": abandoned_count,
-        "session_ids": [s.id for s in stale_sessions]
+        "abandoned_count": len(session_ids),
+        "session_ids": session_ids
     }
 
 
 @router.post("/{session_id}/resume", response_model=RecordingSessionRead)
-def resume_recording(session_id: int, db: Session = Depends(get_db)) -> RecordingSessionRead:
+async def resume_recording(session_id: int, db: AsyncSession = Depends(get_async_db)) -> RecordingSessionRead:
     """
     Resume an abandoned recording session.
     
     If a session was auto-abandoned but the user comes back,
     they can resume it (e.g., if they just had a long tunnel with no signal).
     """
-    session = db.get(RecordingSession, session_id)
+    session = await db.get(RecordingSession, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Recording session not found")
     
@@ -445,6 +867,6 @@ def resume_recording(session_id: int, db: Session = Depends(get_db)) -> Recordin
     session.ended_at = None
     session.last_activity_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return RecordingSessionRead.model_validate(session)
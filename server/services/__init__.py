@@ -0,0 +1,138 @@
+from .cache import ActiveSessionCache, ResponseCache, active_sessions, line_cache
+from .catalogue import (
+    CatalogueVersion,
+    bump_catalogue_version,
+    changed_line_ids,
+    get_catalogue_version,
+    record_line_change,
+)
+from .columnar import (
+    COLUMNAR_CONTENT_TYPE,
+    ColumnarFormatError,
+    decode_location_batch,
+    decode_sensor_batch,
+    encode_location_batch,
+    encode_sensor_batch,
+)
+from .compression import (
+    MAX_DECOMPRESSED_SIZE,
+    SUPPORTED_ENCODINGS,
+    BodyDecoder,
+    BodyTooLarge,
+    InvalidCompressedBody,
+    UnsupportedContentEncoding,
+    content_encoding,
+    response_encoding,
+)
+from .geojson import DEFAULT_PRECISION, GEOJSON_CONTENT_TYPE, line_feature_collection
+from .ingest import (
+    InsertedIds,
+    insert_location_columns,
+    insert_location_columns_if_active,
+    insert_location_points,
+    insert_location_rows,
+    insert_sensor_columns,
+    insert_sensor_columns_if_active,
+    insert_sensor_readings,
+    insert_sensor_rows,
+    location_columns,
+    sensor_columns,
+)
+from .ingest_buffer import (
+    IngestBuffer,
+    IngestBufferUnavailable,
+    SessionNotFound,
+    SessionNotInProgress,
+    ingest_buffer,
+)
+from .ndjson import NDJSON_CONTENT_TYPE, NDJSONLineTooLong, iter_ndjson_lines
+from .notifications import (
+    LINE_AREAS_CHANNEL,
+    LINE_CHANGES_CHANNEL,
+    LineChangeListener,
+    notify_line_changed,
+)
+from .pagination import NEXT_CURSOR_HEADER, InvalidCursor, after_keyset, decode_cursor, encode_cursor
+from .partitions import (
+    PARTITIONED_TABLES,
+    drop_partitions_before,
+    ensure_partitions,
+    monthly_partitions,
+)
+from .paths import abandon_stale_sessions, computed_path_expression, update_computed_path
+from .polyline import (
+    POLYLINE_PRECISION,
+    PathFormat,
+    decode_polyline,
+    encode_wkb_polyline,
+    path_polyline,
+)
+from .spatial import (
+    METERS_PER_DEGREE,
+    detail_for_tolerance,
+    envelope,
+    geography,
+    lines_in_bbox_query,
+    lines_nearby_query,
+    lines_with_path,
+    nearest_lines_query,
+    path_column,
+    point_geography,
+    point_geometry,
+    viewport_detail,
+)
+from .tiles import MVT_CONTENT_TYPE, TileCache, line_tile, tile_bounds, tile_cache
+from .uploads import (
+    IDEMPOTENCY_KEY_HEADER,
+    REPLAYED_HEADER,
+    batch_summary,
+    find_upload_batch,
+    record_upload_batch,
+    upload_state,
+)
+
+__all__ = [
+    # Bulk ingest
+    "insert_location_columns", "insert_location_points", "location_columns",
+    "insert_sensor_columns", "insert_sensor_readings", "sensor_columns",
+    "insert_location_columns_if_active", "insert_sensor_columns_if_active",
+    "InsertedIds", "insert_location_rows", "insert_sensor_rows",
+    # Write-behind buffer for single-row uploads
+    "IngestBuffer", "IngestBufferUnavailable", "SessionNotFound", "SessionNotInProgress", "ingest_buffer",
+    # Idempotent uploads
+    "IDEMPOTENCY_KEY_HEADER", "REPLAYED_HEADER", "batch_summary", "find_upload_batch",
+    "record_upload_batch", "upload_state",
+    # Response cache
+    "ResponseCache", "line_cache", "ActiveSessionCache", "active_sessions",
+    # Line catalogue version
+    "CatalogueVersion", "bump_catalogue_version", "get_catalogue_version",
+    "changed_line_ids", "record_line_change",
+    # Columnar upload format
+    "COLUMNAR_CONTENT_TYPE", "ColumnarFormatError",
+    "decode_location_batch", "decode_sensor_batch",
+    "encode_location_batch", "encode_sensor_batch",
+    # Compressed request and response bodies
+    "MAX_DECOMPRESSED_SIZE", "SUPPORTED_ENCODINGS", "BodyDecoder", "BodyTooLarge", "InvalidCompressedBody",
+    "UnsupportedContentEncoding", "content_encoding", "response_encoding",
+    # GeoJSON
+    "DEFAULT_PRECISION", "GEOJSON_CONTENT_TYPE", "line_feature_collection",
+    # Streaming uploads
+    "NDJSON_CONTENT_TYPE", "NDJSONLineTooLong", "iter_ndjson_lines",
+    # Cross-worker notifications
+    "LINE_AREAS_CHANNEL", "LINE_CHANGES_CHANNEL", "LineChangeListener", "notify_line_changed",
+    # Keyset pagination
+    "NEXT_CURSOR_HEADER", "InvalidCursor", "after_keyset", "decode_cursor", "encode_cursor",
+    # Time-series partitions
+    "PARTITIONED_TABLES", "drop_partitions_before", "ensure_partitions", "monthly_partitions",
+    # Encoded polylines
+    "POLYLINE_PRECISION", "PathFormat", "decode_polyline", "encode_wkb_polyline", "path_polyline",
+    # Recording paths
+    "abandon_stale_sessions", "computed_path_expression", "update_computed_path",
+    # Spatial queries
+    "envelope", "geography", "lines_in_bbox_query", "lines_nearby_query", "nearest_lines_query",
+    "point_geography", "point_geometry",
+    # Simplified paths
+    "METERS_PER_DEGREE", "detail_for_tolerance", "lines_with_path", "path_column", "viewport_detail",
+    # Vector tiles
+    "MVT_CONTENT_TYPE", "TileCache", "line_tile", "tile_bounds", "tile_cache",
+]
@@ -0,0 +1,128 @@
+"""
+Bounded in-process LRU cache for serialized line responses.
+
+Keys are tuples whose first element is the line id the entry depends on,
+or None for entries built from many lines (lists, collections). Changing a
+line invalidates its own entries and every collection entry.
+
+Each invalidation also bumps a generation counter. A reader records the
+generation before querying and its entry is only stored if no
+invalidation happened meanwhile, so a slow read can never re-insert data
+that a concurrent write has already invalidated.
+
+ActiveSessionCache remembers which recording sessions were recently seen
+in progress, so single-row uploads can skip the session lookup.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from settings import cache_settings
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, value: Any, generation: int) -> bool:
+        """Store an entry built at `generation`. Returns False if it was already stale."""
+        if generation != self.generation or self.max_entries <= 0:
+            return False
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def invalidate(self, line_id: Optional[Hashable] = None) -> None:
+        """Drop entries for one line plus all collection entries, or everything if line_id is None."""
+        if line_id is None:
+            self._drop(lambda key: True)
+        else:
+            self._drop(lambda key: key[0] is None or key[0] == line_id)
+
+    def _drop(self, stale: Callable[[tuple], bool]) -> None:
+        self.generation += 1
+        self.invalidations += 1
+        for key in [k for k in self._entries if stale(k)]:
+            del self._entries[key]
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class ActiveSessionCache:
+    """
+    Ids of sessions seen in progress within the last ttl_ms milliseconds.
+
+    Only the in-progress state is cached: ending a session elsewhere is
+    noticed when the entry expires, and the ingest buffer re-checks the
+    status when it writes, so a stale entry never stores rows.
+    """
+
+    def __init__(self, ttl_ms: int, max_entries: int = 10000):
+        self.ttl_ms = ttl_ms
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._expiry: OrderedDict[int, float] = OrderedDict()
+
+    def __contains__(self, session_id: int) -> bool:
+        expires = self._expiry.get(session_id)
+        if expires is None or expires < time.monotonic():
+            self._expiry.pop(session_id, None)
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, session_id: int) -> None:
+        if self.ttl_ms <= 0:
+            return
+        self._expiry[session_id] = time.monotonic() + self.ttl_ms / 1000
+        self._expiry.move_to_end(session_id)
+        while len(self._expiry) > self.max_entries:
+            self._expiry.popitem(last=False)
+
+    def discard(self, session_id: Optional[int] = None) -> None:
+        """Forget one session, or all of them if session_id is None."""
+        if session_id is None:
+            self._expiry.clear()
+        else:
+            self._expiry.pop(session_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._expiry), "hits": self.hits, "misses": self.misses}
+
+
+# Serialized GET /lines responses for this worker
+line_cache = ResponseCache(cache_settings.line_cache_max_entries)
+
+# Sessions this worker recently saw in progress
+active_sessions = ActiveSessionCache(cache_settings.active_session_ttl_ms)
@@ -0,0 +1,73 @@
+"""
+Version counter and change log for the line catalogue.
+
+Every handler that changes lines calls record_line_change before it
+commits, so the version and the log move in the same transaction as the
+change. Bumping locks the single catalogue row until commit, so versions
+are handed out in commit order and a client that has seen version N will
+never miss a change numbered N or lower.
+Conditional reads compare against the version alone and never touch the
+lines table. The same transaction also NOTIFYs the other workers (see
+services.notifications).
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.line import LineCatalogue, LineChange, LineChangeKind
+from services.notifications import notify_line_changed
+
+
+@dataclass(frozen=True)
+class CatalogueVersion:
+    version: int
+    updated_at: Optional[datetime]
+
+    @property
+    def etag(self) -> str:
+        return f'"lines-{self.version}"'
+
+
+async def get_catalogue_version(db: AsyncSession) -> CatalogueVersion:
+    row = (await db.execute(
+        select(LineCatalogue.version, LineCatalogue.updated_at).where(LineCatalogue.id == 1)
+    )).first()
+    if row is None:
+        return CatalogueVersion(version=0, updated_at=None)
+    return CatalogueVersion(version=row.version, updated_at=row.updated_at)
+
+
+async def bump_catalogue_version(db: AsyncSession) -> int:
+    """Increment the catalogue version. Does not commit. Returns the new version."""
+    now = func.timezone("utc", func.clock_timestamp())
+    statement = insert(LineCatalogue).values(id=1, version=1, updated_at=now)
+    statement = statement.on_conflict_do_update(
+        index_elements=[LineCatalogue.id],
+        set_={"version": LineCatalogue.version + 1, "updated_at": now},
+    ).returning(LineCatalogue.version)
+    return (await db.execute(statement)).scalar_one()
+
+
+async def record_line_change(db: AsyncSession, line_id: int, change: LineChangeKind) -> int:
+    """
+    Bump the catalogue version, log the change under it and queue a
+    notification for other workers' caches. Does not commit.
+    """
+    version = await bump_catalogue_version(db)
+    db.add(LineChange(version=version, line_id=line_id, change=change))
+    await notify_line_changed(db, line_id)
+    return version
+
+
+async def changed_line_ids(db: AsyncSession, since: int, until: int) -> list[int]:
+    """Ids of lines changed in versions (since, until]."""
+    return list((await db.execute(
+        select(LineChange.line_id)
+        .where(LineChange.version > since, LineChange.version <= until)
+        .group_by(LineChange.line_id)
+        .order_by(LineChange.line_id)
+    )).scalars())
@@ -0,0 +1,189 @@
+"""
+Packed columnar upload format for location and sensor batches.
+
+An alternative to the JSON batch bodies for large uploads, sent with
+``Content-Type: application/vnd.cbba.columnar``. All values are little-endian.
+
+Header (16 bytes):
+
+    offset  type     field
+    0       4 bytes  magic, b"CBCF"
+    4       uint16   format version (1)
+    6       uint16   stream kind (1 = locations, 2 = sensors)
+    8       uint32   row count N
+    12      uint32   channel mask: bit i set means the i-th value column
+                     of the stream (see LOCATION_COLUMNS / SENSOR_COLUMNS,
+                     excluding "timestamp") is present
+
+Body:
+
+    int64[N]    timestamps, microseconds since the Unix epoch (UTC)
+    float64[N]  one array per present channel, in column order; NaN marks a
+                missing value in an optional channel
+
+Latitude and longitude are required for location batches. Columns are
+decoded zero-copy with NumPy and validated vectorially.
+"""
+import struct
+from datetime import datetime
+
+import numpy as np
+
+from services.ingest import LOCATION_COLUMNS, SENSOR_COLUMNS
+
+COLUMNAR_CONTENT_TYPE = "application/vnd.cbba.columnar"
+
+MAGIC = b"CBCF"
+VERSION = 1
+KIND_LOCATIONS = 1
+KIND_SENSORS = 2
+
+_HEADER = struct.Struct("<4sHHII")
+
+# (min, max, max_inclusive) bounds per channel, mirroring the Pydantic field constraints
+_LOCATION_BOUNDS = {
+    "latitude": (-90.0, 90.0, True),
+    "longitude": (-180.0, 180.0, True),
+    "bearing": (0.0, 360.0, False),
+}
+_SENSOR_BOUNDS = {
+    "magnetic_heading": (0.0, 360.0, False),
+}
+_LOCATION_REQUIRED = ("latitude", "longitude")
+
+_EPOCH = np.datetime64(0, "us")
+# Microseconds since the epoch that a datetime can hold; NumPy turns values
+# outside this range into plain ints rather than datetimes
+_TIMESTAMP_BOUNDS = tuple(int((np.datetime64(ts, "us") - _EPOCH).astype("i8")) for ts in (datetime.min, datetime.max))
+
+
+class ColumnarFormatError(ValueError):
+    """Raised when a columnar body is malformed or fails validation."""
+
+
+def _encode(kind: int, channels: tuple[str, ...], columns: dict[str, list]) -> bytes:
+    count = len(columns["timestamp"])
+    present = [
+        name for name in channels
+        if name in columns and any(v is not None for v in columns[name])
+    ]
+    mask = sum(1 << channels.index(name) for name in present)
+
+    timestamps = np.array([_to_naive_utc(ts) for ts in columns["timestamp"]], dtype="datetime64[us]")
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, kind, count, mask),
+        (timestamps - _EPOCH).astype("<i8").tobytes(),
+    ]
+    for name in present:
+        values = np.array([np.nan if v is None else v for v in columns[name]], dtype="<f8")
+        parts.append(values.tobytes())
+    return b"".join(parts)
+
+
+def _to_naive_utc(ts: datetime) -> datetime:
+    offset = ts.utcoffset()
+    if offset is None:
+        return ts
+    return (ts - offset).replace(tzinfo=None)
+
+
+def _decode(body: bytes, kind: int, channels: tuple[str, ...]) -> dict[str, np.ndarray]:
+    if len(body) < _HEADER.size:
+        raise ColumnarFormatError("Body is shorter than the columnar header")
+
+    magic, version, body_kind, count, mask = _HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ColumnarFormatError("Not a columnar batch (bad magic)")
+    if version != VERSION:
+        raise ColumnarFormatError(f"Unsupported columnar format version {version}")
+    if body_kind != kind:
+        raise ColumnarFormatError(f"Expected stream kind {kind}, got {body_kind}")
+    if mask >> len(channels):
+        raise ColumnarFormatError("Channel mask has bits set for unknown channels")
+
+    present = [name for i, name in enumerate(channels) if mask & (1 << i)]
+    expected = _HEADER.size + 8 * count * (1 + len(present))
+    if len(body) != expected:
+        raise ColumnarFormatError(f"Expected {expected} bytes for {count} rows, got {len(body)}")
+
+    offset = _HEADER.size
+    result = {"timestamp": np.frombuffer(body, dtype="<i8", count=count, offset=offset)}
+    for name in present:
+        offset += 8 * count
+        result[name] = np.frombuffer(body, dtype="<f8", count=count, offset=offset)
+    return result
+
+
+def _check_bounds(columns: dict[str, np.ndarray], bounds: dict[str, tuple[float, float, bool]]) -> None:
+    for name, (low, high, high_inclusive) in bounds.items():
+        values = columns.get(name)
+        if values is None:
+            continue
+        # NaN compares False on both sides, so missing values pass
+        above = values > high if high_inclusive else values >= high
+        bad = np.flatnonzero((values < low) | above)
+        if bad.size:
+            row = int(bad[0])
+            raise ColumnarFormatError(
+                f"{name} out of range at row {row}: {values[row]} "
+                f"(must be >= {low} and {'<=' if high_inclusive else '<'} {high})"
+            )
+
+
+def _check_timestamps(timestamps: np.ndarray) -> None:
+    low, high = _TIMESTAMP_BOUNDS
+    bad = np.flatnonzero((timestamps < low) | (timestamps > high))
+    if bad.size:
+        row = int(bad[0])
+        raise ColumnarFormatError(
+            f"timestamp out of range at row {row}: {timestamps[row]} "
+            f"microseconds (must fall between {datetime.min} and {datetime.max})"
+        )
+
+
+def _to_lists(columns: dict[str, np.ndarray], channels: tuple[str, ...]) -> dict[str, list]:
+    count = len(columns["timestamp"])
+    result = {"timestamp": columns["timestamp"].astype("datetime64[us]").tolist()}
+    for name in channels:
+        values = columns.get(name)
+        if values is None:
+            result[name] = [None] * count
+        elif np.isnan(values).any():
+            result[name] = np.where(np.isnan(values), None, values).tolist()
+        else:
+            result[name] = values.tolist()
+    return result
+
+
+def decode_location_batch(body: bytes) -> dict[str, list]:
+    """Decode and validate a columnar location batch into per-column lists for bulk insert."""
+    channels = LOCATION_COLUMNS[1:]
+    columns = _decode(body, KIND_LOCATIONS, channels)
+    for name in _LOCATION_REQUIRED:
+        if name not in columns:
+            if len(columns["timestamp"]):
+                raise ColumnarFormatError(f"{name} channel is required")
+        elif np.isnan(columns[name]).any():
+            raise ColumnarFormatError(f"{name} must not contain missing values")
+    _check_timestamps(columns["timestamp"])
+    _check_bounds(columns, _LOCATION_BOUNDS)
+    return _to_lists(columns, channels)
+
+
+def decode_sensor_batch(body: bytes) -> dict[str, list]:
+    """Decode and validate a columnar sensor batch into per-column lists for bulk insert."""
+    channels = SENSOR_COLUMNS[1:]
+    columns = _decode(body, KIND_SENSORS, channels)
+    _check_timestamps(columns["timestamp"])
+    _check_bounds(columns, _SENSOR_BOUNDS)
+    return _to_lists(columns, channels)
+
+
+def encode_location_batch(columns: dict[str, list]) -> bytes:
+    """Encode per-column location lists (as produced by location_columns) into the columnar format."""
+    return _encode(KIND_LOCATIONS, LOCATION_COLUMNS[1:], columns)
+
+
+def encode_sensor_batch(columns: dict[str, list]) -> bytes:
+    """Encode per-column sensor lists (as produced by sensor_columns) into the columnar format."""
+    return _encode(KIND_SENSORS, SENSOR_COLUMNS[1:], columns)
@@ -0,0 +1,123 @@
+"""
+Compressed request and response bodies.
+
+Clients may send a body with `Content-Encoding: gzip` or `zstd`. The body is
+decompressed as it arrives, and decoding stops as soon as the decompressed
+size passes a limit, so a small compressed body cannot expand into
+gigabytes of memory.
+
+Input is fed to the decompressor in slices small enough that a single
+slice cannot expand by more than a few megabytes (gzip tops out around
+1000:1, zstd's run-length blocks far higher), which bounds how far past
+the limit a body can get before it is rejected.
+
+A body may hold several gzip members or zstd frames back to back, as
+clients that compress in chunks produce; they are decoded in turn, and
+anything after the last one that is not another member is rejected.
+
+Responses are compressed with whichever of zstd or gzip the client
+accepts, preferring zstd.
+"""
+import zlib
+from typing import Callable, Optional
+
+import zstandard
+
+from settings import compression_settings
+
+SUPPORTED_ENCODINGS = ("gzip", "zstd")
+
+# Decompressed body limit
+MAX_DECOMPRESSED_SIZE = compression_settings.max_decompressed_body_bytes
+
+
+class UnsupportedContentEncoding(ValueError):
+    """Raised for a Content-Encoding other than identity, gzip or zstd."""
+
+
+class InvalidCompressedBody(ValueError):
+    """Raised when a body is not valid gzip/zstd data or is cut short."""
+
+
+class BodyTooLarge(ValueError):
+    """Raised when a body exceeds the size limit once decompressed."""
+
+
+# encoding -> (decompressor factory, input slice size in bytes)
+_DECOMPRESSORS: dict[str, tuple[Callable[[], object], int]] = {
+    "gzip": (lambda: zlib.decompressobj(wbits=16 + zlib.MAX_WBITS), 4096),
+    "zstd": (lambda: zstandard.ZstdDecompressor().decompressobj(), 256),
+}
+
+
+def content_encoding(header: Optional[str]) -> Optional[str]:
+    """None for an uncompressed body, else the supported encoding name."""
+    encoding = (header or "").strip().lower()
+    if encoding in ("", "identity"):
+        return None
+    if encoding == "x-gzip":
+        return "gzip"
+    if encoding not in _DECOMPRESSORS:
+        raise UnsupportedContentEncoding(
+            f"Unsupported Content-Encoding {header!r}; use {' or '.join(SUPPORTED_ENCODINGS)}"
+        )
+    return encoding
+
+
+class BodyDecoder:
+    """
+    Incremental decoder for one gzip or zstd request body.
+
+    Feed each received chunk to decode() and call finish() after the last
+    one. max_size defaults to MAX_DECOMPRESSED_SIZE. Raises
+    InvalidCompressedBody or BodyTooLarge.
+    """
+
+    def __init__(self, encoding: str, max_size: Optional[int] = None):
+        self._factory, self._slice_size = _DECOMPRESSORS[encoding]
+        self._decompressor = self._factory()
+        self.encoding = encoding
+        self.max_size = MAX_DECOMPRESSED_SIZE if max_size is None else max_size
+        self.size = 0
+
+    def decode(self, chunk: bytes) -> bytes:
+        """Decompress the next chunk of the body."""
+        output = bytearray()
+        try:
+            for start in range(0, len(chunk), self._slice_size):
+                data = chunk[start:start + self._slice_size]
+                while data:
+                    if self._decompressor.eof:
+                        # Next gzip member or zstd frame
+                        self._decompressor = self._factory()
+                    output += self._decompressor.decompress(data)
+                    if self.size + len(output) > self.max_size:
+                        raise BodyTooLarge(f"Body exceeds {self.max_size} bytes once decompressed")
+                    data = self._decompressor.unused_data if self._decompressor.eof else b""
+        except (zlib.error, zstandard.ZstdError) as e:
+            raise InvalidCompressedBody(f"Invalid {self.encoding} body: {e}") from None
+        self.size += len(output)
+        return bytes(output)
+
+    def finish(self) -> None:
+        """Check that the body was not cut short."""
+        if not self._decompressor.eof:
+            raise InvalidCompressedBody(f"Truncated {self.encoding} body")
+
+
+def response_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """zstd or gzip if the Accept-Encoding header allows it, else None."""
+    accepted = set()
+    for item in (accept_encoding or "").lower().split(","):
+        name, _, params = item.partition(";")
+        params = params.strip()
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(name.strip())
+    for encoding in ("zstd", "gzip"):
+        if encoding in accepted:
+            return encoding
+    return None
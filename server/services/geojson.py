@@ -0,0 +1,54 @@
+"""
+GeoJSON documents built entirely in PostGIS.
+
+The database aggregates the whole FeatureCollection into one JSON text
+value, so no geometry is decoded or re-encoded in Python.
+"""
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.line import LineDetail, LineStatus
+from services.spatial import path_column
+
+GEOJSON_CONTENT_TYPE = "application/geo+json"
+
+# PostGIS' own default for ST_AsGeoJSON
+DEFAULT_PRECISION = 9
+
+_LINE_FEATURE_COLLECTION = """
+    SELECT CAST(json_build_object(
+        'type', 'FeatureCollection',
+        'features', coalesce(json_agg(json_build_object(
+            'type', 'Feature',
+            'id', id,
+            'geometry', CAST(ST_AsGeoJSON({path}, CAST(:precision AS integer)) AS json),
+            'properties', json_build_object(
+                'id', id,
+                'name', name,
+                'description', description,
+                'status', lower(CAST(status AS text)),
+                'merged_into_id', merged_into_id,
+                'updated_at', updated_at
+            )
+        ) ORDER BY id), CAST('[]' AS json))
+    ) AS text)
+    FROM lines
+"""
+
+
+async def line_feature_collection(
+    db: AsyncSession,
+    status: Optional[LineStatus] = None,
+    precision: int = DEFAULT_PRECISION,
+    detail: LineDetail = LineDetail.FULL,
+) -> bytes:
+    """Lines as an encoded GeoJSON FeatureCollection, optionally filtered by status."""
+    sql = _LINE_FEATURE_COLLECTION.format(path=path_column(detail).name)
+    params: dict = {"precision": precision}
+    if status is not None:
+        sql += " WHERE status = CAST(:status AS linestatus)"
+        params["status"] = status.name
+    document = (await db.execute(text(sql), params)).scalar_one()
+    return document.encode()
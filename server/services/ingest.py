@@ -0,0 +1,344 @@
+"""
+Bulk ingest of recording data.
+
+Batches are written with a single INSERT ... SELECT over unnest()ed column
+arrays, so the whole batch costs one round-trip regardless of its size.
+Location points get their PostGIS point built server-side in the same statement.
+
+A session holds at most one location point per timestamp. Points whose
+timestamp the session already has are skipped, so re-sending a batch after
+a lost response stores nothing twice. Sensor readings are always stored:
+the accelerometer and gyroscope sample independently and may share a
+timestamp, so retried sensor batches rely on an Idempotency-Key instead
+(see services.uploads).
+
+The *_if_active variants check that the session is in progress, bump its
+last_activity_at and insert the batch in one statement. The *_rows
+variants insert rows of many sessions at once, for the write-behind buffer
+that coalesces single-row uploads (see services.ingest_buffer).
+"""
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.recording import LocationPointCreate, RecordingStatus, SensorReadingCreate
+
+# Columns shared by the API schema and the location_points table, in insert order
+LOCATION_COLUMNS = (
+    "timestamp",
+    "latitude",
+    "longitude",
+    "altitude",
+    "speed",
+    "bearing",
+    "horizontal_accuracy",
+    "vertical_accuracy",
+)
+
+# Columns shared by the API schema and the sensor_readings table, in insert order
+SENSOR_COLUMNS = (
+    "timestamp",
+    "accel_x",
+    "accel_y",
+    "accel_z",
+    "gyro_x",
+    "gyro_y",
+    "gyro_z",
+    "pressure",
+    "magnetic_heading",
+)
+
+_INSERT_LOCATIONS = text("""
+    INSERT INTO location_points (
+        session_id, timestamp, latitude, longitude, altitude, speed,
+        bearing, horizontal_accuracy, vertical_accuracy, point
+    )
+    SELECT
+        CAST(:session_id AS integer), t.timestamp, t.latitude, t.longitude, t.altitude, t.speed,
+        t.bearing, t.horizontal_accuracy, t.vertical_accuracy,
+        ST_SetSRID(ST_MakePoint(t.longitude, t.latitude), 4326)
+    FROM unnest(
+        CAST(:timestamp AS timestamp[]),
+        CAST(:latitude AS double precision[]),
+        CAST(:longitude AS double precision[]),
+        CAST(:altitude AS double precision[]),
+        CAST(:speed AS double precision[]),
+        CAST(:bearing AS double precision[]),
+        CAST(:horizontal_accuracy AS double precision[]),
+        CAST(:vertical_accuracy AS double precision[])
+    ) AS t(
+        timestamp, latitude, longitude, altitude, speed,
+        bearing, horizontal_accuracy, vertical_accuracy
+    )
+    ON CONFLICT (session_id, timestamp) DO NOTHING
+""")
+
+_INSERT_SENSORS = text("""
+    INSERT INTO sensor_readings (
+        session_id, timestamp, accel_x, accel_y, accel_z,
+        gyro_x, gyro_y, gyro_z, pressure, magnetic_heading
+    )
+    SELECT CAST(:session_id AS integer), t.*
+    FROM unnest(
+        CAST(:timestamp AS timestamp[]),
+        CAST(:accel_x AS double precision[]),
+        CAST(:accel_y AS double precision[]),
+        CAST(:accel_z AS double precision[]),
+        CAST(:gyro_x AS double precision[]),
+        CAST(:gyro_y AS double precision[]),
+        CAST(:gyro_z AS double precision[]),
+        CAST(:pressure AS double precision[]),
+        CAST(:magnetic_heading AS double precision[])
+    ) AS t
+""")
+
+
+# Enum columns store member names (see models.recording)
+_IN_PROGRESS = RecordingStatus.IN_PROGRESS.name
+
+# The UPDATE both gates the insert and locks the session row, so a batch
+# cannot land after a concurrent end/cancel has committed
+_INSERT_LOCATIONS_IF_ACTIVE = text("""
+    WITH active AS (
+        UPDATE recording_sessions SET last_activity_at = timezone('utc', now())
+        WHERE id = :session_id AND status = :status
+        RETURNING id
+    ), inserted AS (
+        INSERT INTO location_points (
+            session_id, timestamp, latitude, longitude, altitude, speed,
+            bearing, horizontal_accuracy, vertical_accuracy, point
+        )
+        SELECT
+            active.id, t.timestamp, t.latitude, t.longitude, t.altitude, t.speed,
+            t.bearing, t.horizontal_accuracy, t.vertical_accuracy,
+            ST_SetSRID(ST_MakePoint(t.longitude, t.latitude), 4326)
+        FROM active, unnest(
+            CAST(:timestamp AS timestamp[]),
+            CAST(:latitude AS double precision[]),
+            CAST(:longitude AS double precision[]),
+            CAST(:altitude AS double precision[]),
+            CAST(:speed AS double precision[]),
+            CAST(:bearing AS double precision[]),
+            CAST(:horizontal_accuracy AS double precision[]),
+            CAST(:vertical_accuracy AS double precision[])
+        ) AS t(
+            timestamp, latitude, longitude, altitude, speed,
+            bearing, horizontal_accuracy, vertical_accuracy
+        )
+        ON CONFLICT (session_id, timestamp) DO NOTHING
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM active) AS active, (SELECT count(*) FROM inserted) AS added
+""")
+
+_INSERT_SENSORS_IF_ACTIVE = text("""
+    WITH active AS (
+        UPDATE recording_sessions SET last_activity_at = timezone('utc', now())
+        WHERE id = :session_id AND status = :status
+        RETURNING id
+    ), inserted AS (
+        INSERT INTO sensor_readings (
+            session_id, timestamp, accel_x, accel_y, accel_z,
+            gyro_x, gyro_y, gyro_z, pressure, magnetic_heading
+        )
+        SELECT active.id, t.*
+        FROM active, unnest(
+            CAST(:timestamp AS timestamp[]),
+            CAST(:accel_x AS double precision[]),
+            CAST(:accel_y AS double precision[]),
+            CAST(:accel_z AS double precision[]),
+            CAST(:gyro_x AS double precision[]),
+            CAST(:gyro_y AS double precision[]),
+            CAST(:gyro_z AS double precision[]),
+            CAST(:pressure AS double precision[]),
+            CAST(:magnetic_heading AS double precision[])
+        ) AS t
+        RETURNING 1
+    )
+    SELECT (SELECT count(*) FROM active) AS active, (SELECT count(*) FROM inserted) AS added
+""")
+
+_INSERT_LOCATION_ROWS = text("""
+    INSERT INTO location_points (
+        session_id, timestamp, latitude, longitude, altitude, speed,
+        bearing, horizontal_accuracy, vertical_accuracy, point
+    )
+    SELECT
+        t.session_id, t.timestamp, t.latitude, t.longitude, t.altitude, t.speed,
+        t.bearing, t.horizontal_accuracy, t.vertical_accuracy,
+        ST_SetSRID(ST_MakePoint(t.longitude, t.latitude), 4326)
+    FROM unnest(
+        CAST(:session_id AS integer[]),
+        CAST(:timestamp AS timestamp[]),
+        CAST(:latitude AS double precision[]),
+        CAST(:longitude AS double precision[]),
+        CAST(:altitude AS double precision[]),
+        CAST(:speed AS double precision[]),
+        CAST(:bearing AS double precision[]),
+        CAST(:horizontal_accuracy AS double precision[]),
+        CAST(:vertical_accuracy AS double precision[])
+    ) AS t(
+        session_id, timestamp, latitude, longitude, altitude, speed,
+        bearing, horizontal_accuracy, vertical_accuracy
+    )
+    ON CONFLICT (session_id, timestamp) DO NOTHING
+    RETURNING id, session_id, timestamp
+""")
+
+# Every reading is inserted, so rows cannot be told apart by (session_id,
+# timestamp); ids are drawn up front and returned in input order instead
+_INSERT_SENSOR_ROWS = text("""
+    WITH numbered AS (
+        SELECT nextval('sensor_readings_id_seq') AS id, t.*
+        FROM unnest(
+            CAST(:session_id AS integer[]),
+            CAST(:timestamp AS timestamp[]),
+            CAST(:accel_x AS double precision[]),
+            CAST(:accel_y AS double precision[]),
+            CAST(:accel_z AS double precision[]),
+            CAST(:gyro_x AS double precision[]),
+            CAST(:gyro_y AS double precision[]),
+            CAST(:gyro_z AS double precision[]),
+            CAST(:pressure AS double precision[]),
+            CAST(:magnetic_heading AS double precision[])
+        ) WITH ORDINALITY AS t(
+            session_id, timestamp, accel_x, accel_y, accel_z,
+            gyro_x, gyro_y, gyro_z, pressure, magnetic_heading, position
+        )
+    ), inserted AS (
+        INSERT INTO sensor_readings (
+            id, session_id, timestamp, accel_x, accel_y, accel_z,
+            gyro_x, gyro_y, gyro_z, pressure, magnetic_heading
+        )
+        SELECT
+            id, session_id, timestamp, accel_x, accel_y, accel_z,
+            gyro_x, gyro_y, gyro_z, pressure, magnetic_heading
+        FROM numbered
+    )
+    SELECT id FROM numbered ORDER BY position
+""")
+
+# Id of each row passed to a *_rows call, in order; None for a location
+# point that was not inserted because its timestamp was already taken
+InsertedIds = list[Optional[int]]
+
+
+def location_columns(points: Sequence[LocationPointCreate]) -> dict[str, list]:
+    """Transpose validated location points into per-column lists."""
+    return {
+        column: [getattr(p, column) for p in points]
+        for column in LOCATION_COLUMNS
+    }
+
+
+async def insert_location_columns(db: AsyncSession, session_id: int, columns: dict[str, list]) -> int:
+    """
+    Insert location points given as per-column lists in a single statement.
+
+    Does not commit; the caller owns the transaction. Returns the number of
+    rows inserted, which excludes timestamps the session already had.
+    """
+    if not columns["timestamp"]:
+        return 0
+    result = await db.execute(_INSERT_LOCATIONS, {"session_id": session_id, **columns})
+    return result.rowcount
+
+
+async def insert_location_points(db: AsyncSession, session_id: int, points: Sequence[LocationPointCreate]) -> int:
+    """Insert validated location points in a single statement (see insert_location_columns)."""
+    return await insert_location_columns(db, session_id, location_columns(points))
+
+
+async def insert_location_columns_if_active(
+    db: AsyncSession, session_id: int, columns: dict[str, list]
+) -> Optional[int]:
+    """
+    Insert location points given as per-column lists if the session is in progress.
+
+    Checks the status, bumps last_activity_at and inserts in one statement.
+    Does not commit. Returns the number of rows inserted, or None (nothing
+    written) when the session does not exist or is not in progress.
+    """
+    params = {"session_id": session_id, "status": _IN_PROGRESS, **columns}
+    result = (await db.execute(_INSERT_LOCATIONS_IF_ACTIVE, params)).one()
+    return result.added if result.active else None
+
+
+async def insert_location_rows(
+    db: AsyncSession, session_ids: Sequence[int], points: Sequence[LocationPointCreate]
+) -> InsertedIds:
+    """
+    Insert location points of any number of sessions in a single statement.
+
+    points[i] belongs to session_ids[i]. Does not commit. Returns the id of
+    each point inserted, or None where the session already had the
+    timestamp, including from an earlier point of the same call.
+    """
+    # Only the first point per (session_id, timestamp) is sent, so it is
+    # known which one a conflict-free insert stored
+    keys = [(session_id, point.timestamp) for session_id, point in zip(session_ids, points)]
+    first: dict[tuple[int, datetime], int] = {}
+    for i, key in enumerate(keys):
+        first.setdefault(key, i)
+    if not first:
+        return []
+    sent = list(first.values())
+    result = await db.execute(_INSERT_LOCATION_ROWS, {
+        "session_id": [session_ids[i] for i in sent],
+        **location_columns([points[i] for i in sent]),
+    })
+    ids = {(row.session_id, row.timestamp): row.id for row in result}
+    return [ids.get(key) if first[key] == i else None for i, key in enumerate(keys)]
+
+
+def sensor_columns(readings: Sequence[SensorReadingCreate]) -> dict[str, list]:
+    """Transpose validated sensor readings into per-column lists."""
+    return {
+        column: [getattr(r, column) for r in readings]
+        for column in SENSOR_COLUMNS
+    }
+
+
+async def insert_sensor_columns(db: AsyncSession, session_id: int, columns: dict[str, list]) -> int:
+    """
+    Insert sensor readings given as per-column lists in a single statement.
+
+    Bypasses the ORM entirely (no per-row objects or identity map), which matters
+    at 50-100 Hz sampling rates. Does not commit. Returns the number of rows
+    inserted; every reading is stored, whatever its timestamp.
+    """
+    if not columns["timestamp"]:
+        return 0
+    result = await db.execute(_INSERT_SENSORS, {"session_id": session_id, **columns})
+    return result.rowcount
+
+
+async def insert_sensor_readings(db: AsyncSession, session_id: int, readings: Sequence[SensorReadingCreate]) -> int:
+    """Insert validated sensor readings in a single statement (see insert_sensor_columns)."""
+    return await insert_sensor_columns(db, session_id, sensor_columns(readings))
+
+
+async def insert_sensor_columns_if_active(
+    db: AsyncSession, session_id: int, columns: dict[str, list]
+) -> Optional[int]:
+    """Insert sensor readings if the session is in progress (see insert_location_columns_if_active)."""
+    params = {"session_id": session_id, "status": _IN_PROGRESS, **columns}
+    result = (await db.execute(_INSERT_SENSORS_IF_ACTIVE, params)).one()
+    return result.added if result.active else None
+
+
+async def insert_sensor_rows(
+    db: AsyncSession, session_ids: Sequence[int], readings: Sequence[SensorReadingCreate]
+) -> InsertedIds:
+    """
+    Insert sensor readings of any number of sessions in a single statement.
+
+    readings[i] belongs to session_ids[i]. Does not commit. Every reading is
+    stored; returns their ids in the same order.
+    """
+    if not readings:
+        return []
+    result = await db.execute(_INSERT_SENSOR_ROWS, {"session_id": list(session_ids), **sensor_columns(readings)})
+    return list(result.scalars())
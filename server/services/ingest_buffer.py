@@ -0,0 +1,270 @@
+"""
+Write-behind buffer for single-row location and sensor uploads.
+
+Clients that stream live send one GPS fix or sensor sample per request.
+Committing each row on its own costs a transaction and several round-trips
+per request. Instead, rows are queued here and a background task writes
+everything queued in one bulk INSERT per table (see services.ingest) and one
+commit, every flush_rows rows or flush_ms milliseconds, whichever comes
+first. If a flush fails, the rows of each session in it are retried in a
+flush of their own, so an error only reaches the session that caused it.
+
+A request is acknowledged once the flush holding its row has committed, so
+an acknowledged row is durable and is returned with its id exactly as
+before. Up to max_pending rows may be queued; past that, uploads wait up to
+enqueue_timeout_ms for room and then fail with IngestBufferUnavailable, which
+clients should retry. stop() refuses new rows and flushes everything already
+queued.
+
+Each flush first bumps last_activity_at of the sessions involved with an
+UPDATE limited to sessions in progress; rows of any other session are
+rejected with SessionNotInProgress, or SessionNotFound if the session was
+deleted. Callers may therefore check the status against a cache
+(services.cache.active_sessions) and leave the final word to the flush.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from models.recording import (
+    LocationPoint,
+    LocationPointCreate,
+    LocationPointRead,
+    RecordingSession,
+    RecordingStatus,
+    SensorReading,
+    SensorReadingCreate,
+    SensorReadingRead,
+    UploadStream,
+)
+from services.ingest import InsertedIds, insert_location_rows, insert_sensor_rows
+from settings import ingest_settings
+
+logger = logging.getLogger(__name__)
+
+Row = LocationPointCreate | SensorReadingCreate
+RowRead = LocationPointRead | SensorReadingRead
+
+BulkInsert = Callable[[AsyncSession, Sequence[int], Sequence[Row]], Awaitable[InsertedIds]]
+
+# stream -> (bulk insert, table model, read schema)
+_STREAMS: dict[UploadStream, tuple[BulkInsert, type[SQLModel], type[RowRead]]] = {
+    UploadStream.LOCATIONS: (insert_location_rows, LocationPoint, LocationPointRead),
+    UploadStream.SENSORS: (insert_sensor_rows, SensorReading, SensorReadingRead),
+}
+
+
+class IngestBufferUnavailable(RuntimeError):
+    """Raised when the buffer is full, stopped, or shutting down."""
+
+
+class SessionNotInProgress(ValueError):
+    """Raised for a row whose session had ended by the time it was written."""
+
+
+class SessionNotFound(ValueError):
+    """Raised for a row whose session had been deleted by the time it was written."""
+
+
+@dataclass
+class _Pending:
+    stream: UploadStream
+    session_id: int
+    row: Row
+    future: asyncio.Future
+    result: Optional[RowRead] = None
+
+    @property
+    def key(self) -> tuple[int, datetime]:
+        return self.session_id, self.row.timestamp
+
+
+class IngestBuffer:
+    """Queue of rows waiting for the next bulk insert; start() it from the app lifespan."""
+
+    def __init__(
+        self,
+        flush_rows: int = 500,
+        flush_ms: int = 50,
+        max_pending: int = 10000,
+        enqueue_timeout_ms: int = 1000,
+    ):
+        self.flush_rows = flush_rows
+        self.flush_ms = flush_ms
+        self.max_pending = max_pending
+        self.enqueue_timeout_ms = enqueue_timeout_ms
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushes = 0
+        self.rows = 0
+
+    async def start(self, session_factory: Callable[[], AsyncSession]) -> None:
+        # Queue and semaphore belong to the running event loop
+        self._session_factory = session_factory
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Refuse new rows, then flush everything already queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def add_location_point(self, session_id: int, point: LocationPointCreate) -> LocationPointRead:
+        """Queue a location point and return it once stored."""
+        return await self._add(UploadStream.LOCATIONS, session_id, point)
+
+    async def add_sensor_reading(self, session_id: int, reading: SensorReadingCreate) -> SensorReadingRead:
+        """Queue a sensor reading and return it once stored."""
+        return await self._add(UploadStream.SENSORS, session_id, reading)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "flushes": self.flushes,
+            "rows": self.rows,
+        }
+
+    async def _add(self, stream: UploadStream, session_id: int, row: Row) -> RowRead:
+        if self._task is None or self._closing:
+            raise IngestBufferUnavailable("Ingest buffer is not accepting rows")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.enqueue_timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            raise IngestBufferUnavailable("Ingest buffer is full") from None
+        # stop() may have queued its marker while this upload waited for room
+        if self._closing:
+            self._slots.release()
+            raise IngestBufferUnavailable("Ingest buffer is not accepting rows")
+        pending = _Pending(stream, session_id, row, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(pending)
+        return await pending.future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_ms / 1000
+            while len(batch) < self.flush_rows:
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if pending is None:
+                    stopping = True
+                    break
+                batch.append(pending)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[_Pending]) -> None:
+        try:
+            await self._write(batch)
+        finally:
+            for _ in batch:
+                self._slots.release()
+
+    async def _write(self, batch: list[_Pending]) -> None:
+        sessions = {p.session_id for p in batch}
+        try:
+            active, existing = await self._commit(batch)
+        except Exception as exc:
+            if len(sessions) == 1:
+                logger.exception("Flushing %d buffered rows of session %d failed", len(batch), batch[0].session_id)
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+                return
+            logger.warning(
+                "Flushing %d buffered rows of %d sessions failed; retrying each session alone",
+                len(batch), len(sessions), exc_info=True,
+            )
+        else:
+            self.flushes += 1
+            self.rows += sum(pending.session_id in active for pending in batch)
+            for pending in batch:
+                if pending.future.done():
+                    continue
+                if pending.session_id in active:
+                    pending.future.set_result(pending.result)
+                elif pending.session_id in existing:
+                    pending.future.set_exception(SessionNotInProgress("Session is not in progress"))
+                else:
+                    pending.future.set_exception(SessionNotFound("Recording session not found"))
+            return
+        # Keep one session's bad row from failing every other session's rows
+        for session_id in sessions:
+            await self._write([p for p in batch if p.session_id == session_id])
+
+    async def _commit(self, batch: list[_Pending]) -> tuple[set[int], set[int]]:
+        """Write a batch; returns the ids of its sessions in progress and of its other existing sessions."""
+        async with self._session_factory() as db:
+            # Also locks the sessions until commit, so no row lands after an end
+            active = set((await db.execute(
+                update(RecordingSession)
+                .where(
+                    RecordingSession.id.in_({p.session_id for p in batch}),
+                    RecordingSession.status == RecordingStatus.IN_PROGRESS,
+                )
+                .values(last_activity_at=datetime.utcnow())
+                .returning(RecordingSession.id)
+            )).scalars())
+            rejected = {p.session_id for p in batch} - active
+            existing = set()
+            if rejected:
+                existing = set((await db.execute(
+                    select(RecordingSession.id).where(RecordingSession.id.in_(rejected))
+                )).scalars())
+            for stream, (insert, model, read) in _STREAMS.items():
+                items = [p for p in batch if p.stream is stream and p.session_id in active]
+                if items:
+                    await self._insert(db, items, insert, model, read)
+            await db.commit()
+        return active, existing
+
+    async def _insert(
+        self,
+        db: AsyncSession,
+        items: list[_Pending],
+        insert: BulkInsert,
+        model: type[SQLModel],
+        read: type[RowRead],
+    ) -> None:
+        ids = await insert(db, [p.session_id for p in items], [p.row for p in items])
+        # A location point whose timestamp was taken, by an earlier attempt or
+        # by another row of this batch, is answered with the point as stored
+        missing = {p.key for p, row_id in zip(items, ids) if row_id is None}
+        stored = {}
+        if missing:
+            result = await db.execute(select(model).where(tuple_(model.session_id, model.timestamp).in_(missing)))
+            stored = {(row.session_id, row.timestamp): read.model_validate(row) for row in result.scalars()}
+        for pending, row_id in zip(items, ids):
+            if row_id is not None:
+                pending.result = read(id=row_id, session_id=pending.session_id, **pending.row.model_dump())
+            else:
+                pending.result = stored[pending.key]
+
+
+ingest_buffer = IngestBuffer(
+    flush_rows=ingest_settings.flush_rows,
+    flush_ms=ingest_settings.flush_ms,
+    max_pending=ingest_settings.max_pending,
+    enqueue_timeout_ms=ingest_settings.enqueue_timeout_ms,
+)
@@ -0,0 +1,42 @@
+"""
+Incremental NDJSON parsing for streamed uploads.
+
+Request bodies are consumed chunk by chunk, so memory use is bounded by the
+longest line rather than by the size of the upload.
+"""
+from typing import AsyncIterator
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# A single location or sensor record is well under 1 KiB
+MAX_LINE_BYTES = 64 * 1024
+
+
+class NDJSONLineTooLong(ValueError):
+    """Raised when a line exceeds the maximum allowed length."""
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Yield (line_number, line) for every non-blank line of a chunked NDJSON body.
+
+    Line numbers are 1-based and count blank lines, so they match what a client sent.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if len(line) > max_line_bytes:
+                raise NDJSONLineTooLong(f"Line {line_number} exceeds {max_line_bytes} bytes")
+            if line.strip():
+                yield line_number, line
+        if len(buffer) > max_line_bytes:
+            raise NDJSONLineTooLong(f"Line {line_number + 1} exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield line_number + 1, buffer
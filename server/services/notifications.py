@@ -0,0 +1,155 @@
+"""
+Cross-worker invalidation of line caches through PostgreSQL LISTEN/NOTIFY.
+
+record_line_change queues a notification carrying the line id. PostgreSQL
+delivers it to every listening connection only when the transaction
+commits, and drops it on rollback. Each worker holds one dedicated
+connection that LISTENs on the channel and invalidates its local caches.
+
+A trigger on lines (see models.line) also notifies the bounding box of
+each change on LINE_AREAS_CHANNEL, for caches organised by area such as
+vector tiles.
+
+Notifications sent while the listener is disconnected are lost, so caches
+are cleared completely whenever the connection drops and again once it is
+re-established.
+"""
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+LINE_CHANGES_CHANNEL = "line_changes"
+# Payload "min_lon,min_lat,max_lon,max_lat"; sent by the notify_line_area trigger
+LINE_AREAS_CHANNEL = "line_areas"
+
+Bounds = tuple[float, float, float, float]
+
+
+async def notify_line_changed(db: AsyncSession, line_id: int) -> None:
+    """Queue a line change notification; it is sent when the transaction commits."""
+    await db.execute(select(func.pg_notify(LINE_CHANGES_CHANNEL, str(line_id))))
+
+
+class LineChangeListener:
+    """
+    Background LISTEN on the line changes channels.
+
+    `on_change` is called with the changed line id, and `on_area_change`
+    (if given) with the changed bounding box. Both get None when everything
+    cached must be dropped.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        on_change: Callable[[Optional[int]], None],
+        on_area_change: Optional[Callable[[Optional[Bounds]], None]] = None,
+        retry_seconds: float = 5.0,
+        ping_seconds: float = 30.0,
+    ):
+        self.dsn = dsn
+        self.on_change = on_change
+        self.on_area_change = on_area_change
+        self.retry_seconds = retry_seconds
+        self.ping_seconds = ping_seconds
+        self._conn: Optional[asyncpg.Connection] = None
+        self._lost = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """LISTEN before returning, so no change committed after startup is missed."""
+        await self._connect()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+    async def _connect(self) -> None:
+        self._lost.clear()
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(lambda conn: self._lost.set())
+        await self._conn.add_listener(LINE_CHANGES_CHANNEL, self._on_notification)
+        if self.on_area_change is not None:
+            await self._conn.add_listener(LINE_AREAS_CHANNEL, self._on_area_notification)
+
+    async def _close(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def _close_quietly(self) -> None:
+        """Drop a lost or half-open connection without waiting on it for long."""
+        conn, self._conn = self._conn, None
+        if conn is None or conn.is_closed():
+            return
+        try:
+            await conn.close(timeout=self.retry_seconds)
+        except Exception:
+            conn.terminate()
+
+    def _on_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            line_id: Optional[int] = int(payload)
+        except ValueError:
+            line_id = None
+        self.on_change(line_id)
+
+    def _on_area_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(value) for value in payload.split(","))
+            area: Optional[Bounds] = (min_lon, min_lat, max_lon, max_lat)
+        except ValueError:
+            area = None
+        self.on_area_change(area)
+
+    def _drop_everything(self) -> None:
+        self.on_change(None)
+        if self.on_area_change is not None:
+            self.on_area_change(None)
+
+    async def _wait_until_lost(self) -> None:
+        # An idle socket may never notice a dead server, so ping it
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), timeout=self.ping_seconds)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                # A half-open socket never answers, so the ping is bounded too
+                await self._conn.fetchval("SELECT 1", timeout=self.ping_seconds)
+            except Exception:
+                return
+
+    async def _run(self) -> None:
+        while True:
+            await self._wait_until_lost()
+            logger.warning("Lost the %s listener connection; clearing line caches", LINE_CHANGES_CHANNEL)
+            self._drop_everything()
+            await self._close_quietly()
+
+            # Any failure here is retried: if this task ended, no cache would
+            # be invalidated again until the worker restarts
+            while True:
+                await asyncio.sleep(self.retry_seconds)
+                try:
+                    await self._connect()
+                    break
+                except Exception as exc:
+                    logger.warning("Reconnecting the %s listener failed: %r", LINE_CHANGES_CHANNEL, exc)
+                    await self._close_quietly()
+            # Anything cached while disconnected may have missed a change
+            self._drop_everything()
@@ -0,0 +1,54 @@
+"""
+Keyset pagination for per-session time series.
+
+Rows are ordered by (timestamp, id) and each page starts strictly after the
+last row of the previous one, so every page is a range scan of the
+(session_id, timestamp) index of the table no matter how deep into the
+recording it is. Sensor readings may share a timestamp; id breaks the tie.
+Cursors are opaque to clients: URL-safe base64 of "<timestamp>|<id>".
+"""
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Invalid cursor") from None
+
+
+def after_keyset(
+    timestamp_column: Any,
+    id_column: Any,
+    after_timestamp: datetime,
+    after_id: Optional[int] = None,
+) -> Any:
+    """
+    WHERE clause for rows after a position.
+
+    Without after_id, every row at after_timestamp is skipped.
+    """
+    if after_timestamp.tzinfo is not None:
+        after_timestamp = after_timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    if after_id is None:
+        return timestamp_column > after_timestamp
+    return tuple_(timestamp_column, id_column) > tuple_(after_timestamp, after_id)
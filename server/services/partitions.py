@@ -0,0 +1,95 @@
+"""
+Monthly range partitions for the time-series tables.
+
+location_points and sensor_readings are partitioned by timestamp into one
+partition per calendar month, named <table>_yYYYYmMM, plus a <table>_default
+partition that catches anything outside them (e.g. a device with a wrong
+clock). Retention drops whole partitions instead of deleting rows.
+"""
+import re
+from datetime import date
+
+from sqlalchemy import Connection, text
+
+PARTITIONED_TABLES = ("location_points", "sensor_readings")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def _check_table(table: str) -> None:
+    # Names are interpolated into DDL, so only known tables are accepted
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"{table} is not a partitioned table")
+
+
+def monthly_partitions(conn: Connection, table: str) -> dict[date, str]:
+    """Existing monthly partitions of a table, keyed by month."""
+    _check_table(table)
+    pattern = re.compile(rf"^{table}_y(\d{{4}})m(\d{{2}})$")
+    names = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    ).scalars()
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(conn: Connection, table: str, month: date) -> str:
+    """
+    Create and attach the partition for one month.
+
+    Rows that already landed in the default partition for that month are
+    moved into the new partition, otherwise attaching it would fail.
+    """
+    _check_table(table)
+    name = partition_name(table, month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS ("
+        f"DELETE FROM {table}_default WHERE timestamp >= '{lower}' AND timestamp < '{upper}' RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    ))
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    return name
+
+
+def ensure_partitions(conn: Connection, table: str, first_month: date, last_month: date) -> list[str]:
+    """Create any missing monthly partitions from first_month to last_month inclusive."""
+    existing = monthly_partitions(conn, table)
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            created.append(create_partition(conn, table, month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partitions_before(conn: Connection, table: str, cutoff_month: date) -> list[str]:
+    """Detach and drop every monthly partition that ends on or before cutoff_month."""
+    dropped = []
+    for month, name in sorted(monthly_partitions(conn, table).items()):
+        if add_months(month, 1) <= cutoff_month:
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
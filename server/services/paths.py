@@ -0,0 +1,62 @@
+"""
+Server-side computation of recording paths.
+
+The path is built by PostGIS from the stored location points
+(ST_MakeLine ordered by timestamp), so no points are loaded into Python.
+"""
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.recording import LocationPoint, RecordingSession, RecordingStatus
+
+
+def computed_path_expression() -> Any:
+    """
+    Correlated expression for a session's path, for use in UPDATE ... SET.
+
+    Evaluates to the LINESTRING through the session's points in timestamp order,
+    or to the current computed_path when the session has fewer than two points.
+    """
+    path = (
+        select(func.ST_MakeLine(aggregate_order_by(LocationPoint.point, LocationPoint.timestamp)))
+        .where(LocationPoint.session_id == RecordingSession.id)
+        .having(func.count(LocationPoint.point) >= 2)
+        .scalar_subquery()
+    )
+    return func.coalesce(path, RecordingSession.computed_path)
+
+
+async def update_computed_path(db: AsyncSession, session_id: int) -> None:
+    """Recompute a single session's path in one UPDATE. Does not commit."""
+    await db.execute(
+        update(RecordingSession)
+        .where(RecordingSession.id == session_id)
+        .values(computed_path=computed_path_expression())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def abandon_stale_sessions(db: AsyncSession, cutoff: datetime) -> list[int]:
+    """
+    Mark every in-progress session idle since before `cutoff` as ABANDONED.
+
+    Paths are computed and ended_at set to last_activity_at in the same
+    set-based UPDATE. Does not commit. Returns the ids of abandoned sessions.
+    """
+    result = await db.execute(
+        update(RecordingSession)
+        .where(RecordingSession.status == RecordingStatus.IN_PROGRESS)
+        .where(RecordingSession.last_activity_at < cutoff)
+        .values(
+            status=RecordingStatus.ABANDONED,
+            ended_at=RecordingSession.last_activity_at,
+            computed_path=computed_path_expression(),
+        )
+        .returning(RecordingSession.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result.scalars())
@@ -0,0 +1,96 @@
+"""
+Google encoded polyline output for paths.
+
+Format: https://developers.google.com/maps/documentation/utilities/polylinealgorithm
+Coordinates are read straight out of the (E)WKB that PostGIS returns and
+encoded in the same pass, without building shapely geometries or lists of
+floats. At the default 5 decimals (~1 m) a vertex takes 4-8 characters
+instead of ~40 bytes of JSON.
+"""
+import struct
+from enum import Enum
+from typing import Any, Optional
+
+POLYLINE_PRECISION = 5
+
+_LINESTRING = 2
+_EWKB_Z = 0x80000000
+_EWKB_M = 0x40000000
+_EWKB_SRID = 0x20000000
+
+
+class PathFormat(str, Enum):
+    """How paths are written in responses."""
+    COORDINATES = "coordinates"
+    POLYLINE = "polyline"
+
+
+def _append_value(value: int, out: list[str]) -> None:
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def _linestring_layout(data: bytes) -> tuple[str, int, int, int]:
+    """Byte order, dimensions, point count and offset of the first coordinate."""
+    byte_order = "<" if data[0] == 1 else ">"
+    (geometry_type,) = struct.unpack_from(f"{byte_order}I", data, 1)
+    offset = 5
+    if geometry_type & _EWKB_SRID:
+        offset += 4
+    dimensions = 2 + bool(geometry_type & _EWKB_Z) + bool(geometry_type & _EWKB_M)
+    geometry_type &= 0x0FFFFFFF
+    # ISO WKB spells Z, M and ZM as 1000, 2000 and 3000 added to the type
+    if geometry_type >= 1000:
+        dimensions = 2 + {1: 1, 2: 1, 3: 2}[geometry_type // 1000]
+        geometry_type %= 1000
+    if geometry_type != _LINESTRING:
+        raise ValueError(f"Expected a LINESTRING, got WKB geometry type {geometry_type}")
+    (count,) = struct.unpack_from(f"{byte_order}I", data, offset)
+    return byte_order, dimensions, count, offset + 4
+
+
+def encode_wkb_polyline(data: bytes, precision: int = POLYLINE_PRECISION) -> str:
+    """Encode a WKB or EWKB LINESTRING; Z and M values are dropped."""
+    byte_order, dimensions, count, offset = _linestring_layout(data)
+    factor = 10 ** precision
+    out: list[str] = []
+    previous_lat = previous_lon = 0
+    coordinates = memoryview(data)[offset:offset + count * dimensions * 8]
+    for values in struct.iter_unpack(f"{byte_order}{dimensions}d", coordinates):
+        lat = round(values[1] * factor)
+        lon = round(values[0] * factor)
+        _append_value(lat - previous_lat, out)
+        _append_value(lon - previous_lon, out)
+        previous_lat, previous_lon = lat, lon
+    return "".join(out)
+
+
+def path_polyline(path: Any, precision: int = POLYLINE_PRECISION) -> Optional[str]:
+    """Encode a geometry loaded by GeoAlchemy (a WKBElement), or None."""
+    if path is None:
+        return None
+    return encode_wkb_polyline(bytes(path.data), precision)
+
+
+def decode_polyline(encoded: str, precision: int = POLYLINE_PRECISION) -> list[list[float]]:
+    """Decode to [longitude, latitude] pairs, the same order as LineRead.path."""
+    factor = 10 ** precision
+    coordinates: list[list[float]] = []
+    values: list[int] = []
+    shift = result = 0
+    for char in encoded:
+        byte = ord(char) - 63
+        result |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(result >> 1) if result & 1 else result >> 1)
+            shift = result = 0
+    lat = lon = 0
+    for i in range(0, len(values) - 1, 2):
+        lat += values[i]
+        lon += values[i + 1]
+        coordinates.append([lon / factor, lat / factor])
+    return coordinates
@@ -0,0 +1,118 @@
+"""
+Index-assisted spatial queries over transit lines.
+
+Distances are measured on geography(path), which matches the expression
+of the idx_lines_path_geography GiST index. Wrapping the column in any
+other function (e.g. ST_Transform) would force a sequential scan.
+
+Viewport queries compare the path itself against an envelope, which the
+geometry GiST index on lines.path (idx_lines_path) serves.
+
+Simplified paths are precomputed per level of detail (see models.line);
+path_column picks one and lines_with_path reads it instead of the full path.
+"""
+from typing import Any, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import defer
+
+from models.line import PATH_TOLERANCES, Line, LineDetail, LineStatus
+
+# Rough conversion used to compare tolerances asked for in meters
+METERS_PER_DEGREE = 111_320
+
+
+def geography(expression: Any) -> Any:
+    """geometry -> geography, spelled the same way as the functional index."""
+    return func.geography(expression)
+
+
+def point_geometry(longitude: float, latitude: float) -> Any:
+    """A WGS84 point as geometry."""
+    return func.ST_SetSRID(func.ST_MakePoint(longitude, latitude), 4326)
+
+
+def point_geography(longitude: float, latitude: float) -> Any:
+    """A WGS84 point as geography."""
+    return geography(point_geometry(longitude, latitude))
+
+
+def lines_nearby_query(longitude: float, latitude: float, radius_meters: float) -> Select:
+    """Lines whose path passes within radius_meters of a point."""
+    return select(Line).where(
+        func.ST_DWithin(geography(Line.path), point_geography(longitude, latitude), radius_meters)
+    )
+
+
+def nearest_lines_query(
+    longitude: float,
+    latitude: float,
+    max_radius_meters: float,
+    limit: int,
+    status: Optional[LineStatus] = None,
+) -> Select:
+    """
+    Rows of (Line, distance_meters, closest_lon, closest_lat) for the `limit`
+    lines nearest to a point within max_radius_meters, nearest first.
+    """
+    target = point_geography(longitude, latitude)
+    path = geography(Line.path)
+    # ORDER BY <-> walks the geography index nearest-first (KNN) and stops
+    # after `limit` lines, instead of measuring every line in the radius
+    nearest = select(Line.id).where(func.ST_DWithin(path, target, max_radius_meters))
+    if status is not None:
+        nearest = nearest.where(Line.status == status)
+    nearest = nearest.order_by(path.op("<->")(target)).limit(limit).subquery()
+    # <-> measures on a sphere; order the few survivors by spheroid distance,
+    # and take the closest point on the same spheroid (geography
+    # ST_ClosestPoint, PostGIS 3.4+) so it lies distance_meters away
+    distance = func.ST_Distance(path, target)
+    closest = func.geometry(func.ST_ClosestPoint(path, target))
+    return (
+        select(Line, distance.label("distance_meters"), func.ST_X(closest), func.ST_Y(closest))
+        .join(nearest, nearest.c.id == Line.id)
+        .order_by(distance, Line.id)
+    )
+
+
+def envelope(min_lon: float, min_lat: float, max_lon: float, max_lat: float) -> Any:
+    """A WGS84 bounding box as a geometry."""
+    return func.ST_MakeEnvelope(min_lon, min_lat, max_lon, max_lat, 4326)
+
+
+def detail_for_tolerance(tolerance_meters: float) -> LineDetail:
+    """The coarsest precomputed path whose tolerance does not exceed tolerance_meters."""
+    best = LineDetail.FULL
+    # PATH_TOLERANCES runs from finest to coarsest
+    for detail, degrees in PATH_TOLERANCES.items():
+        if degrees * METERS_PER_DEGREE <= tolerance_meters:
+            best = detail
+    return best
+
+
+def path_column(detail: LineDetail) -> Any:
+    """The lines table column holding the path at a level of detail."""
+    name = "path" if detail is LineDetail.FULL else f"path_{detail.value}"
+    return Line.__table__.c[name]
+
+
+def lines_with_path(detail: LineDetail) -> Select:
+    """Rows of (Line, detail_path); the mapped full path is never loaded."""
+    return select(Line, path_column(detail).label("detail_path")).options(defer(Line.path))
+
+
+def viewport_detail(min_lon: float, max_lon: float, pixels: int) -> LineDetail:
+    """The coarsest path that stays within one pixel of a viewport `pixels` wide."""
+    return detail_for_tolerance((max_lon - min_lon) * METERS_PER_DEGREE / pixels)
+
+
+def lines_in_bbox_query(
+    min_lon: float, min_lat: float, max_lon: float, max_lat: float, detail: LineDetail
+) -> Select:
+    """(Line, detail_path) rows whose path intersects a bounding box, by id."""
+    # ST_Intersects adds an index-assisted && on the bounding boxes itself
+    return (
+        lines_with_path(detail)
+        .where(func.ST_Intersects(Line.path, envelope(min_lon, min_lat, max_lon, max_lat)))
+        .order_by(Line.id)
+    )
@@ -0,0 +1,100 @@
+"""
+Mapbox vector tiles of lines, built by PostGIS.
+
+Tiles are selected through the GiST index on lines.path and drawn from the
+simplified path that matches the tile's resolution (see services.spatial),
+so a zoomed-out tile never transforms full GPS traces.
+
+Rendered tiles are kept in a per-worker TileCache keyed by (z, x, y,
+status). A trigger on lines NOTIFYs the bounding box of every change to a
+line's path, name or status (old and new position), and the listener drops
+only the cached tiles that overlap it.
+"""
+import math
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.line import LineStatus
+from services.cache import ResponseCache
+from services.notifications import Bounds
+from services.spatial import detail_for_tolerance, path_column
+from settings import cache_settings
+
+MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+MAX_ZOOM = 22
+
+# Tile coordinate space and the clipping margin around it, in tile units
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Web Mercator circumference at the equator, in meters
+_EARTH_CIRCUMFERENCE = 40_075_016.686
+
+_LINE_TILE = """
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(:z, :x, :y) AS tile,
+               ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS area
+    ),
+    features AS (
+        SELECT ST_AsMVTGeom(ST_Transform({path}, 3857), bounds.tile, :extent, :buffer) AS geom,
+               id, name, lower(CAST(status AS text)) AS status
+        FROM lines, bounds
+        WHERE path && bounds.area{status_filter}
+    )
+    SELECT coalesce(ST_AsMVT(features, 'lines', :extent, 'geom', 'id'), '')
+    FROM features
+"""
+
+
+def tile_bounds(z: int, x: int, y: int) -> Bounds:
+    """Longitude/latitude box of a tile, widened by the clipping buffer."""
+    n = 2 ** z
+    margin = TILE_BUFFER / TILE_EXTENT
+
+    def lon(tx: float) -> float:
+        return tx / n * 360.0 - 180.0
+
+    def lat(ty: float) -> float:
+        ty = min(max(ty, 0.0), float(n))
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lon(x - margin), lat(y + 1 + margin), lon(x + 1 + margin), lat(y - margin)
+
+
+def _overlaps(a: Bounds, b: Bounds) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class TileCache(ResponseCache):
+    """ResponseCache of tiles keyed by (z, x, y, ...), invalidated by area."""
+
+    def invalidate(self, area: Optional[Bounds] = None) -> None:
+        """Drop tiles overlapping `area`, or every tile if area is None."""
+        if area is None:
+            self._drop(lambda key: True)
+        else:
+            self._drop(lambda key: _overlaps(tile_bounds(*key[:3]), area))
+
+
+async def line_tile(db: AsyncSession, z: int, x: int, y: int, status: Optional[LineStatus] = None) -> bytes:
+    """One tile of lines as MVT bytes, optionally filtered by status."""
+    meters_per_unit = _EARTH_CIRCUMFERENCE / (2 ** z * TILE_EXTENT)
+    params: dict = {
+        "z": z, "x": x, "y": y,
+        "extent": TILE_EXTENT, "buffer": TILE_BUFFER, "margin": TILE_BUFFER / TILE_EXTENT,
+    }
+    status_filter = ""
+    if status is not None:
+        status_filter = " AND status = CAST(:status AS linestatus)"
+        params["status"] = status.name
+    sql = _LINE_TILE.format(
+        path=path_column(detail_for_tolerance(meters_per_unit)).name,
+        status_filter=status_filter,
+    )
+    return bytes((await db.execute(text(sql), params)).scalar_one())
+
+
+# Rendered tiles for this worker
+tile_cache = TileCache(cache_settings.tile_cache_max_entries)
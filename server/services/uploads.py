@@ -0,0 +1,77 @@
+"""
+Idempotent, resumable batch uploads.
+
+Location inserts already skip points whose (session_id, timestamp) is
+stored (see services.ingest), so a retried location batch never duplicates
+data. Sensor readings cannot be keyed that way, since two sensors may
+sample at the same millisecond. A client may tag each batch with an
+Idempotency-Key header: the outcome of the first attempt is stored in
+upload_batches, and a retry gets it back without the batch being inserted
+again. This is what makes sensor retries safe.
+
+upload_state reports the last stored timestamp per stream, so a client
+whose sync was interrupted can send only what came after it.
+"""
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.recording import (
+    LocationPoint,
+    RecordingSession,
+    SensorReading,
+    UploadBatch,
+    UploadState,
+    UploadStream,
+)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Set on responses replayed from an earlier attempt
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def find_upload_batch(
+    db: AsyncSession, session_id: int, stream: UploadStream, key: str
+) -> Optional[UploadBatch]:
+    """The batch already accepted under an idempotency key, if any."""
+    return await db.get(UploadBatch, (session_id, stream, key))
+
+
+async def record_upload_batch(db: AsyncSession, batch: UploadBatch) -> bool:
+    """
+    Store an accepted batch under its idempotency key.
+
+    Returns False if another request stored the same key first; the caller
+    should then roll back and replay that request's outcome.
+    """
+    statement = insert(UploadBatch).values(**batch.model_dump()).on_conflict_do_nothing()
+    return (await db.execute(statement)).rowcount == 1
+
+
+def batch_summary(batch: UploadBatch) -> dict:
+    """Response body of a batch upload."""
+    return {
+        "added": batch.added,
+        "duplicates": batch.duplicates,
+        "session_id": batch.session_id,
+        "first_timestamp": batch.first_timestamp.isoformat(),
+        "last_timestamp": batch.last_timestamp.isoformat(),
+    }
+
+
+async def upload_state(db: AsyncSession, session: RecordingSession) -> UploadState:
+    """Last stored timestamp of each stream; one index probe per stream."""
+    def last_timestamp(model: type[LocationPoint] | type[SensorReading]):
+        return select(func.max(model.timestamp)).where(model.session_id == session.id).scalar_subquery()
+
+    last_location, last_sensor = (await db.execute(
+        select(last_timestamp(LocationPoint), last_timestamp(SensorReading))
+    )).one()
+    return UploadState(
+        session_id=session.id,
+        status=session.status,
+        last_location_timestamp=last_location,
+        last_sensor_timestamp=last_sensor,
+    )
@@ -0,0 +1,149 @@
+"""
+Application settings read from environment variables.
+
+Database variables:
+    DATABASE_URL               SQLAlchemy URL (psycopg2 form; the asyncpg URL is derived from it)
+    DB_ECHO                    log every SQL statement (default: false)
+    DB_POOL_SIZE               connections kept open per engine (default: 5)
+    DB_MAX_OVERFLOW            extra connections allowed under load (default: 10)
+    DB_POOL_PRE_PING           test connections before handing them out (default: true)
+    DB_POOL_RECYCLE            seconds before a connection is replaced, -1 to disable (default: 1800)
+    DB_STATEMENT_TIMEOUT_MS    server-side statement timeout, 0 to disable (default: 0)
+    DB_PGBOUNCER               connecting through PgBouncer in transaction mode (default: false)
+    DB_LISTEN_URL              direct server URL for the LISTEN connection (default: DATABASE_URL)
+
+Cache variables:
+    LINE_CACHE_MAX_ENTRIES     serialized line responses kept per worker, 0 to disable (default: 256)
+    TILE_CACHE_MAX_ENTRIES     vector tiles kept per worker, 0 to disable (default: 1024)
+    ACTIVE_SESSION_TTL_MS      how long an in-progress session is trusted without a lookup, 0 to disable (default: 5000)
+
+Compression variables:
+    MAX_DECOMPRESSED_BODY_BYTES     limit on a gzip/zstd request body once decompressed (default: 64 MiB)
+    RESPONSE_COMPRESSION_MIN_BYTES  smallest response body that is compressed (default: 1024)
+    RESPONSE_GZIP_LEVEL             gzip level for responses, 1-9 (default: 6)
+    RESPONSE_ZSTD_LEVEL             zstd level for responses, 1-22 (default: 3)
+
+Ingest buffer variables (single-row location and sensor uploads):
+    INGEST_FLUSH_ROWS          rows written per bulk insert (default: 500)
+    INGEST_FLUSH_MS            longest a row waits for its insert, in milliseconds (default: 50)
+    INGEST_MAX_PENDING         rows queued before uploads wait (default: 10000)
+    INGEST_ENQUEUE_TIMEOUT_MS  how long an upload waits for room before a 503 (default: 1000)
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off", ""}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    value = value.strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(f"{name} must be a boolean, got {value!r}")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Connection and pool configuration shared by the sync and async engines."""
+
+    url: str
+    echo: bool = False
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    statement_timeout_ms: int = 0
+    pgbouncer: bool = False
+    listen_url: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        return cls(
+            url=os.getenv("DATABASE_URL", "postgresql://sofi@localhost:5432/cbba_mobility"),
+            echo=_env_bool("DB_ECHO", cls.echo),
+            pool_size=_env_int("DB_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", cls.max_overflow),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", cls.pool_pre_ping),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", cls.pool_recycle),
+            statement_timeout_ms=_env_int("DB_STATEMENT_TIMEOUT_MS", cls.statement_timeout_ms),
+            pgbouncer=_env_bool("DB_PGBOUNCER", cls.pgbouncer),
+            listen_url=os.getenv("DB_LISTEN_URL") or None,
+        )
+
+
+@dataclass(frozen=True)
+class CacheSettings:
+    """Sizes of the in-process response caches."""
+
+    line_cache_max_entries: int = 256
+    tile_cache_max_entries: int = 1024
+    active_session_ttl_ms: int = 5000
+
+    @classmethod
+    def from_env(cls) -> "CacheSettings":
+        return cls(
+            line_cache_max_entries=_env_int("LINE_CACHE_MAX_ENTRIES", cls.line_cache_max_entries),
+            tile_cache_max_entries=_env_int("TILE_CACHE_MAX_ENTRIES", cls.tile_cache_max_entries),
+            active_session_ttl_ms=_env_int("ACTIVE_SESSION_TTL_MS", cls.active_session_ttl_ms),
+        )
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    """Request body decompression limit and response compression levels."""
+
+    max_decompressed_body_bytes: int = 64 * 1024 * 1024
+    response_min_bytes: int = 1024
+    response_gzip_level: int = 6
+    response_zstd_level: int = 3
+
+    @classmethod
+    def from_env(cls) -> "CompressionSettings":
+        return cls(
+            max_decompressed_body_bytes=_env_int("MAX_DECOMPRESSED_BODY_BYTES", cls.max_decompressed_body_bytes),
+            response_min_bytes=_env_int("RESPONSE_COMPRESSION_MIN_BYTES", cls.response_min_bytes),
+            response_gzip_level=_env_int("RESPONSE_GZIP_LEVEL", cls.response_gzip_level),
+            response_zstd_level=_env_int("RESPONSE_ZSTD_LEVEL", cls.response_zstd_level),
+        )
+
+
+@dataclass(frozen=True)
+class IngestSettings:
+    """Batching and queue limits of the write-behind ingest buffer."""
+
+    flush_rows: int = 500
+    flush_ms: int = 50
+    max_pending: int = 10000
+    enqueue_timeout_ms: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "IngestSettings":
+        return cls(
+            flush_rows=_env_int("INGEST_FLUSH_ROWS", cls.flush_rows),
+            flush_ms=_env_int("INGEST_FLUSH_MS", cls.flush_ms),
+            max_pending=_env_int("INGEST_MAX_PENDING", cls.max_pending),
+            enqueue_timeout_ms=_env_int("INGEST_ENQUEUE_TIMEOUT_MS", cls.enqueue_timeout_ms),
+        )
+
+
+database_settings = DatabaseSettings.from_env()
+cache_settings = CacheSettings.from_env()
+compression_settings = CompressionSettings.from_env()
+ingest_settings = IngestSettings.from_env()
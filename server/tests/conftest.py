@@ -2,6 +2,10 @@
 Pytest fixtures for testing the Open Transit API.
 
 Uses a separate test database to avoid affecting development data.
+
+The API runs on asyncpg sessions while tests arrange and inspect data through
+a synchronous session, so the two cannot share a transaction. Test data is
+committed for real and every table is truncated after each test instead.
 """
 import os
 from datetime import datetime
@@ -9,8 +13,10 @@ from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlmodel import SQLModel
 
 # Get test database URL (use TEST_DATABASE_URL env var or fallback to default)
@@ -22,10 +28,12 @@ TEST_DATABASE_URL = os.getenv(
 # Override DATABASE_URL so app modules use the test database
 os.environ["DATABASE_URL"] = TEST_DATABASE_URL
 
-from database import get_db
+from database import get_async_db
 from main import app
 from models.line import Line, LineStatus
 from models.recording import RecordingSession, RecordingStatus
+from services.cache import active_sessions, line_cache
+from services.tiles import tile_cache
 
 
 def _create_test_database_if_not_exists():
@@ -58,6 +66,20 @@ _create_test_database_if_not_exists()
 test_engine = create_engine(TEST_DATABASE_URL, echo=False)
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# NullPool: each TestClient runs its own event loop, and asyncpg connections
+# cannot be reused across loops
+test_async_engine = create_async_engine(
+    make_url(TEST_DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    echo=False,
+    poolclass=NullPool,
+)
+TestAsyncSessionLocal = async_sessionmaker(
+    bind=test_async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_database():
@@ -76,28 +98,29 @@ def setup_test_database():
 
 @pytest.fixture
 def db() -> Generator[Session, None, None]:
-    """Get a test database session that rolls back after each test."""
-    connection = test_engine.connect()
-    transaction = connection.begin()
-    session = TestSessionLocal(bind=connection)
+    """Get a test database session; all tables are emptied after each test."""
+    session = TestSessionLocal()
     
     yield session
     
     session.close()
-    transaction.rollback()
-    connection.close()
+    tables = ", ".join(f'"{t.name}"' for t in SQLModel.metadata.sorted_tables)
+    with test_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    # Ids restart, so cached responses and session states from this test would be wrong in the next
+    line_cache.invalidate()
+    tile_cache.invalidate()
+    active_sessions.discard()
 
 
 @pytest.fixture
 def client(db: Session) -> Generator[TestClient, None, None]:
     """Get a test client with database dependency overridden."""
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            pass
+    async def override_get_async_db():
+        async with TestAsyncSessionLocal() as session:
+            yield session
     
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,186 @@
+"""Tests for the in-process response cache."""
+import asyncio
+
+import asyncpg
+
+from services.cache import ActiveSessionCache, ResponseCache
+from services.notifications import LINE_AREAS_CHANNEL, LINE_CHANGES_CHANNEL, LineChangeListener
+from services.tiles import TileCache, tile_bounds
+
+
+class TestResponseCache:
+    """Tests for ResponseCache"""
+
+    def test_evicts_least_recently_used(self):
+        """Should evict the entry that was used longest ago."""
+        cache = ResponseCache(max_entries=2)
+        cache.put((1, "line"), b"one", cache.generation)
+        cache.put((2, "line"), b"two", cache.generation)
+        cache.get((1, "line"))
+
+        cache.put((3, "line"), b"three", cache.generation)
+
+        assert cache.get((2, "line")) is None
+        assert cache.get((1, "line")) == b"one"
+        assert cache.stats()["evictions"] == 1
+
+    def test_counts_hits_and_misses(self):
+        """Should count every lookup."""
+        cache = ResponseCache(max_entries=4)
+        cache.get((1, "line"))
+        cache.put((1, "line"), b"one", cache.generation)
+        cache.get((1, "line"))
+
+        stats = cache.stats()
+
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_invalidate_line_keeps_other_lines(self):
+        """Should drop the line's entries and collection entries only."""
+        cache = ResponseCache(max_entries=4)
+        cache.put((1, "line"), b"one", cache.generation)
+        cache.put((2, "line"), b"two", cache.generation)
+        cache.put((None, "list", None, 0, 100), b"[]", cache.generation)
+
+        cache.invalidate(1)
+
+        assert cache.get((1, "line")) is None
+        assert cache.get((None, "list", None, 0, 100)) is None
+        assert cache.get((2, "line")) == b"two"
+
+    def test_put_after_invalidation_is_dropped(self):
+        """Should not store a body that was read before a concurrent invalidation."""
+        cache = ResponseCache(max_entries=4)
+        generation = cache.generation
+
+        cache.invalidate(1)
+
+        assert cache.put((1, "line"), b"stale", generation) is False
+        assert len(cache) == 0
+
+    def test_disabled(self):
+        """Should store nothing when max_entries is 0."""
+        cache = ResponseCache(max_entries=0)
+
+        cache.put((1, "line"), b"one", cache.generation)
+
+        assert len(cache) == 0
+
+
+class TestActiveSessionCache:
+    """Tests for ActiveSessionCache"""
+
+    def test_expires_after_ttl(self, monkeypatch):
+        """Should trust a session only until its entry expires."""
+        now = [1000.0]
+        monkeypatch.setattr("services.cache.time.monotonic", lambda: now[0])
+        cache = ActiveSessionCache(ttl_ms=5000)
+        cache.add(1)
+
+        assert 1 in cache
+        now[0] += 6
+        assert 1 not in cache
+        assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+    def test_discard(self):
+        """Should forget one session, or every session."""
+        cache = ActiveSessionCache(ttl_ms=5000)
+        cache.add(1)
+        cache.add(2)
+
+        cache.discard(1)
+        assert 1 not in cache
+        assert 2 in cache
+        cache.discard()
+        assert 2 not in cache
+
+    def test_bounded_and_disabled(self):
+        """Should keep at most max_entries sessions, and none with a zero TTL."""
+        cache = ActiveSessionCache(ttl_ms=5000, max_entries=2)
+        for session_id in (1, 2, 3):
+            cache.add(session_id)
+        disabled = ActiveSessionCache(ttl_ms=0)
+        disabled.add(1)
+
+        assert 1 not in cache
+        assert 3 in cache
+        assert 1 not in disabled
+
+
+class TestTileCache:
+    """Tests for TileCache"""
+
+    def test_tile_bounds(self):
+        """Should cover the whole map at zoom 0, plus the clipping buffer."""
+        min_lon, min_lat, max_lon, max_lat = tile_bounds(0, 0, 0)
+
+        assert min_lon < -180 and max_lon > 180
+        assert round(max_lat, 4) == 85.0511 and round(min_lat, 4) == -85.0511
+
+    def test_invalidate_area(self):
+        """Should drop only the tiles that overlap the changed area."""
+        cache = TileCache(max_entries=8)
+        # Zoom 1: x=0 is the western half, y=1 the southern half
+        for x in (0, 1):
+            cache.put((1, x, 1, None), b"tile", cache.generation)
+
+        cache.invalidate((-66.2, -17.4, -66.1, -17.3))
+
+        assert cache.get((1, 0, 1, None)) is None
+        assert cache.get((1, 1, 1, None)) == b"tile"
+
+
+class TestLineChangeListener:
+    """Tests for notification handling"""
+
+    def test_payload_is_line_id(self):
+        """Should pass the line id on, or None for an unexpected payload."""
+        changes = []
+        listener = LineChangeListener("postgresql://unused", changes.append)
+
+        listener._on_notification(None, 1, LINE_CHANGES_CHANNEL, "42")
+        listener._on_notification(None, 1, LINE_CHANGES_CHANNEL, "")
+
+        assert changes == [42, None]
+
+    def test_area_payload(self):
+        """Should parse the bounding box sent by the trigger."""
+        areas = []
+        listener = LineChangeListener("postgresql://unused", lambda line_id: None, areas.append)
+
+        listener._on_area_notification(None, 1, LINE_AREAS_CHANNEL, "-66.2,-17.4,-66.1,-17.3")
+        listener._on_area_notification(None, 1, LINE_AREAS_CHANNEL, "garbage")
+
+        assert areas == [(-66.2, -17.4, -66.1, -17.3), None]
+
+    def test_reconnect_survives_unexpected_errors(self, monkeypatch):
+        """Should keep retrying, closing half-open connections, until a reconnect succeeds."""
+        changes = []
+        listener = LineChangeListener("postgresql://unused", changes.append, retry_seconds=0)
+        attempts = []
+        connected = asyncio.Event()
+
+        async def connect():
+            attempts.append(len(attempts))
+            if len(attempts) < 3:
+                listener._conn = None
+                raise asyncpg.InterfaceError("add_listener on a closed connection")
+            connected.set()
+
+        async def lost_once():
+            if connected.is_set():
+                await asyncio.Event().wait()
+
+        monkeypatch.setattr(listener, "_connect", connect)
+        monkeypatch.setattr(listener, "_wait_until_lost", lost_once)
+
+        async def run():
+            task = asyncio.create_task(listener._run())
+            await asyncio.wait_for(connected.wait(), timeout=5)
+            assert not task.done()
+            task.cancel()
+
+        asyncio.run(run())
+
+        assert len(attempts) == 3
+        assert changes == [None, None]
@@ -0,0 +1,137 @@
+"""Tests for the packed columnar batch format."""
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services.columnar import (
+    ColumnarFormatError,
+    decode_location_batch,
+    decode_sensor_batch,
+    encode_location_batch,
+    encode_sensor_batch,
+)
+from services.ingest import LOCATION_COLUMNS, SENSOR_COLUMNS
+
+
+def _location_columns(count: int = 3) -> dict[str, list]:
+    start = datetime(2026, 3, 1, 7, 30, 0, 250000)
+    return {
+        "timestamp": [start + timedelta(seconds=i) for i in range(count)],
+        "latitude": [-17.39 + i * 1e-4 for i in range(count)],
+        "longitude": [-66.15 - i * 1e-4 for i in range(count)],
+        "altitude": [2558.0, None, 2559.5][:count],
+        "speed": [None] * count,
+        "bearing": [0.0, 180.0, 359.99][:count],
+        "horizontal_accuracy": [4.0] * count,
+        "vertical_accuracy": [None] * count,
+    }
+
+
+class TestRoundTrip:
+    """Encoding then decoding must return the original columns."""
+
+    def test_location_round_trip(self):
+        """Should preserve values, missing channels and optional NULLs."""
+        columns = _location_columns()
+
+        decoded = decode_location_batch(encode_location_batch(columns))
+
+        assert list(decoded) == list(LOCATION_COLUMNS)
+        assert decoded == columns
+
+    def test_sensor_round_trip(self):
+        """Should preserve sensor channels and normalize timestamps to naive UTC."""
+        columns = {
+            "timestamp": [
+                datetime(2026, 3, 1, 11, 0, tzinfo=timezone.utc),
+                datetime(2026, 3, 1, 7, 0, 0, 20000, tzinfo=timezone(timedelta(hours=-4))),
+            ],
+            "accel_x": [0.1, -0.2],
+            "gyro_z": [None, 0.03],
+            "magnetic_heading": [12.5, 359.0],
+        }
+
+        decoded = decode_sensor_batch(encode_sensor_batch(columns))
+
+        assert list(decoded) == list(SENSOR_COLUMNS)
+        assert decoded["timestamp"] == [
+            datetime(2026, 3, 1, 11, 0),
+            datetime(2026, 3, 1, 11, 0, 0, 20000),
+        ]
+        assert decoded["accel_x"] == [0.1, -0.2]
+        assert decoded["gyro_z"] == [None, 0.03]
+        assert decoded["magnetic_heading"] == [12.5, 359.0]
+        assert decoded["pressure"] == [None, None]
+
+    def test_empty_batch(self):
+        """Should round-trip a batch with no rows."""
+        decoded = decode_location_batch(encode_location_batch(_location_columns(0)))
+
+        assert decoded["timestamp"] == []
+
+
+class TestValidation:
+    """Decoding must reject malformed or out-of-range batches."""
+
+    @pytest.mark.parametrize("column,value", [
+        ("latitude", 90.5),
+        ("longitude", -180.5),
+        ("bearing", 360.0),
+        ("bearing", -1.0),
+    ])
+    def test_location_out_of_range(self, column: str, value: float):
+        """Should reject values outside the API field constraints."""
+        columns = _location_columns()
+        columns[column][1] = value
+
+        with pytest.raises(ColumnarFormatError, match=column):
+            decode_location_batch(encode_location_batch(columns))
+
+    def test_magnetic_heading_out_of_range(self):
+        """Should reject a magnetic heading of 360 degrees."""
+        body = encode_sensor_batch({
+            "timestamp": [datetime(2026, 3, 1)],
+            "magnetic_heading": [360.0],
+        })
+
+        with pytest.raises(ColumnarFormatError, match="magnetic_heading"):
+            decode_sensor_batch(body)
+
+    @pytest.mark.parametrize("microseconds", [-2**63, 2**62])
+    def test_timestamp_out_of_range(self, microseconds: int):
+        """Should reject timestamps a datetime cannot hold."""
+        body = bytearray(encode_sensor_batch({"timestamp": [datetime(2026, 3, 1)] * 2}))
+        struct.pack_into("<q", body, 16 + 8, microseconds)
+
+        with pytest.raises(ColumnarFormatError, match="timestamp out of range at row 1"):
+            decode_sensor_batch(bytes(body))
+
+    def test_missing_required_channel(self):
+        """Should require latitude and longitude for location batches."""
+        columns = _location_columns()
+        columns["latitude"] = [None] * 3
+
+        with pytest.raises(ColumnarFormatError, match="latitude"):
+            decode_location_batch(encode_location_batch(columns))
+
+    def test_truncated_body(self):
+        """Should reject a body whose length does not match the header."""
+        body = encode_location_batch(_location_columns())
+
+        with pytest.raises(ColumnarFormatError, match="bytes"):
+            decode_location_batch(body[:-8])
+
+    def test_wrong_stream_kind(self):
+        """Should reject a location batch sent to the sensor decoder."""
+        body = encode_location_batch(_location_columns())
+
+        with pytest.raises(ColumnarFormatError, match="kind"):
+            decode_sensor_batch(body)
+
+    def test_bad_magic(self):
+        """Should reject bodies that are not columnar batches."""
+        body = struct.pack("<4sHHII", b"JSON", 1, 1, 0, 0)
+
+        with pytest.raises(ColumnarFormatError, match="magic"):
+            decode_location_batch(body)
@@ -0,0 +1,196 @@
+"""Tests for compressed request and response bodies."""
+import gzip
+from typing import Optional
+
+import pytest
+import zstandard
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from middleware import RequestDecompressionMiddleware, ResponseCompressionMiddleware
+from services.compression import (
+    BodyDecoder,
+    BodyTooLarge,
+    InvalidCompressedBody,
+    UnsupportedContentEncoding,
+    content_encoding,
+    response_encoding,
+)
+
+BODY = b'{"points": []}' * 1000
+
+
+def _decode(body: bytes, encoding: str, max_size: int = 1 << 20, chunk_size: int = 1000) -> bytes:
+    decoder = BodyDecoder(encoding, max_size)
+    decoded = b"".join(decoder.decode(body[start:start + chunk_size]) for start in range(0, len(body), chunk_size))
+    decoder.finish()
+    return decoded
+
+
+def _zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor().compress(data)
+
+
+class TestBodyDecoder:
+    """Tests for BodyDecoder"""
+
+    @pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", _zstd)])
+    def test_round_trip(self, encoding: str, compress):
+        """Should return the original body for every supported encoding."""
+        assert _decode(compress(BODY), encoding) == BODY
+
+    @pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", _zstd)])
+    def test_size_limit(self, encoding: str, compress):
+        """Should stop at the limit on the decompressed size."""
+        with pytest.raises(BodyTooLarge):
+            _decode(compress(BODY), encoding, max_size=len(BODY) - 1)
+
+    def test_compression_bomb(self):
+        """Should reject a tiny body that expands to hundreds of megabytes without inflating it all."""
+        bomb = _zstd(bytes(1 << 28))
+
+        with pytest.raises(BodyTooLarge):
+            _decode(bomb, "zstd", chunk_size=65536)
+
+    @pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", _zstd)])
+    def test_concatenated_members(self, encoding: str, compress):
+        """Should decode every gzip member or zstd frame of a body compressed in pieces."""
+        half = len(BODY) // 2
+
+        assert _decode(compress(BODY[:half]) + compress(BODY[half:]), encoding) == BODY
+
+    @pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", _zstd)])
+    def test_trailing_garbage(self, encoding: str, compress):
+        """Should reject data after the last member that is not another member."""
+        with pytest.raises(InvalidCompressedBody):
+            _decode(compress(BODY) + b"not compressed at all", encoding)
+
+    def test_truncated(self):
+        """Should reject a compressed body that is cut short."""
+        with pytest.raises(InvalidCompressedBody):
+            _decode(gzip.compress(BODY)[:-20], "gzip")
+
+    def test_corrupt(self):
+        """Should reject data that is not in the declared encoding."""
+        with pytest.raises(InvalidCompressedBody):
+            _decode(BODY, "zstd")
+
+
+class TestContentEncodings:
+    """Tests for content_encoding and response_encoding"""
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, None), ("", None), ("identity", None), ("GZip", "gzip"), ("x-gzip", "gzip"), ("zstd", "zstd"),
+    ])
+    def test_content_encoding(self, header: Optional[str], expected: Optional[str]):
+        """Should normalize supported request encodings."""
+        assert content_encoding(header) == expected
+
+    def test_unsupported_encoding(self):
+        """Should reject encodings other than gzip and zstd."""
+        with pytest.raises(UnsupportedContentEncoding):
+            content_encoding("br")
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, None),
+        ("gzip, deflate", "gzip"),
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("zstd;q=0, gzip;q=0.5", "gzip"),
+        ("br", None),
+    ])
+    def test_response_encoding(self, header: Optional[str], expected: Optional[str]):
+        """Should prefer zstd, then gzip, among the encodings the client accepts."""
+        assert response_encoding(header) == expected
+
+
+@pytest.fixture
+def echo_client() -> TestClient:
+    """An app that echoes request bodies, behind both compression middlewares."""
+    app = FastAPI()
+    app.add_middleware(ResponseCompressionMiddleware, minimum_size=100)
+    app.add_middleware(RequestDecompressionMiddleware, path_prefix="/upload", max_size=len(BODY))
+
+    @app.post("/upload")
+    async def upload(request: Request) -> dict:
+        return {"size": len(await request.body()), "encoding": request.headers.get("content-encoding")}
+
+    @app.post("/other")
+    async def other(request: Request) -> dict:
+        return {"size": len(await request.body())}
+
+    @app.get("/large")
+    async def large() -> list[int]:
+        return list(range(1000))
+
+    return TestClient(app)
+
+
+class TestRequestDecompressionMiddleware:
+    """Tests for RequestDecompressionMiddleware"""
+
+    @pytest.mark.parametrize("encoding, compress", [("gzip", gzip.compress), ("zstd", _zstd)])
+    def test_decompresses_body(self, echo_client: TestClient, encoding: str, compress):
+        """Should hand the route the decoded body without the Content-Encoding header."""
+        response = echo_client.post("/upload", content=compress(BODY), headers={"Content-Encoding": encoding})
+
+        assert response.json() == {"size": len(BODY), "encoding": None}
+
+    def test_streamed_body(self, echo_client: TestClient):
+        """Should decode a body that arrives in many chunks."""
+        compressed = gzip.compress(BODY)
+
+        def chunks():
+            for start in range(0, len(compressed), 10):
+                yield compressed[start:start + 10]
+
+        response = echo_client.post("/upload", content=chunks(), headers={"Content-Encoding": "gzip"})
+
+        assert response.json()["size"] == len(BODY)
+
+    def test_multi_member_body(self, echo_client: TestClient):
+        """Should hand the route the whole body when it holds several gzip members."""
+        body = b"".join(gzip.compress(BODY[start:start + 1000]) for start in range(0, len(BODY), 1000))
+
+        response = echo_client.post("/upload", content=body, headers={"Content-Encoding": "gzip"})
+
+        assert response.json()["size"] == len(BODY)
+
+    def test_too_large(self, echo_client: TestClient):
+        """Should answer 413 once the decompressed body passes the limit."""
+        response = echo_client.post("/upload", content=gzip.compress(BODY + b" "), headers={"Content-Encoding": "gzip"})
+
+        assert response.status_code == 413
+
+    def test_unsupported_encoding(self, echo_client: TestClient):
+        """Should answer 415 for a Content-Encoding other than gzip or zstd."""
+        response = echo_client.post("/upload", content=BODY, headers={"Content-Encoding": "br"})
+
+        assert response.status_code == 415
+
+    def test_other_paths_untouched(self, echo_client: TestClient):
+        """Should leave bodies outside path_prefix as they are."""
+        compressed = gzip.compress(BODY)
+
+        response = echo_client.post("/other", content=compressed, headers={"Content-Encoding": "gzip"})
+
+        assert response.json()["size"] == len(compressed)
+
+
+class TestResponseCompressionMiddleware:
+    """Tests for ResponseCompressionMiddleware"""
+
+    @pytest.mark.parametrize("accept, expected", [
+        ("gzip, zstd", "zstd"), ("gzip", "gzip"), ("identity", None),
+    ])
+    def test_negotiates_encoding(self, echo_client: TestClient, accept: str, expected: Optional[str]):
+        """Should compress large responses with the preferred accepted encoding."""
+        response = echo_client.get("/large", headers={"Accept-Encoding": accept})
+
+        assert response.headers.get("Content-Encoding") == expected
+        assert response.json() == list(range(1000))
+
+    def test_small_responses_uncompressed(self, echo_client: TestClient):
+        """Should send responses under minimum_size as they are."""
+        response = echo_client.post("/other", content=b"", headers={"Accept-Encoding": "zstd"})
+
+        assert "Content-Encoding" not in response.headers
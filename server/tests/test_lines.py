@@ -1,9 +1,50 @@
 """Tests for the lines API endpoints."""
+import math
+import time
+
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import Select, text
 from sqlalchemy.orm import Session
 
-from models.line import Line, LineStatus
+from models.line import Line, LineDetail, LineStatus
+from services.spatial import (
+    lines_in_bbox_query,
+    lines_nearby_query,
+    nearest_lines_query,
+)
+
+
+@pytest.fixture
+def lines_with_paths(db: Session) -> tuple[Line, Line]:
+    """A line through central Cochabamba and one ~5 km east of it."""
+    near = Line(
+        name="Central",
+        status=LineStatus.APPROVED,
+        path="SRID=4326;LINESTRING(-66.160 -17.390, -66.150 -17.390)",
+    )
+    far = Line(
+        name="East",
+        status=LineStatus.APPROVED,
+        path="SRID=4326;LINESTRING(-66.105 -17.390, -66.100 -17.380)",
+    )
+    db.add_all([near, far])
+    db.commit()
+    return near, far
+
+
+def assert_uses_index(db: Session, statement: Select, index: str) -> str:
+    """Assert that the plan of statement scans index, and return the plan."""
+    compiled = statement.compile(dialect=db.bind.dialect)
+    # Tiny test tables are cheaper to scan sequentially; the question is
+    # whether the index is usable at all
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).scalars().all()
+    db.rollback()
+
+    plan_text = "\n".join(plan)
+    assert f" {index} " in plan_text
+    return plan_text
 
 
 class TestCreateLine:
@@ -70,6 +111,495 @@ class TestListLines:
         assert len(data) == 2
 
 
+class TestConditionalGet:
+    """Tests for ETag / Last-Modified on the line catalogue endpoints"""
+    
+    def test_list_lines_not_modified(self, client: TestClient, approved_line: Line):
+        """Should return 304 when the ETag still matches."""
+        first = client.get("/lines/")
+        etag = first.headers["ETag"]
+        
+        second = client.get("/lines/", headers={"If-None-Match": etag})
+        
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+    
+    @pytest.mark.parametrize("change", ["create", "update", "approve", "delete"])
+    def test_mutations_change_etag(
+        self, client: TestClient, approved_line: Line, pending_line: Line, change: str
+    ):
+        """Should issue a new ETag after any change to the catalogue."""
+        etag = client.get("/lines/geojson").headers["ETag"]
+        
+        if change == "create":
+            client.post("/lines/", json={"name": "Another"})
+        elif change == "update":
+            client.patch(f"/lines/{approved_line.id}", json={"name": "Renamed"})
+        elif change == "approve":
+            client.post(f"/lines/{pending_line.id}/approve")
+        else:
+            client.delete(f"/lines/{pending_line.id}")
+        
+        response = client.get("/lines/geojson", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+    
+    def test_merge_changes_etag(self, client: TestClient, approved_line: Line, pending_line: Line):
+        """Should issue a new ETag after a merge."""
+        etag = client.get("/lines/").headers["ETag"]
+        
+        client.post(f"/lines/{pending_line.id}/merge/{approved_line.id}")
+        
+        assert client.get("/lines/", headers={"If-None-Match": etag}).status_code == 200
+    
+    def test_if_modified_since(self, client: TestClient, approved_line: Line):
+        """Should honour If-Modified-Since when no ETag is sent."""
+        client.post("/lines/", json={"name": "Bump"})
+        last_modified = client.get("/lines/").headers["Last-Modified"]
+        
+        response = client.get("/lines/", headers={"If-Modified-Since": last_modified})
+        
+        assert response.status_code == 304
+
+
+class TestLineChanges:
+    """Tests for GET /lines/changes"""
+    
+    def test_changes_since_zero(self, client: TestClient):
+        """Should return every line created through the API."""
+        created = [client.post("/lines/", json={"name": f"Line {i}"}).json() for i in range(2)]
+        
+        response = client.get("/lines/changes", params={"since": 0})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["version"] == 2
+        assert [ln["id"] for ln in data["lines"]] == [ln["id"] for ln in created]
+        assert data["deleted"] == []
+    
+    def test_changes_only_after_version(self, client: TestClient):
+        """Should return only lines changed after the given version, in their current state."""
+        first = client.post("/lines/", json={"name": "First"}).json()
+        second = client.post("/lines/", json={"name": "Second"}).json()
+        version = client.get("/lines/changes", params={"since": 0}).json()["version"]
+        
+        client.patch(f"/lines/{second['id']}", json={"name": "Second (renamed)"})
+        client.post(f"/lines/{second['id']}/approve")
+        data = client.get("/lines/changes", params={"since": version}).json()
+        
+        assert data["version"] == version + 2
+        assert [ln["id"] for ln in data["lines"]] == [second["id"]]
+        assert data["lines"][0]["name"] == "Second (renamed)"
+        assert data["lines"][0]["status"] == "approved"
+        assert first["id"] not in [ln["id"] for ln in data["lines"]]
+    
+    def test_changes_tombstones_and_merges(self, client: TestClient):
+        """Should report deleted lines by id and merged lines with their new status."""
+        keep = client.post("/lines/", json={"name": "Keep"}).json()
+        merged = client.post("/lines/", json={"name": "Merged"}).json()
+        deleted = client.post("/lines/", json={"name": "Deleted"}).json()
+        version = client.get("/lines/changes", params={"since": 0}).json()["version"]
+        
+        client.post(f"/lines/{merged['id']}/merge/{keep['id']}")
+        client.delete(f"/lines/{deleted['id']}")
+        data = client.get("/lines/changes", params={"since": version}).json()
+        
+        assert data["deleted"] == [deleted["id"]]
+        assert [(ln["id"], ln["status"]) for ln in data["lines"]] == [(merged["id"], "merged")]
+    
+    def test_changes_up_to_date(self, client: TestClient):
+        """Should return an empty delta at the current version."""
+        client.post("/lines/", json={"name": "Only"})
+        
+        data = client.get("/lines/changes", params={"since": 1}).json()
+        
+        assert data == {"version": 1, "lines": [], "deleted": []}
+    
+    def test_changes_since_ahead_of_catalogue(self, client: TestClient):
+        """Should ask the client to resync when its version is unknown."""
+        response = client.get("/lines/changes", params={"since": 99})
+        
+        assert response.status_code == 409
+
+
+class TestPathDetail:
+    """Tests for the detail and tolerance parameters"""
+    
+    @pytest.fixture
+    def wiggly_line(self, db: Session, approved_line: Line) -> Line:
+        """A line with a 3 m zigzag along a 1 km straight run."""
+        coords = ", ".join(
+            f"{-66.16 + i * 0.0001:.4f} {-17.39 + (0.00003 if i % 2 else 0):.5f}" for i in range(91)
+        )
+        approved_line.path = f"SRID=4326;LINESTRING({coords})"
+        db.add(approved_line)
+        db.commit()
+        return approved_line
+    
+    def test_full_by_default(self, client: TestClient, wiggly_line: Line):
+        """Should return every vertex without detail or tolerance."""
+        response = client.get(f"/lines/{wiggly_line.id}")
+        
+        assert len(response.json()["path"]) == 91
+    
+    def test_simplified_variants(self, client: TestClient, wiggly_line: Line):
+        """Should drop the zigzag at coarser levels of detail."""
+        high = client.get(f"/lines/{wiggly_line.id}", params={"detail": "high"}).json()
+        low = client.get(f"/lines/{wiggly_line.id}", params={"detail": "low"}).json()
+        
+        assert len(high["path"]) == 91
+        assert low["path"] == [[-66.16, -17.39], [-66.151, -17.39]]
+    
+    def test_tolerance_picks_variant(self, client: TestClient, wiggly_line: Line):
+        """Should use the coarsest variant within the tolerance in meters."""
+        listed = client.get("/lines/", params={"tolerance": 100}).json()
+        
+        assert len(listed[0]["path"]) == 2
+    
+    def test_variants_follow_path_updates(self, client: TestClient, wiggly_line: Line):
+        """Should recompute the variants when the path changes."""
+        client.patch(f"/lines/{wiggly_line.id}", json={"path": [[-66.1, -17.3], [-66.2, -17.4]]})
+        
+        low = client.get(f"/lines/{wiggly_line.id}", params={"detail": "low"}).json()
+        
+        assert low["path"] == [[-66.1, -17.3], [-66.2, -17.4]]
+    
+    def test_geojson_detail(self, client: TestClient, wiggly_line: Line):
+        """Should apply the level of detail to both GeoJSON endpoints."""
+        feature = client.get(f"/lines/{wiggly_line.id}/geojson", params={"detail": "low"}).json()
+        collection = client.get("/lines/geojson", params={"detail": "low"}).json()
+        
+        assert len(feature["geometry"]["coordinates"]) == 2
+        assert collection["features"][0]["geometry"] == feature["geometry"]
+    
+    def test_detail_and_tolerance_conflict(self, client: TestClient, wiggly_line: Line):
+        """Should reject detail and tolerance together."""
+        response = client.get(f"/lines/{wiggly_line.id}", params={"detail": "low", "tolerance": 5})
+        
+        assert response.status_code == 400
+
+
+class TestPolylineFormat:
+    """Tests for format=polyline"""
+    
+    def test_line_polyline(self, client: TestClient, db: Session, approved_line: Line):
+        """Should encode the path, and leave lines without a path as null."""
+        approved_line.path = "SRID=4326;LINESTRING(-120.2 38.5, -120.95 40.7, -126.453 43.252)"
+        db.add(approved_line)
+        db.commit()
+        client.post("/lines/", json={"name": "No path"})
+        
+        single = client.get(f"/lines/{approved_line.id}", params={"format": "polyline"}).json()
+        listed = client.get("/lines/", params={"format": "polyline", "include_all": True}).json()
+        
+        assert single["path"] == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        assert {ln["name"]: ln["path"] for ln in listed} == {
+            approved_line.name: "_p~iF~ps|U_ulLnnqC_mqNvxq`@",
+            "No path": None,
+        }
+    
+    def test_polyline_precision(self, client: TestClient, db: Session, approved_line: Line):
+        """Should encode with the requested number of decimals."""
+        approved_line.path = "SRID=4326;LINESTRING(-66.156812 -17.389534, -66.150049 -17.385071)"
+        db.add(approved_line)
+        db.commit()
+        
+        coarse = client.get(f"/lines/{approved_line.id}", params={"format": "polyline"}).json()
+        fine = client.get(f"/lines/{approved_line.id}", params={"format": "polyline", "precision": 6}).json()
+        
+        assert len(fine["path"]) > len(coarse["path"])
+
+
+def _tile_at(longitude: float, latitude: float, zoom: int) -> tuple[int, int]:
+    n = 2 ** zoom
+    x = int((longitude + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+    return x, y
+
+
+class TestLineTiles:
+    """Tests for GET /lines/tiles/{z}/{x}/{y}.mvt"""
+    
+    @pytest.fixture
+    def mapped_lines(self, db: Session, approved_line: Line, pending_line: Line) -> tuple[Line, Line]:
+        """Both lines along the same street in Cochabamba."""
+        for line in (approved_line, pending_line):
+            line.path = "SRID=4326;LINESTRING(-66.1568 -17.3895, -66.1500 -17.3850)"
+            db.add(line)
+        db.commit()
+        return approved_line, pending_line
+    
+    def test_tile_contains_lines(self, client: TestClient, mapped_lines: tuple[Line, Line]):
+        """Should encode approved lines in the tile, and pending ones only with include_all."""
+        x, y = _tile_at(-66.153, -17.387, 14)
+        
+        response = client.get(f"/lines/tiles/14/{x}/{y}.mvt")
+        everything = client.get(f"/lines/tiles/14/{x}/{y}.mvt", params={"include_all": True})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+        assert b"Test Line 42" in response.content
+        assert b"Pending Line" not in response.content
+        assert b"Pending Line" in everything.content
+    
+    def test_empty_tile(self, client: TestClient, mapped_lines: tuple[Line, Line]):
+        """Should return an empty body for a tile with no lines."""
+        response = client.get("/lines/tiles/14/0/0.mvt")
+        
+        assert response.status_code == 200
+        assert response.content == b""
+    
+    def test_tile_out_of_range(self, client: TestClient):
+        """Should reject x or y outside the zoom level's grid."""
+        response = client.get("/lines/tiles/2/4/0.mvt")
+        
+        assert response.status_code == 400
+    
+    def test_tile_refreshed_when_line_moves(
+        self, client: TestClient, mapped_lines: tuple[Line, Line]
+    ):
+        """Should drop the cached tile once a line in it changes."""
+        approved_line, _ = mapped_lines
+        x, y = _tile_at(-66.153, -17.387, 14)
+        client.get(f"/lines/tiles/14/{x}/{y}.mvt")
+        
+        client.patch(f"/lines/{approved_line.id}", json={"path": [[10.0, 10.0], [10.1, 10.1]]})
+        
+        # Delivered through the line_areas notification
+        for _ in range(50):
+            content = client.get(f"/lines/tiles/14/{x}/{y}.mvt").content
+            if b"Test Line 42" not in content:
+                break
+            time.sleep(0.05)
+        
+        assert b"Test Line 42" not in content
+
+
+class TestLinesInBBox:
+    """Tests for GET /lines/bbox"""
+    
+    @pytest.fixture
+    def viewport_lines(self, db: Session) -> tuple[Line, Line]:
+        """A 91-vertex line with a 3 m zigzag in central Cochabamba and one ~5 km east of it."""
+        coords = ", ".join(
+            f"{-66.16 + i * 0.0001:.4f} {-17.39 + (0.00003 if i % 2 else 0):.5f}" for i in range(91)
+        )
+        central = Line(name="Central", status=LineStatus.APPROVED, path=f"SRID=4326;LINESTRING({coords})")
+        east = Line(
+            name="East",
+            status=LineStatus.APPROVED,
+            path="SRID=4326;LINESTRING(-66.105 -17.390, -66.100 -17.380)",
+        )
+        db.add_all([central, east])
+        db.commit()
+        return central, east
+    
+    def test_lines_in_viewport(self, client: TestClient, viewport_lines: tuple[Line, Line]):
+        """Should return only lines crossing the box."""
+        central, _ = viewport_lines
+    
+        response = client.get("/lines/bbox", params={
+            "min_lon": -66.158, "min_lat": -17.395, "max_lon": -66.150, "max_lat": -17.385,
+        })
+    
+        assert response.status_code == 200
+        assert [ln["id"] for ln in response.json()] == [central.id]
+    
+    def test_limit(self, client: TestClient, viewport_lines: tuple[Line, Line]):
+        """Should return at most `limit` lines, by id."""
+        central, _ = viewport_lines
+    
+        response = client.get("/lines/bbox", params={
+            "min_lon": -66.2, "min_lat": -17.4, "max_lon": -66.0, "max_lat": -17.3, "limit": 1,
+        })
+    
+        assert [ln["id"] for ln in response.json()] == [central.id]
+    
+    def test_simplified_to_viewport(self, client: TestClient, viewport_lines: tuple[Line, Line]):
+        """Should drop detail smaller than a pixel, unless detail is asked for."""
+        bounds = {"min_lon": -66.17, "min_lat": -17.4, "max_lon": -66.14, "max_lat": -17.38}
+    
+        sharp = client.get("/lines/bbox", params=bounds).json()
+        small = client.get("/lines/bbox", params={**bounds, "width": 100}).json()
+        full = client.get("/lines/bbox", params={**bounds, "width": 100, "detail": "full"}).json()
+    
+        assert len(sharp[0]["path"]) == 91
+        assert small[0]["path"] == [[-66.16, -17.39], [-66.151, -17.39]]
+        assert len(full[0]["path"]) == 91
+    
+    def test_inverted_box(self, client: TestClient):
+        """Should reject a box whose minimum exceeds its maximum."""
+        response = client.get("/lines/bbox", params={
+            "min_lon": -66.1, "min_lat": -17.4, "max_lon": -66.2, "max_lat": -17.3,
+        })
+    
+        assert response.status_code == 400
+    
+    def test_bbox_uses_path_index(self, db: Session, viewport_lines: tuple[Line, Line]):
+        """Should plan the viewport query as a scan of the path GiST index."""
+        statement = lines_in_bbox_query(-66.158, -17.395, -66.150, -17.385, LineDetail.FULL)
+    
+        plan = assert_uses_index(db, statement, "idx_lines_path")
+    
+        assert "Seq Scan" not in plan
+
+
+class TestLinesGeoJSON:
+    """Tests for GET /lines/geojson"""
+    
+    def test_geojson_feature_collection(
+        self, client: TestClient, db: Session, approved_line: Line, pending_line: Line
+    ):
+        """Should return approved lines as a GeoJSON FeatureCollection."""
+        approved_line.path = "SRID=4326;LINESTRING(-66.1568 -17.3895, -66.1500 -17.3850)"
+        db.add(approved_line)
+        db.commit()
+        
+        response = client.get("/lines/geojson")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/geo+json"
+        data = response.json()
+        assert data["type"] == "FeatureCollection"
+        assert [f["id"] for f in data["features"]] == [approved_line.id]
+        feature = data["features"][0]
+        assert feature["geometry"] == {
+            "type": "LineString",
+            "coordinates": [[-66.1568, -17.3895], [-66.15, -17.385]],
+        }
+        assert feature["properties"]["name"] == "Test Line 42"
+        assert feature["properties"]["status"] == "approved"
+    
+    def test_geojson_precision(self, client: TestClient, db: Session, approved_line: Line):
+        """Should round coordinates to the requested number of decimals."""
+        approved_line.path = "SRID=4326;LINESTRING(-66.156812 -17.389534, -66.150049 -17.385071)"
+        db.add(approved_line)
+        db.commit()
+        
+        response = client.get("/lines/geojson", params={"precision": 3})
+        
+        coordinates = response.json()["features"][0]["geometry"]["coordinates"]
+        assert coordinates == [[-66.157, -17.39], [-66.15, -17.385]]
+    
+    def test_geojson_status_filters(
+        self, client: TestClient, approved_line: Line, pending_line: Line
+    ):
+        """Should filter by status, or return everything with include_all."""
+        pending = client.get("/lines/geojson", params={"status": "pending"}).json()
+        everything = client.get("/lines/geojson", params={"include_all": True}).json()
+        
+        assert [f["id"] for f in pending["features"]] == [pending_line.id]
+        assert {f["id"] for f in everything["features"]} == {approved_line.id, pending_line.id}
+        # Lines without a path are kept with a null geometry
+        assert all(f["geometry"] is None for f in everything["features"])
+    
+    def test_geojson_empty(self, client: TestClient):
+        """Should return an empty FeatureCollection when there are no lines."""
+        response = client.get("/lines/geojson")
+        
+        assert response.json() == {"type": "FeatureCollection", "features": []}
+
+
+class TestLineCache:
+    """Tests for the in-process cache of line responses"""
+    
+    def test_hit_skips_database(self, client: TestClient, db: Session, approved_line: Line):
+        """Should serve the cached body until the line changes through the API."""
+        first = client.get(f"/lines/{approved_line.id}")
+        # Changed behind the API's back, so nothing invalidates the entry
+        db.execute(text("UPDATE lines SET name = 'Sneaky' WHERE id = :id"), {"id": approved_line.id})
+        db.commit()
+        
+        second = client.get(f"/lines/{approved_line.id}")
+        
+        assert second.json() == first.json()
+        assert second.headers["ETag"] == first.headers["ETag"]
+    
+    @pytest.mark.parametrize("change", ["update", "approve", "delete", "merge"])
+    def test_mutations_invalidate(
+        self, client: TestClient, approved_line: Line, pending_line: Line, change: str
+    ):
+        """Should drop the changed line's entries and every list entry."""
+        line_before = client.get(f"/lines/{pending_line.id}").json()
+        before = client.get("/lines/", params={"include_all": True}).json()
+        
+        if change == "update":
+            client.patch(f"/lines/{pending_line.id}", json={"name": "Renamed"})
+        elif change == "approve":
+            client.post(f"/lines/{pending_line.id}/approve")
+        elif change == "delete":
+            client.delete(f"/lines/{pending_line.id}")
+        else:
+            client.post(f"/lines/{pending_line.id}/merge/{approved_line.id}")
+        
+        after = client.get("/lines/", params={"include_all": True}).json()
+        line = client.get(f"/lines/{pending_line.id}")
+        
+        assert after != before
+        if change == "delete":
+            assert line.status_code == 404
+        else:
+            assert line.json() != line_before
+    
+    def test_create_invalidates_lists(self, client: TestClient, approved_line: Line):
+        """Should show a new line in lists cached before it was created."""
+        client.get("/lines/", params={"include_all": True})
+        
+        client.post("/lines/", json={"name": "Another"})
+        
+        assert len(client.get("/lines/", params={"include_all": True}).json()) == 2
+    
+    def test_query_parameters_are_part_of_key(
+        self, client: TestClient, approved_line: Line, pending_line: Line
+    ):
+        """Should cache each combination of filters separately."""
+        approved = client.get("/lines/").json()
+        pending = client.get("/lines/", params={"status": "pending"}).json()
+        
+        assert [ln["id"] for ln in approved] == [approved_line.id]
+        assert [ln["id"] for ln in pending] == [pending_line.id]
+    
+    def test_cached_conditional_get(self, client: TestClient, approved_line: Line):
+        """Should answer 304 from a cached entry."""
+        etag = client.get("/lines/geojson").headers["ETag"]
+        
+        response = client.get("/lines/geojson", headers={"If-None-Match": etag})
+        
+        assert response.status_code == 304
+    
+    def test_notification_from_another_worker(
+        self, client: TestClient, db: Session, approved_line: Line
+    ):
+        """Should drop cached entries when a change is committed elsewhere."""
+        client.get(f"/lines/{approved_line.id}")
+        db.execute(text("UPDATE lines SET name = 'Elsewhere' WHERE id = :id"), {"id": approved_line.id})
+        db.execute(text("SELECT pg_notify('line_changes', :id)"), {"id": str(approved_line.id)})
+        db.commit()
+        
+        # Delivery is asynchronous
+        for _ in range(50):
+            name = client.get(f"/lines/{approved_line.id}").json()["name"]
+            if name == "Elsewhere":
+                break
+            time.sleep(0.05)
+        
+        assert name == "Elsewhere"
+    
+    def test_metrics(self, client: TestClient, approved_line: Line):
+        """Should count hits and misses on /metrics."""
+        start = client.get("/metrics").json()["line_cache"]
+        client.get(f"/lines/{approved_line.id}")
+        client.get(f"/lines/{approved_line.id}")
+        
+        stats = client.get("/metrics").json()["line_cache"]
+        
+        assert stats["misses"] - start["misses"] == 1
+        assert stats["hits"] - start["hits"] == 1
+        assert stats["entries"] == 1
+
+
 class TestGetLine:
     """Tests for GET /lines/{line_id}"""
     
@@ -127,7 +657,8 @@ class TestDeleteLine:
         
         assert response.status_code == 204
         
-        # Verify it's deleted
+        # Verify it's deleted (the API used its own session, so drop cached objects)
+        db.expire_all()
         assert db.get(Line, line_id) is None
     
     def test_delete_line_not_found(self, client: TestClient):
@@ -223,3 +754,88 @@ class TestMergeLine:
         
         assert response.status_code == 400
         assert "already merged" in response.json()["detail"]
+
+
+class TestFindLinesNearby:
+    """Tests for GET /lines/nearby/"""
+    
+    def test_nearby_within_radius(self, client: TestClient, lines_with_paths: tuple[Line, Line]):
+        """Should return only lines whose path is within the radius."""
+        near, _ = lines_with_paths
+        
+        response = client.get("/lines/nearby/", params={
+            "longitude": -66.155, "latitude": -17.391, "radius_meters": 500,
+        })
+        
+        assert response.status_code == 200
+        assert [ln["id"] for ln in response.json()] == [near.id]
+    
+    def test_nearby_larger_radius(self, client: TestClient, lines_with_paths: tuple[Line, Line]):
+        """Should include farther lines when the radius covers them."""
+        response = client.get("/lines/nearby/", params={
+            "longitude": -66.155, "latitude": -17.391, "radius_meters": 10_000,
+        })
+        
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+    
+    def test_nearby_uses_geography_index(self, db: Session, lines_with_paths: tuple[Line, Line]):
+        """Should plan the nearby query as a scan of the geography GiST index."""
+        statement = lines_nearby_query(-66.155, -17.391, 500)
+        
+        plan = assert_uses_index(db, statement, "idx_lines_path_geography")
+        
+        assert "Seq Scan" not in plan
+
+
+class TestFindNearestLines:
+    """Tests for GET /lines/nearest"""
+    
+    def test_nearest_first(self, client: TestClient, lines_with_paths: tuple[Line, Line]):
+        """Should order lines by distance, with the closest point on each path."""
+        near, far = lines_with_paths
+    
+        response = client.get("/lines/nearest", params={
+            "longitude": -66.155, "latitude": -17.391, "max_radius_meters": 10_000,
+        })
+    
+        assert response.status_code == 200
+        body = response.json()
+        assert [ln["id"] for ln in body] == [near.id, far.id]
+        assert body[0]["distance_meters"] == pytest.approx(110, abs=2)
+        assert body[0]["closest_point"] == pytest.approx([-66.155, -17.390])
+        assert body[1]["distance_meters"] > 5000
+    
+    def test_max_radius(self, client: TestClient, lines_with_paths: tuple[Line, Line]):
+        """Should leave out lines beyond max_radius_meters."""
+        near, _ = lines_with_paths
+    
+        response = client.get("/lines/nearest", params={
+            "longitude": -66.155, "latitude": -17.391, "max_radius_meters": 500,
+        })
+    
+        assert [ln["id"] for ln in response.json()] == [near.id]
+    
+    def test_limit(self, client: TestClient, lines_with_paths: tuple[Line, Line]):
+        """Should return only the `limit` nearest lines."""
+        _, far = lines_with_paths
+    
+        response = client.get("/lines/nearest", params={
+            "longitude": -66.1, "latitude": -17.385, "max_radius_meters": 10_000, "limit": 1,
+        })
+    
+        assert [ln["id"] for ln in response.json()] == [far.id]
+    
+    def test_radius_capped(self, client: TestClient):
+        """Should reject a max_radius_meters above the cap."""
+        response = client.get("/lines/nearest", params={
+            "longitude": -66.155, "latitude": -17.391, "max_radius_meters": 1_000_000,
+        })
+    
+        assert response.status_code == 422
+    
+    def test_nearest_uses_geography_index(self, db: Session, lines_with_paths: tuple[Line, Line]):
+        """Should plan the nearest-first ordering as a scan of the geography GiST index."""
+        statement = nearest_lines_query(-66.155, -17.391, 10_000, 5)
+    
+        assert_uses_index(db, statement, "idx_lines_path_geography")
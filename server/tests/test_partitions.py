@@ -0,0 +1,63 @@
+"""Tests for monthly partition maintenance."""
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models.recording import LocationPoint, RecordingSession
+from services.partitions import (
+    add_months,
+    drop_partitions_before,
+    ensure_partitions,
+    monthly_partitions,
+    partition_name,
+)
+
+
+class TestMonthArithmetic:
+    """Tests for the month helpers."""
+
+    def test_add_months_across_years(self):
+        """Should roll over year boundaries in both directions."""
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_partition_name(self):
+        """Should zero-pad the month."""
+        assert partition_name("sensor_readings", date(2026, 3, 1)) == "sensor_readings_y2026m03"
+
+
+class TestPartitionMaintenance:
+    """Tests against the partitioned test tables."""
+
+    def test_create_moves_rows_and_drop_removes_them(
+        self, db: Session, recording_session: RecordingSession
+    ):
+        """Should move default-partition rows into a new month and drop expired months."""
+        db.add(LocationPoint(
+            session_id=recording_session.id,
+            timestamp=datetime(2001, 2, 14, 8, 0),
+            latitude=-17.39,
+            longitude=-66.15,
+        ))
+        db.commit()
+        conn = db.connection()
+
+        created = ensure_partitions(conn, "location_points", date(2001, 1, 1), date(2001, 3, 1))
+        partition = conn.execute(text("SELECT tableoid::regclass::text FROM location_points")).scalar()
+
+        assert created == [
+            "location_points_y2001m01", "location_points_y2001m02", "location_points_y2001m03",
+        ]
+        assert partition == "location_points_y2001m02"
+        assert ensure_partitions(conn, "location_points", date(2001, 1, 1), date(2001, 3, 1)) == []
+
+        dropped = drop_partitions_before(conn, "location_points", date(2001, 3, 1))
+        remaining = list(monthly_partitions(conn, "location_points"))
+        rows = conn.execute(text("SELECT count(*) FROM location_points")).scalar()
+        drop_partitions_before(conn, "location_points", date(2001, 4, 1))
+        db.commit()
+
+        assert dropped == ["location_points_y2001m01", "location_points_y2001m02"]
+        assert remaining == [date(2001, 3, 1)]
+        assert rows == 0
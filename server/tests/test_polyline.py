@@ -0,0 +1,44 @@
+"""Tests for encoded polyline output."""
+import pytest
+import shapely
+from shapely.geometry import LineString
+
+from services.polyline import decode_polyline, encode_wkb_polyline
+
+# Example from Google's format documentation, as (longitude, latitude)
+GOOGLE_EXAMPLE = [(-120.2, 38.5), (-120.95, 40.7), (-126.453, 43.252)]
+GOOGLE_ENCODED = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+class TestEncodeWkbPolyline:
+    """Tests for encode_wkb_polyline"""
+
+    @pytest.mark.parametrize("flavor", ["extended", "iso"])
+    @pytest.mark.parametrize("big_endian", [False, True])
+    def test_google_example(self, flavor: str, big_endian: bool):
+        """Should match the reference encoding for any WKB flavour and byte order."""
+        data = shapely.to_wkb(
+            shapely.set_srid(LineString(GOOGLE_EXAMPLE), 4326),
+            flavor=flavor, byte_order=0 if big_endian else 1, include_srid=flavor == "extended",
+        )
+
+        assert encode_wkb_polyline(data) == GOOGLE_ENCODED
+
+    def test_drops_z(self):
+        """Should ignore Z values."""
+        data = shapely.to_wkb(LineString([(x, y, 2600.0) for x, y in GOOGLE_EXAMPLE]))
+
+        assert encode_wkb_polyline(data) == GOOGLE_ENCODED
+
+    def test_precision_round_trip(self):
+        """Should keep the requested number of decimals."""
+        path = [[-66.156812, -17.389534], [-66.150049, -17.385071]]
+
+        encoded = encode_wkb_polyline(shapely.to_wkb(LineString(path)), precision=6)
+
+        assert decode_polyline(encoded, precision=6) == path
+
+    def test_rejects_other_geometries(self):
+        """Should refuse anything but a LINESTRING."""
+        with pytest.raises(ValueError):
+            encode_wkb_polyline(shapely.to_wkb(shapely.Point(1, 2)))
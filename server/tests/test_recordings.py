@@ -1,10 +1,18 @@
 """Tests for the recordings API endpoints."""
+import asyncio
+import gzip
+import json
+import struct
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import pytest
+import zstandard
 from fastapi.testclient import TestClient
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from middleware import RequestDecompressionMiddleware
 from models.line import Line, LineStatus
 from models.recording import (
     LocationPoint,
@@ -12,6 +20,9 @@ from models.recording import (
     RecordingStatus,
     SensorReading,
 )
+from services.cache import active_sessions
+from services.columnar import COLUMNAR_CONTENT_TYPE, encode_location_batch
+from services.ingest_buffer import ingest_buffer
 
 
 class TestStartRecording:
@@ -60,6 +71,20 @@ class TestListRecordings:
         assert response.status_code == 200
         data = response.json()
         assert all(r["status"] == "completed" for r in data)
+    
+    def test_polyline_format(
+        self, client: TestClient, db: Session, completed_recording: RecordingSession
+    ):
+        """Should return computed_path as an encoded polyline when asked."""
+        completed_recording.computed_path = "SRID=4326;LINESTRING(-120.2 38.5, -120.95 40.7, -126.453 43.252)"
+        db.add(completed_recording)
+        db.commit()
+        
+        listed = client.get("/recordings/", params={"format": "polyline"}).json()
+        single = client.get(f"/recordings/{completed_recording.id}", params={"format": "polyline"}).json()
+        
+        assert listed[0]["computed_path"] == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        assert single["computed_path"] == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
 
 
 class TestEndRecording:
@@ -92,6 +117,160 @@ class TestEndRecording:
         assert "not in progress" in response.json()["detail"]
 
 
+    def test_end_recording_computes_path(
+        self, client: TestClient, db: Session, recording_session: RecordingSession, approved_line: Line
+    ):
+        """Should build the computed path from the session's points in timestamp order."""
+        now = datetime.utcnow()
+        # Inserted out of order on purpose
+        for i, lat in [(2, -17.392), (0, -17.390), (1, -17.391)]:
+            db.add(LocationPoint(
+                session_id=recording_session.id,
+                timestamp=now + timedelta(seconds=i),
+                latitude=lat,
+                longitude=-66.15,
+                point=func.ST_GeomFromEWKT(f"SRID=4326;POINT(-66.15 {lat})"),
+            ))
+        db.commit()
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/end",
+            json={"line_id": approved_line.id},
+        )
+
+        assert response.status_code == 200
+        path = response.json()["computed_path"]
+        assert path == [
+            pytest.approx([-66.15, -17.390]),
+            pytest.approx([-66.15, -17.391]),
+            pytest.approx([-66.15, -17.392]),
+        ]
+
+    def test_end_recording_single_point_has_no_path(
+        self, client: TestClient, db: Session, recording_session: RecordingSession, approved_line: Line
+    ):
+        """Should leave the computed path empty when there are fewer than two points."""
+        db.add(LocationPoint(
+            session_id=recording_session.id,
+            timestamp=datetime.utcnow(),
+            latitude=-17.39,
+            longitude=-66.15,
+            point=func.ST_GeomFromEWKT("SRID=4326;POINT(-66.15 -17.39)"),
+        ))
+        db.commit()
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/end",
+            json={"line_id": approved_line.id},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["computed_path"] is None
+
+
+class TestImportRecording:
+    """Tests for POST /recordings/import"""
+    
+    @staticmethod
+    def _recording(**fields) -> dict:
+        start = datetime(2026, 3, 1, 7, 30)
+        return {
+            "device_model": "Test Device",
+            "points": [
+                {"timestamp": (start + timedelta(seconds=i)).isoformat(), "latitude": lat, "longitude": -66.15}
+                # Out of order on purpose
+                for i, lat in [(2, -17.392), (0, -17.390), (1, -17.391)]
+            ],
+            "readings": [
+                {"timestamp": (start + timedelta(milliseconds=10 * i)).isoformat(), "accel_z": 9.81}
+                for i in range(5)
+            ],
+            **fields,
+        }
+    
+    def _stored(self, db: Session, model, session_id: int) -> int:
+        return db.execute(
+            select(func.count()).select_from(model).where(model.session_id == session_id)
+        ).scalar_one()
+    
+    def test_import_recording(self, client: TestClient, db: Session, approved_line: Line):
+        """Should create a completed session with its data and computed path."""
+        response = client.post("/recordings/import", json=self._recording(line_id=approved_line.id))
+    
+        assert response.status_code == 201
+        data = response.json()
+        assert data["status"] == "completed"
+        assert data["line_id"] == approved_line.id
+        assert data["started_at"] == "2026-03-01T07:30:00"
+        assert data["ended_at"] == "2026-03-01T07:30:02"
+        assert data["computed_path"] == [
+            pytest.approx([-66.15, -17.390]),
+            pytest.approx([-66.15, -17.391]),
+            pytest.approx([-66.15, -17.392]),
+        ]
+        assert self._stored(db, LocationPoint, data["id"]) == 3
+        assert self._stored(db, SensorReading, data["id"]) == 5
+    
+    def test_import_new_line(self, client: TestClient, db: Session):
+        """Should create a pending line from line_name, as when ending a recording."""
+        response = client.post("/recordings/import", json=self._recording(line_name="  Linea 7  "))
+    
+        line = db.get(Line, response.json()["line_id"])
+        assert line.name == "Linea 7"
+        assert line.status == LineStatus.PENDING
+    
+    @pytest.mark.parametrize("encoding, compress", [
+        ("gzip", gzip.compress),
+        ("zstd", lambda data: zstandard.ZstdCompressor().compress(data)),
+    ])
+    def test_import_compressed(self, client: TestClient, approved_line: Line, encoding: str, compress):
+        """Should accept gzip and zstd bodies."""
+        body = json.dumps(self._recording(line_id=approved_line.id)).encode()
+    
+        response = client.post(
+            "/recordings/import",
+            content=compress(body),
+            headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+        )
+    
+        assert response.status_code == 201
+        assert len(response.json()["computed_path"]) == 3
+    
+    def test_import_unknown_line_stores_nothing(self, client: TestClient, db: Session):
+        """Should reject the import as a whole when the line does not exist."""
+        response = client.post("/recordings/import", json=self._recording(line_id=999))
+    
+        assert response.status_code == 404
+        assert db.execute(select(func.count()).select_from(RecordingSession)).scalar_one() == 0
+    
+    def test_import_unsupported_encoding(self, client: TestClient):
+        """Should answer 415 for a Content-Encoding other than gzip or zstd."""
+        response = client.post(
+            "/recordings/import",
+            content=json.dumps(self._recording()).encode(),
+            headers={"Content-Type": "application/json", "Content-Encoding": "br"},
+        )
+    
+        assert response.status_code == 415
+    
+    def test_import_too_large(self, client: TestClient, monkeypatch: pytest.MonkeyPatch):
+        """Should answer 413 once the decompressed body passes the limit."""
+        # main.py passes the configured limit explicitly, so lower it on the middleware itself
+        layer = client.app.middleware_stack
+        while not isinstance(layer, RequestDecompressionMiddleware):
+            layer = layer.app
+        monkeypatch.setattr(layer, "max_size", 100)
+        body = gzip.compress(json.dumps(self._recording()).encode())
+    
+        response = client.post(
+            "/recordings/import",
+            content=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+    
+        assert response.status_code == 413
+
+
 class TestCancelRecording:
     """Tests for POST /recordings/{session_id}/cancel"""
     
@@ -134,6 +313,38 @@ class TestLocationBatchUpload:
         assert data["added"] == 10
         assert data["session_id"] == recording_session.id
     
+    def test_upload_gzip_batch(
+        self, client: TestClient, recording_session: RecordingSession
+    ):
+        """Should decompress a gzip batch body."""
+        now = datetime.utcnow()
+        points = [
+            {"timestamp": (now + timedelta(seconds=i)).isoformat(), "latitude": -17.39, "longitude": -66.15}
+            for i in range(10)
+        ]
+        
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            content=gzip.compress(json.dumps({"points": points}).encode()),
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == 201
+        assert response.json()["added"] == 10
+    
+    def test_upload_corrupt_gzip_batch(
+        self, client: TestClient, recording_session: RecordingSession
+    ):
+        """Should reject a body that is not valid gzip."""
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            content=b'{"points": []}',
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == 400
+        assert "gzip" in response.json()["detail"]
+    
     def test_upload_empty_batch(
         self, client: TestClient, recording_session: RecordingSession
     ):
@@ -162,6 +373,19 @@ class TestLocationBatchUpload:
         assert response.status_code == 400
         assert "not in progress" in response.json()["detail"]
     
+    def test_upload_to_missing_session(self, client: TestClient):
+        """Should 404 for an unknown session."""
+        response = client.post(
+            "/recordings/999/locations/batch",
+            json={"points": [{
+                "timestamp": datetime.utcnow().isoformat(),
+                "latitude": 40.7128,
+                "longitude": -74.0060,
+            }]}
+        )
+        
+        assert response.status_code == 404
+    
     def test_batch_updates_last_activity(
         self, client: TestClient, db: Session, recording_session: RecordingSession
     ):
@@ -182,6 +406,117 @@ class TestLocationBatchUpload:
         db.refresh(recording_session)
         assert recording_session.last_activity_at >= original_activity
 
+    def test_batch_computes_point_geometry(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should store every point with a PostGIS geometry built from lon/lat."""
+        now = datetime.utcnow()
+        points = [
+            {
+                "timestamp": (now + timedelta(seconds=i)).isoformat(),
+                "latitude": -17.39 + (i * 0.001),
+                "longitude": -66.15,
+                "altitude": 2558.0 if i % 2 else None,
+            }
+            for i in range(5)
+        ]
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            json={"points": points}
+        )
+
+        assert response.status_code == 201
+        rows = db.execute(
+            select(
+                LocationPoint.latitude,
+                LocationPoint.altitude,
+                func.ST_X(LocationPoint.point),
+                func.ST_Y(LocationPoint.point),
+            )
+            .where(LocationPoint.session_id == recording_session.id)
+            .order_by(LocationPoint.timestamp)
+        ).all()
+        assert len(rows) == 5
+        assert [r[1] for r in rows] == [None, 2558.0, None, 2558.0, None]
+        for latitude, _, x, y in rows:
+            assert x == pytest.approx(-66.15)
+            assert y == pytest.approx(latitude)
+
+    def test_upload_columnar_location_batch(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should accept the packed columnar format and store the same rows as JSON."""
+        now = datetime.utcnow().replace(microsecond=0)
+        body = encode_location_batch({
+            "timestamp": [now, now + timedelta(seconds=1)],
+            "latitude": [-17.39, -17.391],
+            "longitude": [-66.15, -66.151],
+            "speed": [None, 7.5],
+        })
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            content=body,
+            headers={"Content-Type": COLUMNAR_CONTENT_TYPE},
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["added"] == 2
+        assert data["first_timestamp"] == now.isoformat()
+        stored = db.execute(
+            select(LocationPoint)
+            .where(LocationPoint.session_id == recording_session.id)
+            .order_by(LocationPoint.timestamp)
+        ).scalars().all()
+        assert [(p.latitude, p.speed) for p in stored] == [(-17.39, None), (-17.391, 7.5)]
+
+    def test_upload_invalid_columnar_batch(
+        self, client: TestClient, recording_session: RecordingSession
+    ):
+        """Should reject columnar batches with out-of-range values."""
+        body = encode_location_batch({
+            "timestamp": [datetime.utcnow()],
+            "latitude": [95.0],
+            "longitude": [-66.15],
+        })
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            content=body,
+            headers={"Content-Type": COLUMNAR_CONTENT_TYPE},
+        )
+
+        assert response.status_code == 422
+        assert "latitude" in response.json()["detail"]
+
+    def test_upload_columnar_timestamp_out_of_range(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should reject a columnar batch whose timestamp no datetime can hold, storing nothing."""
+        body = bytearray(encode_location_batch({
+            "timestamp": [datetime.utcnow()],
+            "latitude": [-17.39],
+            "longitude": [-66.15],
+        }))
+        # The timestamp column follows the 16-byte header
+        struct.pack_into("<q", body, 16, 2**62)
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            content=bytes(body),
+            headers={"Content-Type": COLUMNAR_CONTENT_TYPE},
+        )
+
+        assert response.status_code == 422
+        assert "timestamp" in response.json()["detail"]
+        stored = db.execute(
+            select(func.count()).select_from(LocationPoint)
+            .where(LocationPoint.session_id == recording_session.id)
+        ).scalar_one()
+        assert stored == 0
+
 
 class TestSensorBatchUpload:
     """Tests for POST /recordings/{session_id}/sensors/batch"""
@@ -213,6 +548,401 @@ class TestSensorBatchUpload:
         data = response.json()
         assert data["added"] == 20
 
+    def test_sensor_batch_stores_all_channels(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should persist every channel, keeping missing ones as NULL."""
+        now = datetime.utcnow()
+        readings = [
+            {"timestamp": now.isoformat(), "accel_x": 0.5, "pressure": 752.3},
+            {
+                "timestamp": (now + timedelta(milliseconds=20)).isoformat(),
+                "gyro_z": -0.1,
+                "magnetic_heading": 359.5,
+            },
+        ]
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/sensors/batch",
+            json={"readings": readings}
+        )
+
+        assert response.status_code == 201
+        assert response.json() == {
+            "added": 2,
+            "session_id": recording_session.id,
+            "first_timestamp": readings[0]["timestamp"],
+            "last_timestamp": readings[1]["timestamp"],
+        }
+        stored = db.execute(
+            select(SensorReading)
+            .where(SensorReading.session_id == recording_session.id)
+            .order_by(SensorReading.timestamp)
+        ).scalars().all()
+        assert [(r.accel_x, r.pressure, r.gyro_z, r.magnetic_heading) for r in stored] == [
+            (0.5, 752.3, None, None),
+            (None, None, -0.1, 359.5),
+        ]
+
+
+class TestStreamUpload:
+    """Tests for POST /recordings/{session_id}/stream"""
+
+    def test_stream_mixed_records(
+        self,
+        client: TestClient,
+        db: Session,
+        recording_session: RecordingSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Should store location and sensor lines, flushing in bounded chunks."""
+        monkeypatch.setattr("routes.recordings.STREAM_CHUNK_SIZE", 4)
+        now = datetime.utcnow()
+        lines = []
+        for i in range(5):
+            ts = (now + timedelta(seconds=i)).isoformat()
+            lines.append(json.dumps({"type": "location", "timestamp": ts, "latitude": -17.39, "longitude": -66.15}))
+            lines.append(json.dumps({"type": "sensor", "timestamp": ts, "accel_z": 9.81}))
+
+        def body():
+            for line in lines:
+                yield (line + "\n").encode()
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/stream",
+            content=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        assert data["locations_added"] == 5
+        assert data["sensors_added"] == 5
+        assert [c["through_line"] for c in data["chunks"]] == [4, 8, 10]
+        stored = db.execute(
+            select(func.count()).select_from(SensorReading)
+            .where(SensorReading.session_id == recording_session.id)
+        ).scalar_one()
+        assert stored == 5
+
+    def test_stream_invalid_line_rejects_upload(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should reject the whole stream and report the offending line."""
+        now = datetime.utcnow().isoformat()
+        body = "\n".join([
+            json.dumps({"type": "location", "timestamp": now, "latitude": -17.39, "longitude": -66.15}),
+            json.dumps({"type": "location", "timestamp": now, "latitude": 123.0, "longitude": -66.15}),
+        ])
+
+        response = client.post(
+            f"/recordings/{recording_session.id}/stream",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith("Line 2:")
+        stored = db.execute(
+            select(func.count()).select_from(LocationPoint)
+            .where(LocationPoint.session_id == recording_session.id)
+        ).scalar_one()
+        assert stored == 0
+
+
+class TestIdempotentUploads:
+    """Tests for retried batch uploads and GET /recordings/{session_id}/upload-state"""
+    
+    @staticmethod
+    def _points(start: datetime, count: int) -> list[dict]:
+        return [
+            {"timestamp": (start + timedelta(seconds=i)).isoformat(), "latitude": -17.39, "longitude": -66.15}
+            for i in range(count)
+        ]
+    
+    def _stored(self, db: Session, model, session_id: int) -> int:
+        return db.execute(
+            select(func.count()).select_from(model).where(model.session_id == session_id)
+        ).scalar_one()
+    
+    def test_resent_rows_skipped(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should store each timestamp once and report the rest as duplicates."""
+        start = datetime(2026, 3, 1, 7, 30)
+        url = f"/recordings/{recording_session.id}/locations/batch"
+    
+        client.post(url, json={"points": self._points(start, 5)})
+        response = client.post(url, json={"points": self._points(start, 8)})
+    
+        assert response.status_code == 201
+        assert response.json()["added"] == 3
+        assert response.json()["duplicates"] == 5
+        assert self._stored(db, LocationPoint, recording_session.id) == 8
+    
+    def test_sensor_readings_share_timestamp(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should store sensor readings taken at the same instant, e.g. accelerometer and gyroscope."""
+        timestamp = datetime(2026, 3, 1, 7, 30).isoformat()
+        readings = [{"timestamp": timestamp, "accel_z": 9.81}, {"timestamp": timestamp, "gyro_x": 0.1}]
+    
+        response = client.post(f"/recordings/{recording_session.id}/sensors/batch", json={"readings": readings})
+    
+        assert response.status_code == 201
+        assert response.json()["added"] == 2
+        assert response.json()["duplicates"] == 0
+        assert self._stored(db, SensorReading, recording_session.id) == 2
+    
+    def test_idempotency_key_replays_result(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should answer a retried key with the first result, even after the session ends."""
+        url = f"/recordings/{recording_session.id}/sensors/batch"
+        readings = [{"timestamp": datetime(2026, 3, 1, 7, 30).isoformat(), "accel_z": 9.81}]
+        headers = {"Idempotency-Key": "batch-1"}
+    
+        first = client.post(url, json={"readings": readings}, headers=headers)
+        client.post(f"/recordings/{recording_session.id}/end", json={})
+        retry = client.post(url, json={"readings": readings}, headers=headers)
+    
+        assert retry.status_code == 201
+        assert retry.json() == first.json()
+        assert retry.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert self._stored(db, SensorReading, recording_session.id) == 1
+    
+    def test_keys_scoped_by_stream(
+        self, client: TestClient, recording_session: RecordingSession
+    ):
+        """Should not replay a location batch for a sensor batch with the same key."""
+        start = datetime(2026, 3, 1, 7, 30)
+        headers = {"Idempotency-Key": "batch-1"}
+    
+        client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            json={"points": self._points(start, 2)}, headers=headers,
+        )
+        response = client.post(
+            f"/recordings/{recording_session.id}/sensors/batch",
+            json={"readings": [{"timestamp": start.isoformat()}]}, headers=headers,
+        )
+    
+        assert response.json()["added"] == 1
+        assert "Idempotent-Replayed" not in response.headers
+    
+    def test_single_point_retry(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should return the stored point when a single upload is repeated."""
+        point = self._points(datetime(2026, 3, 1, 7, 30), 1)[0]
+        url = f"/recordings/{recording_session.id}/locations"
+    
+        first = client.post(url, json=point)
+        retry = client.post(url, json=point)
+    
+        assert retry.json()["id"] == first.json()["id"]
+        assert self._stored(db, LocationPoint, recording_session.id) == 1
+    
+    def test_upload_state(
+        self, client: TestClient, recording_session: RecordingSession
+    ):
+        """Should report the last stored timestamp of each stream."""
+        start = datetime(2026, 3, 1, 7, 30)
+        url = f"/recordings/{recording_session.id}/upload-state"
+    
+        empty = client.get(url).json()
+        client.post(
+            f"/recordings/{recording_session.id}/locations/batch",
+            json={"points": self._points(start, 4)},
+        )
+        state = client.get(url).json()
+    
+        assert empty["last_location_timestamp"] is None
+        assert empty["last_sensor_timestamp"] is None
+        assert state == {
+            "session_id": recording_session.id,
+            "status": "in_progress",
+            "last_location_timestamp": (start + timedelta(seconds=3)).isoformat(),
+            "last_sensor_timestamp": None,
+        }
+    
+    def test_upload_state_not_found(self, client: TestClient):
+        """Should 404 for an unknown session."""
+        response = client.get("/recordings/999/upload-state")
+    
+        assert response.status_code == 404
+
+
+class TestBufferedSingleUploads:
+    """Tests for single-row uploads written through the ingest buffer"""
+    
+    def test_concurrent_points_share_flushes(
+        self,
+        client: TestClient,
+        db: Session,
+        recording_session: RecordingSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Should store concurrent single uploads in fewer bulk inserts than requests."""
+        monkeypatch.setattr(ingest_buffer, "flush_ms", 500)
+        start = datetime(2026, 3, 1, 7, 30)
+        url = f"/recordings/{recording_session.id}/locations"
+        points = [
+            {"timestamp": (start + timedelta(seconds=i)).isoformat(), "latitude": -17.39, "longitude": -66.15}
+            for i in range(10)
+        ]
+        flushes = ingest_buffer.flushes
+    
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            responses = list(pool.map(lambda point: client.post(url, json=point), points))
+    
+        assert [r.status_code for r in responses] == [201] * 10
+        assert len({r.json()["id"] for r in responses}) == 10
+        assert ingest_buffer.flushes - flushes < 10
+        stored = db.execute(
+            select(func.count()).select_from(LocationPoint).where(LocationPoint.session_id == recording_session.id)
+        ).scalar_one()
+        assert stored == 10
+    
+    def test_same_timestamp_in_one_flush(
+        self,
+        client: TestClient,
+        db: Session,
+        recording_session: RecordingSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Should store both readings of an instant, and answer a repeated point with the one stored."""
+        monkeypatch.setattr(ingest_buffer, "flush_ms", 500)
+        timestamp = datetime(2026, 3, 1, 7, 30).isoformat()
+        base = f"/recordings/{recording_session.id}"
+        uploads = [
+            ("sensors", {"timestamp": timestamp, "accel_z": 9.81}),
+            ("sensors", {"timestamp": timestamp, "gyro_x": 0.1}),
+            ("locations", {"timestamp": timestamp, "latitude": -17.39, "longitude": -66.15}),
+            ("locations", {"timestamp": timestamp, "latitude": -17.38, "longitude": -66.15}),
+        ]
+        flushes = ingest_buffer.flushes
+    
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda upload: client.post(f"{base}/{upload[0]}", json=upload[1]), uploads))
+    
+        assert ingest_buffer.flushes - flushes == 1
+        accel, gyro, first_point, second_point = [r.json() for r in responses]
+        readings = db.execute(
+            select(SensorReading).where(SensorReading.session_id == recording_session.id)
+        ).scalars().all()
+        assert {(r.id, r.accel_z, r.gyro_x) for r in readings} == {
+            (accel["id"], 9.81, None), (gyro["id"], None, 0.1),
+        }
+        point = db.execute(
+            select(LocationPoint).where(LocationPoint.session_id == recording_session.id)
+        ).scalar_one()
+        assert first_point == second_point
+        assert (first_point["id"], first_point["latitude"]) == (point.id, point.latitude)
+    
+    def test_failed_session_isolated(
+        self,
+        client: TestClient,
+        db: Session,
+        recording_session: RecordingSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        """Should still store the rows of other sessions when one session's rows fail in a shared flush."""
+        other = RecordingSession(line_id=recording_session.line_id, status=RecordingStatus.IN_PROGRESS)
+        db.add(other)
+        db.commit()
+        insert = ingest_buffer._insert
+    
+        async def failing_insert(session, items, *args):
+            if any(pending.session_id == other.id for pending in items):
+                raise RuntimeError("insert failed")
+            await insert(session, items, *args)
+    
+        monkeypatch.setattr(ingest_buffer, "_insert", failing_insert)
+        monkeypatch.setattr(ingest_buffer, "flush_ms", 500)
+        point = {"timestamp": datetime(2026, 3, 1, 7, 30).isoformat(), "latitude": -17.39, "longitude": -66.15}
+    
+        def upload(session_id: int) -> int:
+            try:
+                return client.post(f"/recordings/{session_id}/locations", json=point).status_code
+            except RuntimeError:
+                return 500
+    
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            statuses = list(pool.map(upload, [recording_session.id, other.id]))
+    
+        assert statuses == [201, 500]
+        stored = db.execute(
+            select(func.count()).select_from(LocationPoint).where(LocationPoint.session_id == recording_session.id)
+        ).scalar_one()
+        assert stored == 1
+    
+    def test_single_reading_updates_last_activity(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should bump last_activity_at when the buffered reading is written."""
+        original_activity = recording_session.last_activity_at
+    
+        response = client.post(
+            f"/recordings/{recording_session.id}/sensors",
+            json={"timestamp": datetime.utcnow().isoformat(), "accel_z": 9.81},
+        )
+    
+        assert response.status_code == 201
+        assert response.json()["accel_z"] == 9.81
+        db.refresh(recording_session)
+        assert recording_session.last_activity_at > original_activity
+    
+    def test_session_ended_while_cached(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should reject a point for a session ended elsewhere even while it is cached as in progress."""
+        url = f"/recordings/{recording_session.id}/locations"
+        start = datetime(2026, 3, 1, 7, 30)
+        first = client.post(url, json={"timestamp": start.isoformat(), "latitude": -17.39, "longitude": -66.15})
+        # Ended by another worker, whose cache this one never hears about
+        recording_session.status = RecordingStatus.COMPLETED
+        db.commit()
+    
+        second = client.post(
+            url, json={"timestamp": (start + timedelta(seconds=1)).isoformat(), "latitude": -17.39, "longitude": -66.15}
+        )
+    
+        assert first.status_code == 201
+        assert second.status_code == 400
+        assert "not in progress" in second.json()["detail"]
+        stored = db.execute(
+            select(func.count()).select_from(LocationPoint).where(LocationPoint.session_id == recording_session.id)
+        ).scalar_one()
+        assert stored == 1
+    
+    def test_cached_session_deleted(self, client: TestClient):
+        """Should 404 for a session still cached as in progress after it was deleted elsewhere."""
+        active_sessions.add(999)
+    
+        response = client.post(
+            "/recordings/999/sensors", json={"timestamp": datetime.utcnow().isoformat(), "accel_z": 9.81}
+        )
+    
+        assert response.status_code == 404
+        assert 999 not in active_sessions
+    
+    def test_full_buffer(
+        self, client: TestClient, recording_session: RecordingSession, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Should answer 503 with Retry-After while the buffer has no room."""
+        monkeypatch.setattr(ingest_buffer, "_slots", asyncio.Semaphore(0))
+        monkeypatch.setattr(ingest_buffer, "enqueue_timeout_ms", 10)
+    
+        response = client.post(
+            f"/recordings/{recording_session.id}/locations",
+            json={"timestamp": datetime.utcnow().isoformat(), "latitude": -17.39, "longitude": -66.15},
+        )
+    
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
 
 class TestGetLocationPoints:
     """Tests for GET /recordings/{session_id}/locations"""
@@ -248,6 +978,124 @@ class TestGetLocationPoints:
         assert response.status_code == 200
         data = response.json()
         assert len(data) == 3
+    
+    @pytest.fixture
+    def five_points(self, db: Session, recording_session: RecordingSession) -> list[LocationPoint]:
+        """Five points one second apart (a session has one point per timestamp)."""
+        start = datetime(2026, 3, 1, 7, 30)
+        points = [
+            LocationPoint(
+                session_id=recording_session.id,
+                timestamp=start + timedelta(seconds=offset),
+                latitude=-17.39,
+                longitude=-66.15,
+            )
+            for offset in range(5)
+        ]
+        db.add_all(points)
+        db.commit()
+        return points
+    
+    def test_get_locations_cursor_pagination(
+        self, client: TestClient, recording_session: RecordingSession, five_points: list[LocationPoint]
+    ):
+        """Should walk every point exactly once by following the next cursor."""
+        url = f"/recordings/{recording_session.id}/locations"
+        seen, params = [], {"limit": 2}
+        while True:
+            response = client.get(url, params=params)
+            assert response.status_code == 200
+            seen += [p["id"] for p in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            params = {"limit": 2, "cursor": cursor}
+        
+        assert seen == [p.id for p in five_points]
+    
+    def test_get_locations_after_timestamp_and_id(
+        self, client: TestClient, recording_session: RecordingSession, five_points: list[LocationPoint]
+    ):
+        """Should return rows strictly after the (timestamp, id) position."""
+        middle = five_points[2]
+        
+        after_ts = client.get(
+            f"/recordings/{recording_session.id}/locations",
+            params={"after_timestamp": middle.timestamp.isoformat()},
+        )
+        after_ts_and_id = client.get(
+            f"/recordings/{recording_session.id}/locations",
+            params={"after_timestamp": middle.timestamp.isoformat(), "after_id": middle.id - 1},
+        )
+        
+        assert [p["id"] for p in after_ts.json()] == [five_points[3].id, five_points[4].id]
+        assert [p["id"] for p in after_ts_and_id.json()] == [p.id for p in five_points[2:]]
+    
+    def test_get_locations_skip_still_supported(
+        self, client: TestClient, recording_session: RecordingSession, five_points: list[LocationPoint]
+    ):
+        """Should keep offset pagination working."""
+        response = client.get(
+            f"/recordings/{recording_session.id}/locations", params={"skip": 3, "limit": 10}
+        )
+        
+        assert [p["id"] for p in response.json()] == [five_points[3].id, five_points[4].id]
+        assert "X-Next-Cursor" not in response.headers
+    
+    def test_get_locations_invalid_cursor(
+        self, client: TestClient, recording_session: RecordingSession
+    ):
+        """Should reject a cursor that cannot be decoded."""
+        response = client.get(
+            f"/recordings/{recording_session.id}/locations", params={"cursor": "not-a-cursor"}
+        )
+        
+        assert response.status_code == 400
+        assert "Invalid cursor" in response.json()["detail"]
+
+
+class TestGetSensorReadings:
+    """Tests for GET /recordings/{session_id}/sensors"""
+    
+    def test_get_sensors_cursor_pagination(
+        self, client: TestClient, db: Session, recording_session: RecordingSession
+    ):
+        """Should page sensor readings with the next cursor."""
+        start = datetime(2026, 3, 1, 7, 30)
+        readings = [
+            SensorReading(session_id=recording_session.id, timestamp=start + timedelta(milliseconds=10 * i))
+            for i in range(3)
+        ]
+        db.add_all(readings)
+        db.commit()
+        url = f"/recordings/{recording_session.id}/sensors"
+        
+        first = client.get(url, params={"limit": 2})
+        second = client.get(url, params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+        
+        assert [r["id"] for r in first.json()] == [readings[0].id, readings[1].id]
+        assert [r["id"] for r in second.json()] == [readings[2].id]
+        assert "X-Next-Cursor" not in second.headers
+    
+    @pytest.mark.parametrize("encoding", ["zstd", "gzip"])
+    def test_get_sensors_compressed(
+        self, client: TestClient, db: Session, recording_session: RecordingSession, encoding: str
+    ):
+        """Should compress a large response with an encoding the client accepts."""
+        start = datetime(2026, 3, 1, 7, 30)
+        db.add_all([
+            SensorReading(session_id=recording_session.id, timestamp=start + timedelta(milliseconds=10 * i), accel_z=9.81)
+            for i in range(50)
+        ])
+        db.commit()
+        
+        response = client.get(
+            f"/recordings/{recording_session.id}/sensors", headers={"Accept-Encoding": encoding}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == encoding
+        assert len(response.json()) == 50
 
 
 class TestStaleSessionCleanup:
@@ -280,6 +1128,48 @@ class TestStaleSessionCleanup:
         # Verify session is now abandoned
         db.refresh(stale_session)
         assert stale_session.status == RecordingStatus.ABANDONED
+
+    def test_cleanup_computes_paths(
+        self, client: TestClient, db: Session, approved_line: Line
+    ):
+        """Should compute paths and set ended_at for every abandoned session."""
+        last_activity = datetime.utcnow() - timedelta(minutes=90)
+        sessions = [
+            RecordingSession(
+                line_id=approved_line.id,
+                status=RecordingStatus.IN_PROGRESS,
+                last_activity_at=last_activity,
+            )
+            for _ in range(2)
+        ]
+        db.add_all(sessions)
+        db.flush()
+        for session in sessions:
+            for i in range(3):
+                db.add(LocationPoint(
+                    session_id=session.id,
+                    timestamp=last_activity - timedelta(seconds=10 - i),
+                    latitude=-17.39 - i * 0.001,
+                    longitude=-66.15,
+                    point=func.ST_GeomFromEWKT(f"SRID=4326;POINT(-66.15 {-17.39 - i * 0.001})"),
+                ))
+        db.commit()
+
+        response = client.post(
+            "/recordings/cleanup/stale",
+            params={"inactive_minutes": 30}
+        )
+
+        assert response.status_code == 200
+        assert {s.id for s in sessions} <= set(response.json()["session_ids"])
+        for session in sessions:
+            db.refresh(session)
+            assert session.status == RecordingStatus.ABANDONED
+            assert session.ended_at == last_activity
+            assert db.execute(
+                select(func.ST_NPoints(RecordingSession.computed_path))
+                .where(RecordingSession.id == session.id)
+            ).scalar_one() == 3
     
     def test_cleanup_preserves_active_sessions(
         self, client: TestClient, recording_session: RecordingSession
@@ -0,0 +1,101 @@
+"""
+Tests for environment-driven database settings.
+"""
+import pytest
+
+from database import _async_connect_args, _pool_options, _sync_connect_args
+from settings import DatabaseSettings
+
+
+class TestDatabaseSettings:
+    """Tests for reading DatabaseSettings from the environment."""
+
+    def test_defaults(self, monkeypatch):
+        """Should disable echo and use the default pool when nothing is set."""
+        for name in ("DB_ECHO", "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_PRE_PING",
+                     "DB_POOL_RECYCLE", "DB_STATEMENT_TIMEOUT_MS", "DB_PGBOUNCER"):
+            monkeypatch.delenv(name, raising=False)
+
+        settings = DatabaseSettings.from_env()
+
+        assert settings.echo is False
+        assert settings.pool_size == 5
+        assert settings.max_overflow == 10
+        assert settings.pool_pre_ping is True
+        assert settings.statement_timeout_ms == 0
+        assert settings.pgbouncer is False
+
+    def test_reads_environment(self, monkeypatch):
+        """Should parse booleans and integers from environment variables."""
+        monkeypatch.setenv("DB_ECHO", "yes")
+        monkeypatch.setenv("DB_POOL_SIZE", "20")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "off")
+        monkeypatch.setenv("DB_POOL_RECYCLE", "-1")
+        monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "15000")
+        monkeypatch.setenv("DB_PGBOUNCER", "1")
+
+        settings = DatabaseSettings.from_env()
+
+        assert settings.echo is True
+        assert settings.pool_size == 20
+        assert settings.max_overflow == 0
+        assert settings.pool_pre_ping is False
+        assert settings.pool_recycle == -1
+        assert settings.statement_timeout_ms == 15000
+        assert settings.pgbouncer is True
+
+    def test_invalid_value(self, monkeypatch):
+        """Should name the variable when a value cannot be parsed."""
+        monkeypatch.setenv("DB_POOL_SIZE", "many")
+
+        with pytest.raises(ValueError, match="DB_POOL_SIZE"):
+            DatabaseSettings.from_env()
+
+
+class TestEngineOptions:
+    """Tests for the engine arguments derived from settings."""
+
+    def test_pool_options(self):
+        """Should pass pool settings through to the engines."""
+        settings = DatabaseSettings(url="postgresql://x/y", pool_size=3, max_overflow=7, pool_recycle=60)
+
+        assert _pool_options(settings) == {
+            "echo": False,
+            "pool_size": 3,
+            "max_overflow": 7,
+            "pool_pre_ping": True,
+            "pool_recycle": 60,
+        }
+
+    def test_statement_timeout_direct(self):
+        """Should send the statement timeout as a startup parameter."""
+        settings = DatabaseSettings(url="postgresql://x/y", statement_timeout_ms=5000)
+
+        assert _sync_connect_args(settings) == {"options": "-c statement_timeout=5000"}
+        assert _async_connect_args(settings) == {"server_settings": {"statement_timeout": "5000"}}
+
+    def test_pgbouncer_disables_prepared_statement_caches(self):
+        """Should disable asyncpg statement caches and skip startup parameters behind PgBouncer."""
+        settings = DatabaseSettings(url="postgresql://x/y", statement_timeout_ms=5000, pgbouncer=True)
+
+        connect_args = _async_connect_args(settings)
+
+        assert connect_args["statement_cache_size"] == 0
+        assert connect_args["prepared_statement_cache_size"] == 0
+        assert connect_args["prepared_statement_name_func"]() != connect_args["prepared_statement_name_func"]()
+        assert "server_settings" not in connect_args
+        assert _sync_connect_args(settings) == {}
+
+
+class TestHealthCheck:
+    """Tests for GET /health"""
+
+    def test_health_reports_pool(self, client):
+        """Should include live connection pool statistics."""
+        response = client.get("/health")
+
+        assert response.status_code == 200
+        pool = response.json()["pool"]
+        assert pool["class"] == "AsyncAdaptedQueuePool"
+        assert {"size", "checked_in", "checked_out", "overflow"} <= pool.keys()